@@ -1,29 +1,68 @@
+import os
 import argparse
-from src.data_ingestion.download_data import get_data
-from src.visualizations.visualize_stations import (
-    visualize_stations,
-    get_voivodeship_names,
+import geopandas as gpd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.data_ingestion.download_data import get_stations_data, update_precip_data
+from src.data_ingestion.download_precipitations import (
+    get_analysis_colnames,
+    read_precip_data,
 )
+from src.data_ingestion.download_borders import get_voivodeship_names
+from src.visualizations.visualize_stations import visualize_stations
 from src.visualizations.visualize_timeseries_data import visualize_available_voi_data
 from src.preprocessing.preprocessing_stations import get_and_save_missing_stations
-from src.preprocessing.clipping import clip_data_to_voi
-from src.preprocessing.preprocessing_precip import preprocess_precipitation
+from src.preprocessing.clipping import clip_stations_to_voi, clip_precip_to_voi
+from src.preprocessing.preprocessing_precip import (
+    preprocess_precipitation,
+    get_imputers,
+)
+from src.preprocessing.precip_cube import get_precip_cube
+from src.preprocessing.station_partition import get_station_partition
 from src.calculations.obtain_basic_statistics import get_basic_statistics
 from src.utils.utils import save_df
 from src.visualizations.visualize_EDA_results import visualize_EDA
-from src.calculations.calculate_SPI import get_SPI
 from src.analysis.SPI_analysis import stations_SPI_pipeline, voi_SPI_pipeline
+from src.calculations.drought_indices import (
+    get_drought_indices,
+    get_stations_indices,
+    save_drought_indices,
+)
+
+
+def analyze_voivodeship(
+    voi: str,
+    voi_polygon: gpd.GeoSeries,
+    voi_stations: gpd.GeoDataFrame,
+    imputer: str = "month_mean",
+    reference: tuple[int, int] = None,
+    workers: int = None,
+    indices: list[str] = None,
+) -> str:
+    """Pipeline for preprocessing, SPI calculations and visualizations of one voivodeship
+       (precipitation data is read only for stations from the voivodeship)
 
+    Args:
+        voi (str): Voivodeship name
+        voi_polygon (gpd.GeoSeries): Polygon of voivodeship
+        voi_stations (gpd.GeoDataFrame): Stations clipped to voivodeship
+        imputer (str, optional): Name of the imputer of missing precipitation. Defaults to "month_mean".
+        reference (tuple[int, int], optional): Reference period of calendar-month SPI of stations and of SPI
+                                               of the voivodeship. Defaults to None (one distribution over all months).
+        workers (int, optional): Number of processes for stations. Defaults to None (number of CPUs).
+        indices (list[str], optional): Names of other drought indices of stations from get_drought_indices.
+                                       Defaults to None (only SPI).
 
-def main(voi):
-    # Data acquisition
-    all_precip, stations = get_data()
+    Returns:
+        str: Voivodeship name
+    """
+    precip = read_precip_data(get_analysis_colnames(), voi_stations["ID"].tolist())
 
     # Preprocessing
-    voi_polygon, voi_precip, voi_stations = clip_data_to_voi(all_precip, stations, voi)
-    get_and_save_missing_stations(all_precip, stations)
-    preprocessed_df = preprocess_precipitation(voi_precip, voi)
+    voi_precip = clip_precip_to_voi(precip, voi_stations)
+    preprocessed_df = preprocess_precipitation(voi_precip, voi, imputer)
     save_df(preprocessed_df, f"preprocessed_{voi}_data.csv", "data")
+    cube = get_precip_cube(preprocessed_df, voi)
+    partition = get_station_partition(preprocessed_df)
 
     # Obtaining basic statistics for preprocessed data
     get_basic_statistics(preprocessed_df, voi)
@@ -33,36 +72,147 @@ def main(voi):
     visualize_available_voi_data(voi_precip, voi)
 
     # EDA visualizations for precipitation data
-    visualize_EDA(preprocessed_df, voi)
-
-    # SPI calculations for precipitation data
-    get_SPI(preprocessed_df, voi)
+    visualize_EDA(preprocessed_df, voi, partition)
 
     # SPI analysis based on voivodeship stations
-    stations_SPI_pipeline(preprocessed_df, voi_polygon, voi)
+    stations_SPI_pipeline(
+        preprocessed_df, voi_polygon, voi, cube, reference, workers, partition
+    )
 
     # SPI analysis based on voivodeship
-    voi_SPI_pipeline(preprocessed_df, voi)
+    voi_SPI_pipeline(preprocessed_df, voi, cube, reference=reference)
+
+    # Other drought indices of stations (calculated at once)
+    if indices:
+        save_drought_indices(
+            get_stations_indices(cube, indices, reference=reference), voi
+        )
+
+    return voi
+
+
+def main(
+    vois,
+    sync=False,
+    offline=False,
+    workers=None,
+    imputer="month_mean",
+    reference=None,
+    indices=None,
+):
+    if isinstance(vois, str):
+        vois = [vois]
+
+    # Data acquisition (shared by all voivodeships, so it's done only once)
+    print("Reading the data...")
+    stations = get_stations_data(offline)
+    update_precip_data(sync, offline)
+    clipped = {voi: clip_stations_to_voi(stations, voi, offline) for voi in vois}
+    print("Reading the data ended")
+
+    get_and_save_missing_stations(
+        read_precip_data(["station_code", "station_name"]), stations
+    )
+
+    # Analysis of voivodeships (in separate processes if there is more than one,
+    # otherwise stations of the voivodeship are analyzed in separate processes)
+    voi_workers = min(workers or os.cpu_count(), len(vois))
+    if voi_workers == 1:
+        for voi in vois:
+            analyze_voivodeship(
+                voi, *clipped[voi], imputer, reference, workers, indices
+            )
+    else:
+        print(f"Analyzing {len(vois)} voivodeships in {voi_workers} processes...")
+        with ProcessPoolExecutor(max_workers=voi_workers) as executor:
+            futures = [
+                executor.submit(
+                    analyze_voivodeship,
+                    voi,
+                    *clipped[voi],
+                    imputer,
+                    reference,
+                    1,
+                    indices,
+                )
+                for voi in vois
+            ]
+            for future in as_completed(futures):
+                print(f"Analysis of {future.result()} voivodeship ended")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        description="Analyze precipitation data for a specified voivodeship."
+        description="Analyze precipitation data for specified voivodeships."
     )
     parser.add_argument(
         "--voivodeship",
         type=str,
-        default="Lubusz",
-        help="The name of the voivodeship (default: Lubusz)",
+        nargs="+",
+        default=["Lubusz"],
+        help="Names of the voivodeships or 'all' for all of them (default: Lubusz)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Download only new or changed precipitation archives into existing data",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Read downloaded files only from the raw archive cache in data/cache/",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes analyzing voivodeships or stations of one voivodeship (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--imputer",
+        type=str,
+        choices=list(get_imputers()),
+        default="month_mean",
+        help="Method of filling missing precipitation (default: month_mean)",
+    )
+    parser.add_argument(
+        "--reference-period",
+        type=int,
+        nargs=2,
+        metavar=("START", "END"),
+        default=None,
+        help="Fit SPI of stations for every calendar month and SPI of the voivodeship over years START-END (e.g. 1991 2020)",
+    )
+    parser.add_argument(
+        "--indices",
+        type=str,
+        nargs="+",
+        choices=list(get_drought_indices()),
+        default=None,
+        help="Other drought indices of stations saved in results/[voi]_drought_indices.csv",
     )
     args = parser.parse_args()
 
-    voivodeship = args.voivodeship
-    available_voivodeships = get_voivodeship_names()
-    if voivodeship not in available_voivodeships:
+    available_voivodeships = get_voivodeship_names(args.offline)
+    if args.voivodeship == ["all"]:
+        voivodeships = available_voivodeships
+    else:
+        voivodeships = list(dict.fromkeys(args.voivodeship))
+    wrong_voivodeships = [
+        voi for voi in voivodeships if voi not in available_voivodeships
+    ]
+    if wrong_voivodeships:
         print(
-            "Wrong voivodeship. You can choose among:",
+            f"Wrong voivodeship ({', '.join(wrong_voivodeships)}). You can choose among:",
             ", ".join(available_voivodeships),
         )
     else:
-        main(voivodeship)
+        main(
+            voivodeships,
+            args.sync,
+            args.offline,
+            args.workers,
+            args.imputer,
+            args.reference_period,
+            args.indices,
+        )
@@ -1,5 +1,6 @@
 __all__ = [
     "analysis",
+    "benchmarks",
     "calculations",
     "data_ingestion",
     "preprocessing",
@@ -1,8 +1,17 @@
 import os
 import pandas as pd
 import geopandas as gpd
+from concurrent.futures import ProcessPoolExecutor
 from src.utils.utils import save_df
-from src.calculations.calculate_SPI import get_SPI
+from src.calculations.incremental_SPI import update_SPI
+from src.calculations.batch_SPI import get_stations_SPI, split_stations_SPI
+from src.calculations.calendar_SPI import get_stations_calendar_SPI
+from src.calculations.drought_events import get_drought_events, save_drought_events
+from src.preprocessing.precip_cube import PrecipCube, build_precip_cube
+from src.preprocessing.station_partition import (
+    StationPartition,
+    get_station_partition,
+)
 from src.visualizations.visualize_SPI import (
     visualize_SPI,
     compare_stations_SPI,
@@ -53,80 +62,119 @@ def get_SPI_statistics(
     )
 
 
+def station_SPI_pipeline(
+    station_name: str, SPIs: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame], voi: str
+) -> tuple[float, float, float]:
+    """Pipeline for SPI statistics and visualizations of one station (run in a separate process).
+
+    Args:
+        station_name (str): Name of the measuring station.
+        SPIs (tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]): SPI-1, SPI-3 and SPI-12 of the station.
+        voi (str): Voivodeship name.
+
+    Returns:
+        tuple[float, float, float]: Mean SPI-1, SPI-3 and SPI-12 of the station.
+    """
+    SPI_1, SPI_3, SPI_12 = SPIs
+
+    SPI_1["SPI"] = SPI_1["SPI"].round(2)
+    SPI_3["SPI"] = SPI_3["SPI"].round(2)
+    SPI_12["SPI"] = SPI_12["SPI"].round(2)
+
+    get_SPI_statistics(SPI_1, SPI_3, SPI_12, voi, station_name)
+    visualize_SPI(SPI_1, SPI_3, SPI_12, voi, station_name)
+    compare_stations_SPI(SPI_1, SPI_3, SPI_12, station_name, voi)
+
+    return SPI_1["SPI"].mean(), SPI_3["SPI"].mean(), SPI_12["SPI"].mean()
+
+
 def stations_SPI_pipeline(
-    preprocessed_voi_df: pd.DataFrame, voi_polygon: gpd.GeoDataFrame, voi: str
+    preprocessed_voi_df: pd.DataFrame,
+    voi_polygon: gpd.GeoDataFrame,
+    voi: str,
+    cube: PrecipCube = None,
+    reference: tuple[int, int] = None,
+    workers: int = None,
+    partition: StationPartition = None,
 ) -> None:
-    """Pipeline for SPI analysis for an each station in the given voivodeship.
+    """Pipeline for SPI analysis for an each station in the given voivodeship. SPI and drought events of all stations
+    are calculated at once, statistics and visualizations of stations are made in a process pool. Stations without enough data
+    for SPI are skipped.
 
     Args:
         preprocessed_voi_df (pd.DataFrame): Pandas DataFrame containing preprocessed data for a given voivodeship.
         voi_polygon (gpd.GeoDataFrame): GeoDataFrame with a polygon containing voivodeship borders.
         voi (str): Voivodeship name.
+        cube (PrecipCube, optional): Cube of preprocessed data. Defaults to None (built from preprocessed_voi_df).
+        reference (tuple[int, int], optional): First and last year of the reference period. If given, SPI distributions
+                                               are fitted for every calendar month over this period (and cached).
+                                               Defaults to None (one distribution fitted over all months).
+        workers (int, optional): Number of processes for stations (1 runs them in the current process).
+                                 Defaults to None (number of CPUs).
+        partition (StationPartition, optional): Partition of preprocessed_voi_df by stations.
+                                                Defaults to None (built from preprocessed_voi_df).
     """
+    if cube is None:
+        cube = build_precip_cube(preprocessed_voi_df)
+    if partition is None:
+        partition = get_station_partition(preprocessed_voi_df)
 
-    station_names = preprocessed_voi_df["station_name"].unique()
-    avg_SPIs = pd.DataFrame(
-        index=station_names, columns=["SPI_1", "SPI_3", "SPI_12", "lat", "lon"]
-    )
-
-    for s in station_names:
-        if get_SPI(
-            preprocessed_voi_df[preprocessed_voi_df["station_name"] == s],
-            voi,
-            False,
-        ):
-            SPI_1, SPI_3, SPI_12 = get_SPI(
-                preprocessed_voi_df[preprocessed_voi_df["station_name"] == s],
-                voi,
-                False,
+    if reference is None:
+        stations_SPI = get_stations_SPI(cube)
+    else:
+        stations_SPI = get_stations_calendar_SPI(cube, voi, reference=reference)
+    save_drought_events(get_drought_events(stations_SPI), voi)
+    SPIs = split_stations_SPI(stations_SPI)
+
+    station_names = [s for s in partition.station_names if s in SPIs]
+    workers = min(workers or os.cpu_count(), max(len(station_names), 1))
+    if workers == 1:
+        means = [station_SPI_pipeline(s, SPIs[s], voi) for s in station_names]
+    else:
+        # Results are returned in the order of stations
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            means = list(
+                executor.map(
+                    station_SPI_pipeline,
+                    station_names,
+                    [SPIs[s] for s in station_names],
+                    [voi] * len(station_names),
+                )
             )
 
-            SPI_1["SPI"] = SPI_1["SPI"].round(2)
-            SPI_3["SPI"] = SPI_3["SPI"].round(2)
-            SPI_12["SPI"] = SPI_12["SPI"].round(2)
-
-            get_SPI_statistics(SPI_1, SPI_3, SPI_12, voi, s)
-            visualize_SPI(SPI_1, SPI_3, SPI_12, voi, s)
-            compare_stations_SPI(SPI_1, SPI_3, SPI_12, s, voi)
-        avg_SPIs.loc[s, "SPI_1"] = SPI_1["SPI"].mean()
-        avg_SPIs.loc[s, "SPI_3"] = SPI_3["SPI"].mean()
-        avg_SPIs.loc[s, "SPI_12"] = SPI_12["SPI"].mean()
-        avg_SPIs.loc[s, "lat"] = preprocessed_voi_df[
-            preprocessed_voi_df["station_name"] == s
-        ]["lat"].iloc[0]
-        avg_SPIs.loc[s, "lon"] = preprocessed_voi_df[
-            preprocessed_voi_df["station_name"] == s
-        ]["lon"].iloc[0]
+    avg_SPIs = pd.DataFrame(
+        means, index=station_names, columns=["SPI_1", "SPI_3", "SPI_12"]
+    ).join(partition.station_values(preprocessed_voi_df, ["lat", "lon"]))
     voi_SPI_map(avg_SPIs, voi_polygon, voi)
 
 
-def voi_SPI_pipeline(preprocessed_voi_df: pd.DataFrame, voi: str) -> None:
-    """Pipeline for SPI analysis for a given voivodeship.
+def voi_SPI_pipeline(
+    preprocessed_voi_df: pd.DataFrame,
+    voi: str,
+    cube: PrecipCube = None,
+    full: bool = False,
+    reference: tuple[int, int] = None,
+) -> None:
+    """Pipeline for SPI analysis for a given voivodeship. Saved results are reused as long as monthly sums
+    of precipitation they were calculated from have not changed. With the reference period, SPI of months added
+    after it is appended to saved results (see update_SPI).
 
     Args:
         preprocessed_voi_df (pd.DataFrame): Pandas DataFrame containing preprocessed data for a given voivodeship.
         voi (str): Voivodeship name.
+        cube (PrecipCube, optional): Cube of preprocessed data. Defaults to None (built from preprocessed_voi_df).
+        full (bool, optional): Flag whether to calculate all SPI again. Defaults to False.
+        reference (tuple[int, int], optional): First and last year of the reference period the distributions
+                                               are fitted over. Defaults to None (all months).
     """
-    if (
-        (not os.path.exists(f"results/{voi}_SPI_monthly.csv"))
-        or (not os.path.exists(f"results/{voi}_SPI_quarterly.csv"))
-        or (not os.path.exists(f"results/{voi}_SPI_yearly.csv"))
-    ):
-        SPI_1, SPI_3, SPI_12 = get_SPI(
-            preprocessed_voi_df,
-            voi,
-            True,
-        )
-    else:
-        SPI_1 = pd.read_csv(
-            f"results/{voi}_SPI_yearly.csv", index_col="date", parse_dates=True
-        )
-        SPI_3 = pd.read_csv(
-            f"results/{voi}_SPI_quarterly.csv", index_col="date", parse_dates=True
-        )
-        SPI_12 = pd.read_csv(
-            f"results/{voi}_SPI_monthly.csv", index_col="date", parse_dates=True
-        )
+    if cube is None:
+        cube = build_precip_cube(preprocessed_voi_df)
+
+    SPIs = update_SPI(cube.monthly_totals(), voi, full=full, reference=reference)
+    if SPIs is None:
+        print(f"Not enough data to calculate SPI for {voi} voivodeship")
+        return
+    SPI_1, SPI_3, SPI_12 = SPIs
 
     SPI_1["SPI"] = SPI_1["SPI"].round(2)
     SPI_3["SPI"] = SPI_3["SPI"].round(2)
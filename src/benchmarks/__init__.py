@@ -0,0 +1,8 @@
+__all__ = [
+    "benchmark_stations",
+    "benchmark_filling",
+    "benchmark_SPI",
+    "benchmark_SPI_classes",
+    "benchmark_drought_events",
+    "benchmark_drought_indices",
+]
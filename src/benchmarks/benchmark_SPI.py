@@ -0,0 +1,103 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.calculations.calculate_SPI import calculate_SPI
+from src.calculations.batch_SPI import calculate_SPI_batch
+from src.calculations.fit_gamma import get_gamma_fitters
+from src.benchmarks.timing import time_best
+
+
+def create_monthly_matrix(
+    n_stations: int = 300, n_years: int = 30, dry: float = 0.02, seed: int = 0
+) -> np.ndarray:
+    """
+    Function creating synthetic stations x months matrix of monthly precipitation sums
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 300.
+            n_years (int, optional): Number of years. Defaults to 30.
+            dry (float, optional): Fraction of months without precipitation. Defaults to 0.02.
+            seed (int, optional): Seed of random generator. Defaults to 0.
+
+        Returns:
+            np.ndarray: Stations x months matrix of precipitation sums
+    """
+    rng = np.random.default_rng(seed)
+    shape = rng.uniform(1, 4, (n_stations, 1))
+    matrix = rng.gamma(shape, 50 / shape, (n_stations, n_years * 12)).round(1)
+    matrix[rng.random(matrix.shape) < dry] = 0
+    return matrix
+
+
+def calculate_SPI_loop(matrix: np.ndarray, window: int, zeros: str) -> np.ndarray:
+    """
+    Reference (calculate_SPI with scipy.stats.gamma.fit for every station) version of calculate_SPI_batch
+
+        Args:
+            matrix (np.ndarray): Stations x months matrix of precipitation sums
+            window (int): The size of the rolling window
+            zeros (str): Handling of zero sums ("clamp" or "mixed")
+
+        Returns:
+            np.ndarray: Stations x months matrix of SPI
+    """
+    SPI = np.full(matrix.shape, np.nan)
+    for i, row in enumerate(matrix):
+        station_SPI = calculate_SPI(
+            pd.DataFrame({"24h_precipitation_mm": row}), window, "scipy", zeros
+        )
+        SPI[i, station_SPI.index] = station_SPI["SPI"]
+    return SPI
+
+
+def benchmark_SPI(n_stations: int = 300, n_years: int = 30, repeats: int = 3) -> None:
+    """
+    Function comparing methods of fitting gamma distribution in calculate_SPI_batch with calculate_SPI
+    using scipy.stats.gamma.fit for every station. Raises AssertionError if SPI of the maximum likelihood
+    method differs from scipy or if SPI of closed-form approximations with mixed distribution differs
+    by more than 0.05 (zeros clamped to 1e-15 are far in the tail, where the approximations are not accurate).
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 300.
+            n_years (int, optional): Number of years. Defaults to 30.
+            repeats (int, optional): Number of repeats of each method (the best time is reported).
+                                     Defaults to 3.
+    """
+    matrix = create_monthly_matrix(n_stations, n_years)
+    print(f"Dataset: {n_stations} stations, {n_years} years")
+
+    for zeros in ["clamp", "mixed"]:
+        expected, loop_time = time_best(
+            lambda: [
+                calculate_SPI_loop(matrix, window, zeros) for window in [1, 3, 12]
+            ],
+            repeats=repeats,
+        )
+        print(
+            f"[{zeros}] calculate_SPI with scipy for every station: {loop_time:.1f} ms"
+        )
+
+        for fit in get_gamma_fitters():
+            SPIs, elapsed = time_best(
+                lambda: [
+                    calculate_SPI_batch(matrix, window, zeros, fit)
+                    for window in [1, 3, 12]
+                ],
+                repeats=repeats,
+            )
+            difference = max(
+                np.nanmax(np.abs(SPI - reference))
+                for SPI, reference in zip(SPIs, expected)
+            )
+            print(
+                f"[{zeros}] {fit}: {elapsed:.1f} ms,",
+                f"max difference of SPI from scipy: {difference:.2e}",
+            )
+            if fit in ["scipy", "mle"]:
+                assert difference < 1e-6, f"SPI of {fit} method differs from scipy"
+            elif zeros == "mixed":
+                assert difference < 0.05, f"SPI of {fit} method differs from scipy"
+
+
+if __name__ == "__main__":
+    benchmark_SPI(*map(int, sys.argv[1:4]))
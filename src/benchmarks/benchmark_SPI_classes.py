@@ -0,0 +1,68 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.utils.SPI_utils import classify_SPI
+from src.benchmarks.timing import time_best
+
+
+def map_to_range_loop(value: float) -> str:
+    """
+    Reference (dictionary of ranges scanned for every value) version of classify_SPI
+
+        Args:
+            value (float): SPI value
+
+        Returns:
+            str: Precipitation condition assigned based on range.
+    """
+    SPI_ranges = {
+        "Extremely wet": (2.0, float("inf")),
+        "Very wet": (1.5, 1.99),
+        "Moderately wet": (1.0, 1.49),
+        "Moderate conditions": (-0.99, 0.99),
+        "Moderate drought": (-1.49, -1.0),
+        "Severe drought": (-1.99, -1.5),
+        "Extreme drought": (-float("inf"), -2.0),
+    }
+
+    for range_name, (lower_bound, upper_bound) in SPI_ranges.items():
+        if lower_bound <= value <= upper_bound:
+            return f"{range_name}"
+    return "Wrong range"
+
+
+def benchmark_SPI_classes(n_values: int = 1_000_000, repeats: int = 3) -> None:
+    """
+    Function comparing classify_SPI with mapping every value with map_to_range_loop.
+    Raises AssertionError if classes differ for values which the loop assigns to any class
+    (values between its ranges, e.g. 1.995, are 'Wrong range' in the loop).
+
+        Args:
+            n_values (int, optional): Number of SPI values. Defaults to 1 000 000.
+            repeats (int, optional): Number of repeats of each method (the best time is reported).
+                                     Defaults to 3.
+    """
+    rng = np.random.default_rng(0)
+    SPI = pd.Series(rng.normal(0, 1.2, n_values).round(3))
+    SPI.iloc[: 2 * 7] = [-2.0, -1.99, -1.5, -1.49, -1.0, -0.99, 0.0] * 2
+    SPI.iloc[7:14] *= -1
+    print(f"Dataset: {n_values} SPI values")
+
+    expected, loop_time = time_best(SPI.map, map_to_range_loop, repeats=repeats)
+    print(f"map_to_range for every value: {loop_time:.1f} ms")
+
+    classes, classify_time = time_best(classify_SPI, SPI, repeats=repeats)
+    print(f"classify_SPI: {classify_time:.1f} ms")
+
+    in_range = expected != "Wrong range"
+    pd.testing.assert_series_equal(
+        classes[in_range].astype(str), expected[in_range], check_dtype=False
+    )
+    print(
+        "classify_SPI gives the same classes as map_to_range,",
+        f"{(~in_range).sum()} values between its ranges are classified too",
+    )
+
+
+if __name__ == "__main__":
+    benchmark_SPI_classes(*map(int, sys.argv[1:3]))
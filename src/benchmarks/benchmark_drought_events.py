@@ -0,0 +1,109 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.calculations.drought_events import get_drought_events
+from src.benchmarks.timing import time_best
+
+
+def get_drought_events_loop(
+    stations_SPI: pd.DataFrame, windows: list[int], threshold: float = -1.0
+) -> pd.DataFrame:
+    """
+    Reference (loop over stations and months) version of get_drought_events
+
+        Args:
+            stations_SPI (pd.DataFrame): Tidy DataFrame with station_name, date and SPI_[window] columns
+            windows (list[int]): Sizes of rolling windows
+            threshold (float, optional): SPI threshold of drought. Defaults to -1.0.
+
+        Returns:
+            pd.DataFrame: Drought events
+    """
+    events = []
+    for window in windows:
+        for station_name, station_SPI in stations_SPI.groupby(
+            "station_name", sort=False
+        ):
+            run = []
+            for date, SPI in zip(station_SPI["date"], station_SPI[f"SPI_{window}"]):
+                if SPI <= threshold:
+                    run.append((date, SPI))
+                    continue
+                if run:
+                    events.append((station_name, window, run))
+                run = []
+            if run:
+                events.append((station_name, window, run))
+
+    return pd.DataFrame(
+        [
+            (
+                station_name,
+                window,
+                run[0][0],
+                run[-1][0],
+                len(run),
+                -sum(SPI for _, SPI in run),
+                -min(SPI for _, SPI in run),
+            )
+            for station_name, window, run in events
+        ],
+        columns=[
+            "station_name",
+            "window",
+            "onset",
+            "end",
+            "duration",
+            "severity",
+            "peak_intensity",
+        ],
+    )
+
+
+def benchmark_drought_events(
+    n_stations: int = 300, n_years: int = 60, repeats: int = 3
+) -> None:
+    """
+    Function comparing get_drought_events with the loop over stations and months on synthetic SPI.
+    Raises AssertionError if events differ.
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 300.
+            n_years (int, optional): Number of years of monthly SPI. Defaults to 60.
+            repeats (int, optional): Number of repeats of each method (the best time is reported).
+                                     Defaults to 3.
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("1961-01-31", periods=12 * n_years, freq="ME")
+    windows = [1, 3, 12]
+    stations_SPI = pd.DataFrame(
+        {
+            "station_name": np.repeat(
+                [f"Station {i}" for i in range(n_stations)], len(dates)
+            ),
+            "date": np.tile(dates, n_stations),
+        }
+    )
+    for window in windows:
+        # Rolling means make longer windows persistent like SPI-3 and SPI-12
+        SPI = rng.normal(size=(n_stations, len(dates) + window - 1))
+        SPI = np.lib.stride_tricks.sliding_window_view(SPI, window, axis=1).mean(-1)
+        stations_SPI[f"SPI_{window}"] = (SPI * np.sqrt(window)).ravel()
+    print(f"Dataset: {n_stations} stations, {len(dates)} months")
+
+    expected, loop_time = time_best(
+        get_drought_events_loop, stations_SPI, windows, repeats=repeats
+    )
+    print(f"Loop over stations and months: {loop_time:.1f} ms")
+
+    events, events_time = time_best(
+        get_drought_events, stations_SPI, windows, repeats=repeats
+    )
+    print(f"get_drought_events: {events_time:.1f} ms")
+
+    pd.testing.assert_frame_equal(events, expected, check_dtype=False)
+    print(f"Both methods find the same {len(events)} drought events")
+
+
+if __name__ == "__main__":
+    benchmark_drought_events(*map(int, sys.argv[1:4]))
@@ -0,0 +1,97 @@
+import sys
+import numpy as np
+import pandas as pd
+from scipy import special
+from src.calculations.batch_SPI import rolling_sums
+from src.calculations.calendar_SPI import get_reference_sums
+from src.calculations.drought_indices import get_drought_indices
+from src.benchmarks.timing import time_best
+
+
+def get_station_indices_loop(sums: pd.Series) -> pd.DataFrame:
+    """
+    Reference (loop over calendar months of one station) version of PNI, deciles and SPEI
+
+        Args:
+            sums (pd.Series): Rolling sums of the station with month ends as index
+
+        Returns:
+            pd.DataFrame: PNI, deciles and SPEI of the station
+    """
+    indices = pd.DataFrame(index=sums.index, columns=["PNI", "deciles", "SPEI"])
+    for month in range(1, 13):
+        month_sums = sums[sums.index.month == month]
+        x = np.sort(month_sums.dropna().to_numpy())
+        n = len(x)
+
+        PNI = 100 * month_sums / x.mean()
+        deciles = 1 + sum(month_sums > np.quantile(x, q / 10) for q in range(1, 10))
+
+        # L-moments of the generalized logistic distribution
+        b0 = x.mean()
+        b1 = sum(i / (n - 1) * x[i] for i in range(n)) / n
+        b2 = sum(i * (i - 1) / ((n - 1) * (n - 2)) * x[i] for i in range(n)) / n
+        shape = -(6 * b2 - 6 * b1 + b0) / (2 * b1 - b0)
+        scale = (2 * b1 - b0) * np.sin(np.pi * shape) / (np.pi * shape)
+        location = b0 + scale * (np.pi / np.sin(np.pi * shape) - 1 / shape)
+        y = -np.log(1 - shape * (month_sums - location) / scale) / shape
+        SPEI = special.ndtri(1 / (1 + np.exp(-y))).clip(-3.09, 3.09)
+
+        indices.loc[month_sums.index] = np.c_[PNI, deciles, SPEI]
+    return indices.where(sums.notna()).astype(float)
+
+
+def benchmark_drought_indices(
+    n_stations: int = 100, n_years: int = 30, repeats: int = 3
+) -> None:
+    """
+    Function comparing drought indices calculated for all stations at once with the loop over stations
+    and calendar months on synthetic monthly precipitation. Raises AssertionError if indices differ.
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 100.
+            n_years (int, optional): Number of years of monthly precipitation. Defaults to 30.
+            repeats (int, optional): Number of repeats of each method (the best time is reported).
+                                     Defaults to 3.
+    """
+    rng = np.random.default_rng(0)
+    months = pd.date_range("1991-01-31", periods=12 * n_years, freq="ME")
+    matrix = rng.gamma(2.0, 25.0, size=(n_stations, len(months)))
+    names = ["PNI", "deciles", "SPEI"]
+    window = 3
+    print(f"Dataset: {n_stations} stations, {len(months)} months")
+
+    expected, loop_time = time_best(
+        lambda: [
+            get_station_indices_loop(pd.Series(sums, index=months))
+            for sums in rolling_sums(matrix, window)
+        ],
+        repeats=repeats,
+    )
+    print(f"Loop over stations and calendar months: {loop_time:.1f} ms")
+
+    def get_indices() -> dict:
+        sums = rolling_sums(matrix, window)
+        reference_sums = get_reference_sums(
+            sums, months, (months.year.min(), months.year.max())
+        )
+        return {
+            name: get_drought_indices()[name](sums, reference_sums, months)
+            for name in names
+        }
+
+    indices, indices_time = time_best(get_indices, repeats=repeats)
+    print(f"All stations at once: {indices_time:.1f} ms")
+
+    for name in names:
+        np.testing.assert_allclose(
+            indices[name],
+            np.stack([station[name].to_numpy() for station in expected]),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+    print(f"Both methods give the same {', '.join(names)}")
+
+
+if __name__ == "__main__":
+    benchmark_drought_indices(*map(int, sys.argv[1:4]))
@@ -0,0 +1,100 @@
+import sys
+import numpy as np
+import pandas as pd
+from src.preprocessing.preprocessing_precip import get_imputers
+from src.benchmarks.timing import time_best
+
+
+def fill_month_mean_loop(df: pd.DataFrame) -> pd.Series:
+    """
+    Reference (loop over every year and month) version of fill_month_mean
+
+        Args:
+            df (pd.DataFrame): Cleaned data
+
+        Returns:
+            pd.Series: Filled 24h_precipitation_mm column
+    """
+    df_filled = df.copy()
+    years = df_filled.year.unique()
+    months = df_filled.month.unique()
+
+    for year in years:
+        for month in months:
+            temp = df_filled[(df_filled.year == year) & (df_filled.month == month)]
+            if temp["24h_precipitation_mm"].isna().sum() > 0:
+                ind = temp[temp["24h_precipitation_mm"].isna()].index
+                df_filled.loc[ind, "24h_precipitation_mm"] = temp[
+                    "24h_precipitation_mm"
+                ].mean()
+
+    return df_filled["24h_precipitation_mm"]
+
+
+def create_dataset(
+    n_stations: int = 30, n_years: int = 30, missing: float = 0.05, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Function creating synthetic cleaned precipitation data of one voivodeship
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 30.
+            n_years (int, optional): Number of years (starting from 1991). Defaults to 30.
+            missing (float, optional): Fraction of missing measurements. Defaults to 0.05.
+            seed (int, optional): Seed of random generator. Defaults to 0.
+
+        Returns:
+            pd.DataFrame: Precipitation data with compact data types
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1991-01-01", periods=n_years * 365, freq="D")
+    n = n_stations * len(dates)
+
+    precip = np.where(rng.random(n) < 0.5, 0, rng.gamma(0.8, 5, n)).round(1)
+    precip[rng.random(n) < missing] = np.nan
+
+    return pd.DataFrame(
+        {
+            "station_code": np.repeat(249000000 + np.arange(n_stations), len(dates)),
+            "year": np.tile(dates.year, n_stations).astype("uint16"),
+            "month": np.tile(dates.month, n_stations).astype("uint8"),
+            "day": np.tile(dates.day, n_stations).astype("uint8"),
+            "24h_precipitation_mm": precip.astype("float32"),
+            "lat": np.repeat(rng.uniform(49, 55, n_stations), len(dates)),
+            "lon": np.repeat(rng.uniform(14, 24, n_stations), len(dates)),
+        }
+    )
+
+
+def benchmark_filling(
+    n_stations: int = 30, n_years: int = 30, repeats: int = 3
+) -> None:
+    """
+    Function comparing imputers of missing precipitation with the loop over every year and month.
+    Raises AssertionError if year-monthly means differ (means are computed with float64 accumulator,
+    so they can differ from the loop only by float32 rounding).
+
+        Args:
+            n_stations (int, optional): Number of stations. Defaults to 30.
+            n_years (int, optional): Number of years. Defaults to 30.
+            repeats (int, optional): Number of repeats of each method (the best time is reported).
+                                     Defaults to 3.
+    """
+    df = create_dataset(n_stations, n_years)
+    print(f"Dataset: {n_stations} stations, {n_years} years, {len(df)} rows")
+
+    expected, loop_time = time_best(fill_month_mean_loop, df, repeats=repeats)
+    print(f"Loop over years and months: {loop_time:.1f} ms")
+
+    for name, imputer in get_imputers().items():
+        filled, imputer_time = time_best(imputer, df, repeats=repeats)
+        print(f"{name}: {imputer_time:.1f} ms")
+        if name == "month_mean":
+            pd.testing.assert_series_equal(
+                filled.astype("float32"), expected, check_names=False, rtol=1e-6
+            )
+            print("month_mean gives the same values as the loop")
+
+
+if __name__ == "__main__":
+    benchmark_filling(*map(int, sys.argv[1:4]))
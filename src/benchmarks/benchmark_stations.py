@@ -0,0 +1,91 @@
+import io
+import sys
+import pandas as pd
+from src.data_ingestion.cache import fetch_cached
+from src.data_ingestion.download_stations import (
+    get_column_names,
+    get_stations_url,
+    parse_stations,
+)
+from src.utils.utils import dms_to_dd
+from src.benchmarks.timing import time_best
+
+
+def move_right_rowwise(row: pd.Series) -> pd.Series:
+    """
+    Reference (row by row) version of move_right, used for checking parity of parsed stations
+
+        Args:
+            row (pd.Series): Row to be fixed
+
+        Returns:
+            row (pd.Series): Fixed row
+    """
+    rzeka_index = 2
+    if str(row["river"])[0].isdigit():
+        for i in range(len(row) - 1, rzeka_index, -1):
+            row.iloc[i] = row.iloc[i - 1]
+        row.iloc[rzeka_index] = None
+    return row
+
+
+def parse_stations_rowwise(content: bytes) -> pd.DataFrame:
+    """
+    Reference (row by row) version of parse_stations
+
+        Args:
+            content (bytes): Raw content of 'kody_stacji.csv'
+
+        Returns:
+            stations (pd.DataFrame): Stations with coordinates in dd format
+    """
+    stations = pd.read_csv(
+        io.BytesIO(content),
+        sep=";",
+        encoding="cp1250",
+        index_col=0,
+        header=0,
+        names=get_column_names(),
+    )
+
+    stations = stations.apply(move_right_rowwise, axis=1)
+
+    stations["lon"] = stations["lon"].apply(dms_to_dd)
+    stations["lat"] = stations["lat"].apply(dms_to_dd)
+
+    return stations
+
+
+def benchmark_stations(
+    url: str = None, repeats: int = 5, offline: bool = False
+) -> None:
+    """
+    Function comparing vectorised and row by row parsing of 'kody_stacji.csv'. Raises AssertionError
+    if the parsed stations differ.
+
+        Args:
+            url (str, optional): Address of the stations codes file. Defaults to None (IMGW address).
+            repeats (int, optional): Number of repeats of each parser. Defaults to 5.
+            offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+    """
+    url = url or get_stations_url()
+    cached = fetch_cached(url, offline=offline)
+    if cached is None:
+        raise FileNotFoundError(
+            f"{url} is not cached, it can't be read in offline mode"
+        )
+    content = cached[0]
+
+    expected, rowwise_time = time_best(parse_stations_rowwise, content, repeats=repeats)
+    stations, vectorised_time = time_best(parse_stations, content, repeats=repeats)
+
+    pd.testing.assert_frame_equal(stations, expected)
+
+    print(f"Parsed {len(stations)} stations, results are identical")
+    print(f"Row by row parsing: {rowwise_time:.1f} ms")
+    print(f"Vectorised parsing: {vectorised_time:.1f} ms")
+    print(f"Speedup: {rowwise_time / vectorised_time:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_stations(*sys.argv[1:2])
@@ -0,0 +1,25 @@
+import time
+from typing import Any, Callable
+
+
+def time_best(
+    function: Callable, *args, repeats: int = 3, **kwargs
+) -> tuple[Any, float]:
+    """
+    Function for measuring the best time of calling the function out of given number of repeats
+
+        Args:
+            function (Callable): Measured function
+            *args: Positional arguments of the function
+            repeats (int, optional): Number of repeats. Defaults to 3.
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            tuple[Any, float]: Result of the last call with the best time in milliseconds
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
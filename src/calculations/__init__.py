@@ -1 +1,10 @@
-__all__ = ["obtain_basic_statistics", "calculate_SPI"]
+__all__ = [
+    "obtain_basic_statistics",
+    "calculate_SPI",
+    "fit_gamma",
+    "batch_SPI",
+    "calendar_SPI",
+    "incremental_SPI",
+    "drought_events",
+    "drought_indices",
+]
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from scipy import special
+from src.calculations.fit_gamma import get_gamma_probability
+from src.preprocessing.precip_cube import PrecipCube
+
+
+def rolling_sums(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Function calculating rolling sums over rows of stations x months matrix with cumulative sums.
+    Sums of windows which are not full (at the beginning of the row or containing NaN) are NaN.
+
+    Args:
+        matrix (np.ndarray): Stations x months matrix of precipitation (NaN outside the station's period)
+        window (int): The size of the rolling window
+
+    Returns:
+        np.ndarray: Stations x months matrix of rolling sums
+    """
+    available = ~np.isnan(matrix)
+    cumsum = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(np.where(available, matrix, 0), axis=1, out=cumsum[:, 1:])
+    counts = np.zeros(cumsum.shape, dtype=int)
+    np.cumsum(available, axis=1, out=counts[:, 1:])
+
+    sums = np.full(matrix.shape, np.nan)
+    full = counts[:, window:] - counts[:, :-window] == window
+    sums[:, window - 1 :] = np.where(
+        full, cumsum[:, window:] - cumsum[:, :-window], np.nan
+    )
+    return sums
+
+
+def calculate_SPI_batch(
+    matrix: np.ndarray, window: int = 1, zeros: str = "clamp", fit: str = "mle"
+) -> np.ndarray:
+    """Function to calculate SPI for every station (row) of stations x months matrix at once.
+    Gamma distribution is fitted to every row by maximum likelihood (as scipy.stats.gamma.fit does)
+    or with chosen closed-form approximation.
+
+    Args:
+        matrix (np.ndarray): Stations x months matrix of precipitation (NaN outside the station's period)
+        window (int, optional): The size of the rolling window for aggregating precipitation data.
+                                Defaults to 1.
+        zeros (str, optional): Handling of zero sums: "clamp" replaces them with 1e-15 (as calculate_SPI does),
+                               "mixed" fits gamma only to positive sums and uses mixed distribution
+                               with probability of zero. Defaults to "clamp".
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+
+    Returns:
+        np.ndarray: Stations x months matrix of SPI (NaN for not full windows and for stations
+                    with less than 2 sums)
+    """
+    sums = rolling_sums(matrix, window)
+    available = ~np.isnan(sums)
+    n = available.sum(axis=1)
+
+    SPI = special.ndtri(get_gamma_probability(sums, fit, zeros))
+    SPI[~available | (n < 2)[:, None]] = np.nan
+    return SPI
+
+
+def get_stations_SPI(
+    cube: PrecipCube,
+    windows: list[int] = [1, 3, 12],
+    zeros: str = "clamp",
+    fit: str = "mle",
+) -> pd.DataFrame:
+    """Function to calculate SPI of all stations of the voivodeship for different periods at once
+
+    Args:
+        cube (PrecipCube): Cube of preprocessed data
+        windows (list[int], optional): Sizes of rolling windows. Defaults to [1, 3, 12] (SPI-1, SPI-3, SPI-12).
+        zeros (str, optional): Handling of zero sums ("clamp" or "mixed"). Defaults to "clamp".
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+
+    Returns:
+        pd.DataFrame: Tidy DataFrame with station_name and date (month end) columns and SPI_[window]
+                      column for every window (only months of the station's period)
+    """
+    station_names, months, matrix = cube.monthly_matrix()
+    SPIs = {
+        window: calculate_SPI_batch(matrix, window, zeros, fit) for window in windows
+    }
+    return tidy_SPI(station_names, months, matrix, SPIs)
+
+
+def tidy_SPI(
+    station_names: np.ndarray,
+    months: pd.DatetimeIndex,
+    matrix: np.ndarray,
+    SPIs: dict,
+    prefix: str = "SPI_",
+) -> pd.DataFrame:
+    """Function to arrange stations x months matrices of SPI (or other indices) to tidy DataFrame
+
+    Args:
+        station_names (np.ndarray): Names of stations (rows of matrices)
+        months (pd.DatetimeIndex): Month ends (columns of matrices)
+        matrix (np.ndarray): Stations x months matrix of precipitation (NaN outside the station's period)
+        SPIs (dict): Dictionary with size of the window as key and stations x months matrix of SPI as value
+        prefix (str, optional): Prefix of names of columns. Defaults to "SPI_".
+
+    Returns:
+        pd.DataFrame: DataFrame with station_name and date columns and [prefix][window] column for every window
+                      (only months of the station's period)
+    """
+    tidy = pd.DataFrame(
+        {
+            "station_name": np.repeat(station_names, len(months)),
+            "date": np.tile(months, len(station_names)),
+        }
+    )
+    for window, SPI in SPIs.items():
+        tidy[f"{prefix}{window}"] = SPI.ravel()
+
+    return tidy[~np.isnan(matrix).ravel()].reset_index(drop=True)
+
+
+def split_stations_SPI(
+    stations_SPI: pd.DataFrame, windows: list[int] = [1, 3, 12]
+) -> dict:
+    """Function to split SPI of all stations from the result of get_stations_SPI into SPI of every station
+    in the format returned by get_SPI (the data is grouped by stations once)
+
+    Args:
+        stations_SPI (pd.DataFrame): SPI of all stations
+        windows (list[int], optional): Sizes of rolling windows. Defaults to [1, 3, 12].
+
+    Returns:
+        dict: Dictionary with name of the station as key and tuple of DataFrames with SPI column and dates
+              as index for every window as value (stations without enough data are skipped)
+    """
+    stations = dict()
+    for station_name, station_SPI in stations_SPI.groupby("station_name", sort=False):
+        station_SPI = station_SPI.set_index("date")
+        SPIs = tuple(
+            station_SPI[[f"SPI_{window}"]]
+            .dropna()
+            .rename(columns={f"SPI_{window}": "SPI"})
+            for window in windows
+        )
+        if not any(SPI.empty for SPI in SPIs):
+            stations[station_name] = SPIs
+    return stations
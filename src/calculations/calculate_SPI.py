@@ -1,10 +1,51 @@
 import pandas as pd
-from scipy import stats
+from scipy import special
 from typing import Tuple
 from src.utils.utils import save_df
+from src.calculations.fit_gamma import fit_gamma_distribution, gamma_probability
 
 
-def calculate_SPI(df: pd.DataFrame, window: int = 1) -> pd.DataFrame | None:
+def fit_SPI(
+    df: pd.DataFrame,
+    window: int = 1,
+    fit: str = "scipy",
+    zeros: str = "clamp",
+    reference: Tuple[int, int] = None,
+) -> Tuple[float, float, float] | None:
+    """
+    Function to fit distribution of rolling sums of precipitation used in SPI calculations.
+
+    Args:
+    df (pd.DataFrame): DataFrame containing the '24h_precipitation_mm' column with precipitation data.
+    window (int, optional): The size of the rolling window for aggregating precipitation data.
+                            Default value is 1.
+    fit (str, optional): Method of fitting gamma distribution (see calculate_SPI). Default value is "scipy".
+    zeros (str, optional): Handling of zero sums (see calculate_SPI). Default value is "clamp".
+    reference (tuple, optional): First and last year of the reference period. If given, the distribution is fitted
+                                 only to sums of windows ending in these years. Default value is None (all sums).
+
+    Returns:
+    tuple | None: Shape and scale of gamma distribution and probability of zero sum or None if there is not enough data.
+    """
+    precip_sum = df["24h_precipitation_mm"].rolling(window=window).sum().dropna()
+    if reference is not None:
+        years = precip_sum.index.year
+        precip_sum = precip_sum[(years >= reference[0]) & (years <= reference[1])]
+    if len(precip_sum) < 2:
+        return None
+    shape, scale, zero_probability = fit_gamma_distribution(
+        precip_sum.to_numpy("float64"), fit, zeros
+    )
+    return float(shape), float(scale), float(zero_probability)
+
+
+def calculate_SPI(
+    df: pd.DataFrame,
+    window: int = 1,
+    fit: str = "scipy",
+    zeros: str = "clamp",
+    parameters: Tuple[float, float, float] = None,
+) -> pd.DataFrame | None:
     """
     Function to calculate Standardized Precipitation Index (SPI) for the given DataFrame.
     The function fits a gamma distribution to the precipitation data and then transforms
@@ -16,23 +57,34 @@ def calculate_SPI(df: pd.DataFrame, window: int = 1) -> pd.DataFrame | None:
     df (pd.DataFrame): DataFrame containing the '24h_precipitation_mm' column with precipitation data.
     window (int, optional): The size of the rolling window for aggregating precipitation data.
                             Default value is 1.
+    fit (str, optional): Method of fitting gamma distribution: "scipy" (numerical MLE of scipy.stats.gamma.fit),
+                         "mle" (vectorised Newton's MLE), "thom" or "greenwood_durand" (closed-form approximations).
+                         Default value is "scipy".
+    zeros (str, optional): Handling of zero sums: "clamp" replaces them with 1e-15, "mixed" uses mixed distribution
+                           with probability of zero and gamma fitted to positive sums. Default value is "clamp".
+    parameters (tuple, optional): Parameters of the distribution from fit_SPI. If given, the distribution
+                                  is not fitted to the data, only its CDF is evaluated. Default value is None.
 
     Returns:
     pd.DataFrame | None: DataFrame containing SPI for the given data or None if there is not enough data.
     """
+    if parameters is None:
+        parameters = fit_SPI(df, window, fit, zeros)
+        if parameters is None:
+            return None
     precip_sum = df["24h_precipitation_mm"].rolling(window=window).sum().dropna()
-    if len(precip_sum) < 2:
-        return None
-    precip_sum[precip_sum <= 0] = 1e-15
-    params = stats.gamma.fit(precip_sum, floc=0)
-    shape, loc, scale = params
-    cdf = stats.gamma.cdf(precip_sum, shape, loc, scale)
-    SPI = stats.norm.ppf(cdf)
+    cdf = gamma_probability(precip_sum.to_numpy("float64"), *parameters, zeros)
+    SPI = special.ndtri(cdf)
     return pd.DataFrame({"SPI": SPI}, index=precip_sum.index)
 
 
 def get_SPI(
-    df: pd.DataFrame, voi: str, save: bool = True
+    df: pd.DataFrame,
+    voi: str,
+    save: bool = True,
+    monthly: bool = False,
+    fit: str = "scipy",
+    zeros: str = "clamp",
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
     """
     Function to calculate SPI for different periods (SPI-1, SPI-3, SPI-12) and save them to CSV files.
@@ -41,6 +93,10 @@ def get_SPI(
     df (pd.DataFrame): DataFrame containing the '24h_precipitation_mm' column with precipitation data.
     voi (str): Name of the analyzed voivodeship.
     save (bool): Flag whether to save the SPI results. Default to True.
+    monthly (bool): Flag whether df already contains monthly sums of precipitation
+                    (e.g. from PrecipCube.monthly_totals). Default to False.
+    fit (str): Method of fitting gamma distribution (see calculate_SPI). Default to "scipy".
+    zeros (str): Handling of zero sums (see calculate_SPI). Default to "clamp".
 
     Returns:
     tuple | None: Tuple containing SPI-1, SPI-3, and SPI-12 as DataFrames or None if there is not enough data.
@@ -48,13 +104,15 @@ def get_SPI(
 
     print("Calculating SPI...")
 
-    df.index = pd.to_datetime(df.index)
-
-    SPI = df.resample("ME").agg({"24h_precipitation_mm": "sum"}).dropna()
+    if monthly:
+        SPI = df[["24h_precipitation_mm"]].dropna()
+    else:
+        df.index = pd.to_datetime(df.index)
+        SPI = df.resample("ME").agg({"24h_precipitation_mm": "sum"}).dropna()
 
-    SPI_1 = calculate_SPI(SPI)
-    SPI_3 = calculate_SPI(SPI, 3)
-    SPI_12 = calculate_SPI(SPI, 12)
+    SPI_1 = calculate_SPI(SPI, 1, fit, zeros)
+    SPI_3 = calculate_SPI(SPI, 3, fit, zeros)
+    SPI_12 = calculate_SPI(SPI, 12, fit, zeros)
 
     if any(SPI is None for SPI in [SPI_1, SPI_3, SPI_12]):
         return None
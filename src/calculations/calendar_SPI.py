@@ -0,0 +1,239 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import special
+from typing import Tuple
+from src.utils.utils import save_df
+from src.calculations.fit_gamma import fit_gamma_distribution, gamma_probability
+from src.calculations.batch_SPI import rolling_sums, tidy_SPI
+from src.preprocessing.precip_cube import PrecipCube
+
+PARAMETER_COLUMNS = ["shape", "scale", "zero_probability", "n_sums", "reference_total"]
+
+
+def get_reference_sums(
+    sums: np.ndarray, months: pd.DatetimeIndex, reference: Tuple[int, int]
+) -> np.ndarray:
+    """Function arranging rolling sums from the reference period by calendar month
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+        reference (Tuple[int, int]): First and last year of the reference period
+
+    Returns:
+        np.ndarray: Stations x 12 calendar months x years array of sums (NaN outside the reference period)
+    """
+    years = np.arange(reference[0], reference[1] + 1)
+    reference_sums = np.full((sums.shape[0], 12, len(years)), np.nan)
+    in_reference = (months.year >= reference[0]) & (months.year <= reference[1])
+    reference_sums[
+        :, months.month[in_reference] - 1, months.year[in_reference] - reference[0]
+    ] = sums[:, in_reference]
+    return reference_sums
+
+
+def fit_calendar_parameters(
+    reference_sums: np.ndarray, fit: str = "mle", zeros: str = "clamp"
+) -> dict:
+    """Function fitting distribution of sums separately for every station and calendar month
+
+    Args:
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+        zeros (str, optional): Handling of zero sums ("clamp" or "mixed"). Defaults to "clamp".
+
+    Returns:
+        dict: Stations x 12 arrays of shape, scale, zero_probability, n_sums (number of fitted sums)
+              and reference_total (total of fitted sums, used to detect changes of the reference data)
+    """
+    shape, scale, zero_probability = fit_gamma_distribution(reference_sums, fit, zeros)
+    return {
+        "shape": shape,
+        "scale": scale,
+        "zero_probability": zero_probability,
+        "n_sums": (~np.isnan(reference_sums)).sum(axis=-1),
+        "reference_total": np.nansum(reference_sums, axis=-1),
+    }
+
+
+def calculate_calendar_SPI(
+    sums: np.ndarray, months: pd.DatetimeIndex, parameters: dict, zeros: str = "clamp"
+) -> np.ndarray:
+    """Function to calculate SPI from rolling sums with distributions fitted for every calendar month.
+    Only the CDF is evaluated, so SPI of new months is obtained without fitting.
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+        parameters (dict): Stations x 12 arrays of parameters from fit_calendar_parameters
+        zeros (str, optional): Handling of zero sums used in fitting. Defaults to "clamp".
+
+    Returns:
+        np.ndarray: Stations x months matrix of SPI (NaN where the sum or the distribution is not available)
+    """
+    month_idx = months.month.to_numpy() - 1
+    cdf = gamma_probability(
+        sums,
+        parameters["shape"][:, month_idx],
+        parameters["scale"][:, month_idx],
+        parameters["zero_probability"][:, month_idx],
+        zeros,
+    )
+    SPI = special.ndtri(cdf)
+    SPI[(parameters["n_sums"] < 2)[:, month_idx]] = np.nan
+    return SPI
+
+
+def load_SPI_parameters(
+    voi: str, reference: Tuple[int, int], fit: str, zeros: str
+) -> pd.DataFrame:
+    """Function for loading distribution parameters saved in 'data/[voi]_SPI_parameters.parquet'
+    which were fitted with given settings
+
+    Args:
+        voi (str): Voivodeship name
+        reference (Tuple[int, int]): First and last year of the reference period
+        fit (str): Name of the fitting method
+        zeros (str): Handling of zero sums
+
+    Returns:
+        pd.DataFrame: Parameters with station_name, window and month as index (empty if nothing is saved)
+    """
+    path = f"data/{voi}_SPI_parameters.parquet"
+    if not os.path.exists(path):
+        return pd.DataFrame(
+            columns=PARAMETER_COLUMNS,
+            index=pd.MultiIndex.from_tuples(
+                [], names=["station_name", "window", "month"]
+            ),
+            dtype="float64",
+        )
+
+    parameters = pd.read_parquet(path)
+    matching = (
+        (parameters["reference_start"] == reference[0])
+        & (parameters["reference_end"] == reference[1])
+        & (parameters["fit"] == fit)
+        & (parameters["zeros"] == zeros)
+    )
+    return parameters[matching].set_index(["station_name", "window", "month"])[
+        PARAMETER_COLUMNS
+    ]
+
+
+def save_SPI_parameters(
+    parameters: pd.DataFrame, voi: str, reference: Tuple[int, int], fit: str, zeros: str
+) -> None:
+    """Function for saving distribution parameters to 'data/[voi]_SPI_parameters.parquet'.
+    Parameters fitted with other settings are kept in the file.
+
+    Args:
+        parameters (pd.DataFrame): Parameters with station_name, window and month as index
+        voi (str): Voivodeship name
+        reference (Tuple[int, int]): First and last year of the reference period
+        fit (str): Name of the fitting method
+        zeros (str): Handling of zero sums
+    """
+    path = f"data/{voi}_SPI_parameters.parquet"
+    parameters = parameters.reset_index().assign(
+        reference_start=reference[0], reference_end=reference[1], fit=fit, zeros=zeros
+    )
+    if os.path.exists(path):
+        saved = pd.read_parquet(path)
+        other = (
+            (saved["reference_start"] != reference[0])
+            | (saved["reference_end"] != reference[1])
+            | (saved["fit"] != fit)
+            | (saved["zeros"] != zeros)
+        )
+        parameters = pd.concat([saved[other], parameters], ignore_index=True)
+
+    save_df(
+        parameters,
+        f"{voi}_SPI_parameters.parquet",
+        "data",
+        f"SPI distribution parameters saved in data/{voi}_SPI_parameters.parquet",
+    )
+
+
+def get_stations_calendar_SPI(
+    cube: PrecipCube,
+    voi: str,
+    windows: list[int] = [1, 3, 12],
+    reference: Tuple[int, int] = (1991, 2020),
+    fit: str = "mle",
+    zeros: str = "clamp",
+    refit: bool = False,
+) -> pd.DataFrame:
+    """Function to calculate SPI of all stations with distributions fitted separately for every calendar month
+    over the reference period (as recommended by WMO). Fitted parameters are saved per station and window
+    in 'data/[voi]_SPI_parameters.parquet' and reused in next runs, so new months only evaluate the CDF.
+    Parameters are fitted again if sums in the reference period have changed (their number or total).
+
+    Args:
+        cube (PrecipCube): Cube of preprocessed data
+        voi (str): Voivodeship name
+        windows (list[int], optional): Sizes of rolling windows. Defaults to [1, 3, 12] (SPI-1, SPI-3, SPI-12).
+        reference (Tuple[int, int], optional): First and last year of the reference period. Defaults to (1991, 2020).
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+        zeros (str, optional): Handling of zero sums ("clamp" or "mixed"). Defaults to "clamp".
+        refit (bool, optional): Flag whether to fit parameters even if they are saved. Defaults to False.
+
+    Returns:
+        pd.DataFrame: Tidy DataFrame with station_name and date (month end) columns and SPI_[window]
+                      column for every window (only months of the station's period)
+    """
+    station_names, months, matrix = cube.monthly_matrix()
+    saved = load_SPI_parameters(voi, reference, fit, zeros)
+
+    SPIs, fitted = dict(), []
+    for window in windows:
+        sums = rolling_sums(matrix, window)
+        reference_sums = get_reference_sums(sums, months, reference)
+        index = pd.MultiIndex.from_product(
+            [station_names, [window], range(1, 13)],
+            names=["station_name", "window", "month"],
+        )
+        parameters = saved.reindex(index)
+
+        changed = not np.array_equal(
+            parameters["n_sums"].to_numpy(),
+            (~np.isnan(reference_sums)).sum(axis=-1).ravel(),
+        ) or not np.allclose(
+            parameters["reference_total"].to_numpy(),
+            np.nansum(reference_sums, axis=-1).ravel(),
+            rtol=1e-12,
+            atol=0,
+        )
+        if refit or changed:
+            print(f"Fitting SPI-{window} distributions for every calendar month...")
+            parameters = pd.DataFrame(
+                {
+                    name: values.ravel()
+                    for name, values in fit_calendar_parameters(
+                        reference_sums, fit, zeros
+                    ).items()
+                },
+                index=index,
+            )
+            fitted.append(parameters)
+
+        SPIs[window] = calculate_calendar_SPI(
+            sums,
+            months,
+            {
+                name: parameters[name].to_numpy().reshape(len(station_names), 12)
+                for name in PARAMETER_COLUMNS
+            },
+            zeros,
+        )
+
+    if fitted:
+        fitted = pd.concat(fitted)
+        kept = saved[~saved.index.isin(fitted.index)]
+        if len(kept):
+            fitted = pd.concat([kept, fitted]).sort_index()
+        save_SPI_parameters(fitted, voi, reference, fit, zeros)
+
+    return tidy_SPI(station_names, months, matrix, SPIs)
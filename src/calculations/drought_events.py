@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from src.utils.utils import save_df
+
+
+def find_runs(mask: np.ndarray, groups: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Function finding runs of consecutive True values with run-length encoding
+    (runs don't cross boundaries of groups, e.g. stations)
+
+    Args:
+        mask (np.ndarray): Mask of values belonging to runs
+        groups (np.ndarray): Group of every value (values of a group are consecutive)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Positions of the first value of every run and lengths of runs
+    """
+    # Value continues the run of the previous value
+    continued = np.r_[False, mask[:-1] & mask[1:] & (groups[1:] == groups[:-1])]
+    starts = np.flatnonzero(mask & ~continued)
+    ends = np.flatnonzero(mask & ~np.r_[continued[1:], False])
+    return starts, ends - starts + 1
+
+
+def get_drought_events(
+    stations_SPI: pd.DataFrame,
+    windows: list[int] = [1, 3, 12],
+    threshold: float = -1.0,
+    min_duration: int = 1,
+) -> pd.DataFrame:
+    """Function detecting drought events of all stations and SPI windows at once (run theory).
+    Drought event is a run of consecutive months with SPI below or equal to the threshold.
+
+    Args:
+        stations_SPI (pd.DataFrame): Tidy DataFrame with station_name, date and SPI_[window] columns
+                                     (as returned by get_stations_SPI)
+        windows (list[int], optional): Sizes of rolling windows. Defaults to [1, 3, 12].
+        threshold (float, optional): SPI threshold of drought. Defaults to -1.0 (Moderate drought).
+        min_duration (int, optional): Minimal number of months of the event. Defaults to 1.
+
+    Returns:
+        pd.DataFrame: Events with station_name, window, onset and end (month ends), duration (in months),
+                      severity (cumulative SPI deficit, i.e. -sum of SPI) and peak_intensity (-minimal SPI) columns
+    """
+    station_idx, station_names = pd.factorize(stations_SPI["station_name"])
+    dates = stations_SPI["date"].to_numpy()
+    order = np.lexsort((dates, station_idx))
+    station_idx, dates = station_idx[order], dates[order]
+
+    events = []
+    for window in windows:
+        SPI = stations_SPI[f"SPI_{window}"].to_numpy("float64")[order]
+        starts, durations = find_runs(SPI <= threshold, station_idx)
+        long_enough = durations >= min_duration
+        starts, durations = starts[long_enough], durations[long_enough]
+
+        # SPI of all drought months is reduced by runs at once
+        offsets = np.r_[0, np.cumsum(durations)[:-1]].astype(int)
+        drought_SPI = SPI[
+            np.repeat(starts - offsets, durations) + np.arange(durations.sum())
+        ]
+        if len(starts):
+            severity = -np.add.reduceat(drought_SPI, offsets)
+            peak_intensity = -np.minimum.reduceat(drought_SPI, offsets)
+        else:
+            severity, peak_intensity = np.array([]), np.array([])
+
+        events.append(
+            pd.DataFrame(
+                {
+                    "station_name": station_names[station_idx[starts]],
+                    "window": window,
+                    "onset": dates[starts],
+                    "end": dates[starts + durations - 1],
+                    "duration": durations,
+                    "severity": severity,
+                    "peak_intensity": peak_intensity,
+                }
+            )
+        )
+
+    return pd.concat(events, ignore_index=True)
+
+
+def save_drought_events(events: pd.DataFrame, voi: str) -> None:
+    """Function for saving drought events of the voivodeship to results/[voi]_drought_events.csv
+
+    Args:
+        events (pd.DataFrame): Drought events from get_drought_events
+        voi (str): Voivodeship name
+    """
+    save_df(
+        events.round({"severity": 2, "peak_intensity": 2}),
+        f"{voi}_drought_events.csv",
+        "results",
+        f"{len(events)} drought events in the {voi} voivodeship saved in results/{voi}_drought_events.csv",
+    )
@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+from scipy import special
+from typing import Tuple
+from src.utils.utils import save_df
+from src.calculations.batch_SPI import rolling_sums, tidy_SPI
+from src.calculations.calendar_SPI import (
+    get_reference_sums,
+    fit_calendar_parameters,
+    calculate_calendar_SPI,
+)
+from src.preprocessing.precip_cube import PrecipCube
+
+# Indices calculated from climatic water balance (precipitation - PET) if it's given
+BALANCE_INDICES = ["SPEI"]
+
+
+def get_reference_quantiles(
+    reference_sums: np.ndarray, quantiles: np.ndarray
+) -> np.ndarray:
+    """Function calculating quantiles (with linear interpolation, as np.nanquantile does) of reference sums
+    of every station and calendar month at once
+
+    Args:
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        quantiles (np.ndarray): Probabilities of quantiles
+
+    Returns:
+        np.ndarray: Stations x 12 x quantiles array (NaN if there are no sums)
+    """
+    # NaN values are sorted to the end, so first n_sums values are the sorted sums
+    sorted_sums = np.sort(reference_sums, axis=-1)
+    n_sums = (~np.isnan(reference_sums)).sum(axis=-1)
+
+    positions = quantiles * np.maximum(n_sums - 1, 0)[..., None]
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, np.maximum(n_sums - 1, 0)[..., None])
+    lower_values = np.take_along_axis(sorted_sums, lower, axis=-1)
+    upper_values = np.take_along_axis(sorted_sums, upper, axis=-1)
+    values = lower_values + (positions - lower) * (upper_values - lower_values)
+    return np.where((n_sums > 0)[..., None], values, np.nan)
+
+
+def fit_loglogistic_lmoments(
+    reference_sums: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Function fitting three-parameter log-logistic distribution (in the generalized logistic parametrization,
+    which allows both positive and negative skewness) to reference sums of every station and calendar month
+    at once with L-moments (Hosking, 1990), as SPEI does (Vicente-Serrano et al., 2010)
+
+    Args:
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+                                     (sums can be negative, e.g. of water balance)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Stations x 12 arrays of location, scale and shape parameters
+                                                   (NaN if there are less than 3 different sums)
+    """
+    # NaN values are sorted to the end, so first n_sums values are the sorted sums
+    sorted_sums = np.sort(reference_sums, axis=-1)
+    n_sums = (~np.isnan(reference_sums)).sum(axis=-1)[..., None]
+    ranks = np.arange(reference_sums.shape[-1])
+    sums = np.where(ranks < n_sums, sorted_sums, 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Unbiased probability weighted moments and L-moments
+        b0 = sums.sum(axis=-1) / n_sums[..., 0]
+        b1 = (ranks / (n_sums - 1) * sums).sum(axis=-1) / n_sums[..., 0]
+        b2 = (ranks * (ranks - 1) / ((n_sums - 1) * (n_sums - 2)) * sums).sum(
+            axis=-1
+        ) / n_sums[..., 0]
+        l2 = 2 * b1 - b0
+        l3 = 6 * b2 - 6 * b1 + b0
+
+        shape = -l3 / l2
+        # Limits for shape equal to 0 (logistic distribution) are used for tiny shapes
+        tiny = np.abs(shape) < 1e-8
+        ratio = np.where(tiny, 1, np.sin(np.pi * shape) / (np.pi * shape))
+        scale = l2 * ratio
+        location = b0 + np.where(
+            tiny, 0, scale * (np.pi / np.sin(np.pi * shape) - 1 / shape)
+        )
+
+    fitted = (n_sums[..., 0] >= 3) & (l2 > 0) & (np.abs(shape) < 1)
+    return tuple(
+        np.where(fitted, parameter, np.nan) for parameter in (location, scale, shape)
+    )
+
+
+def loglogistic_probability(
+    sums: np.ndarray, location: np.ndarray, scale: np.ndarray, shape: np.ndarray
+) -> np.ndarray:
+    """Function calculating CDF of log-logistic distribution (generalized logistic parametrization)
+    elementwise, so parameters can be broadcast to sums
+
+    Args:
+        sums (np.ndarray): Sums
+        location (np.ndarray): Location parameter
+        scale (np.ndarray): Scale parameter
+        shape (np.ndarray): Shape parameter
+
+    Returns:
+        np.ndarray: Probability of sum not greater than the given one (0 or 1 outside the support)
+    """
+    reduced = (sums - location) / scale
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y = np.where(
+            np.abs(shape) < 1e-8,
+            reduced,
+            -np.log(np.maximum(1 - shape * reduced, 0)) / shape,
+        )
+    return special.expit(y)
+
+
+def calculate_PNI(
+    sums: np.ndarray, reference_sums: np.ndarray, months: pd.DatetimeIndex
+) -> np.ndarray:
+    """Function to calculate Percent of Normal Index, i.e. sum as percent of the mean sum
+    of the same calendar month in the reference period
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+
+    Returns:
+        np.ndarray: Stations x months matrix of PNI (NaN if the mean sum is 0 or not available)
+    """
+    n_sums = (~np.isnan(reference_sums)).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normal = np.nansum(reference_sums, axis=-1) / n_sums
+        PNI = 100 * sums / normal[:, months.month.to_numpy() - 1]
+    PNI[~np.isfinite(PNI)] = np.nan
+    return PNI
+
+
+def calculate_deciles(
+    sums: np.ndarray, reference_sums: np.ndarray, months: pd.DatetimeIndex
+) -> np.ndarray:
+    """Function to calculate precipitation deciles (Gibbs and Maher, 1967), i.e. number of the decile
+    of sums of the same calendar month in the reference period which the sum belongs to
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+
+    Returns:
+        np.ndarray: Stations x months matrix of deciles from 1 (the driest 10 %) to 10
+                    (NaN where there are less than 2 reference sums)
+    """
+    month_idx = months.month.to_numpy() - 1
+    thresholds = get_reference_quantiles(reference_sums, np.arange(1, 10) / 10)
+    deciles = 1 + (sums[..., None] > thresholds[:, month_idx]).sum(axis=-1)
+
+    n_sums = (~np.isnan(reference_sums)).sum(axis=-1)
+    return np.where(
+        np.isnan(sums) | (n_sums < 2)[:, month_idx], np.nan, deciles.astype(float)
+    )
+
+
+def calculate_SPEI(
+    sums: np.ndarray, reference_sums: np.ndarray, months: pd.DatetimeIndex
+) -> np.ndarray:
+    """Function to calculate standardized index with log-logistic distribution fitted for every calendar month
+    (SPEI if sums are of climatic water balance). Values are limited to [-3.09, 3.09] (probabilities
+    from 0.001 to 0.999) as sums outside bounds of the distribution have probability 0 or 1.
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+
+    Returns:
+        np.ndarray: Stations x months matrix of standardized index (NaN where the sum or the distribution
+                    is not available)
+    """
+    month_idx = months.month.to_numpy() - 1
+    location, scale, shape = (
+        parameter[:, month_idx]
+        for parameter in fit_loglogistic_lmoments(reference_sums)
+    )
+    cdf = loglogistic_probability(sums, location, scale, shape)
+    return np.clip(special.ndtri(cdf), -3.09, 3.09)
+
+
+def calculate_calendar_gamma_SPI(
+    sums: np.ndarray, reference_sums: np.ndarray, months: pd.DatetimeIndex
+) -> np.ndarray:
+    """Function to calculate SPI with gamma distribution fitted for every calendar month by maximum likelihood
+    (as get_stations_calendar_SPI does, but without saving the parameters)
+
+    Args:
+        sums (np.ndarray): Stations x months matrix of rolling sums
+        reference_sums (np.ndarray): Stations x 12 calendar months x years array of sums from reference period
+        months (pd.DatetimeIndex): Month ends (columns of sums)
+
+    Returns:
+        np.ndarray: Stations x months matrix of SPI
+    """
+    return calculate_calendar_SPI(sums, months, fit_calendar_parameters(reference_sums))
+
+
+def get_drought_indices() -> dict:
+    """Function for getting drought indices selectable by name. Every index is calculated from stations x months
+    matrix of rolling sums and sums of the reference period arranged by calendar month.
+
+    Returns:
+        dict: Dictionary with name of the index as key and function calculating it as value
+    """
+    indices = {
+        "SPI": calculate_calendar_gamma_SPI,
+        "SPEI": calculate_SPEI,
+        "PNI": calculate_PNI,
+        "deciles": calculate_deciles,
+    }
+    return indices
+
+
+def get_stations_indices(
+    cube: PrecipCube,
+    indices: list[str] = ["PNI", "deciles", "SPEI"],
+    windows: list[int] = [1, 3, 12],
+    reference: Tuple[int, int] = None,
+    balance: pd.DataFrame = None,
+) -> pd.DataFrame:
+    """Function to calculate drought indices of all stations of the voivodeship for different periods at once.
+    Monthly sums of stations are obtained once, and rolling sums and reference sums of every window are shared
+    by all indices.
+
+    Args:
+        cube (PrecipCube): Cube of preprocessed data
+        indices (list[str], optional): Names of indices from get_drought_indices.
+                                       Defaults to ["PNI", "deciles", "SPEI"].
+        windows (list[int], optional): Sizes of rolling windows. Defaults to [1, 3, 12].
+        reference (Tuple[int, int], optional): First and last year of the reference period.
+                                               Defaults to None (all years of the data).
+        balance (pd.DataFrame, optional): Monthly climatic water balance (precipitation - PET) with month ends
+                                          as index and station names as columns, used instead of precipitation
+                                          by indices from BALANCE_INDICES. Defaults to None (precipitation).
+
+    Returns:
+        pd.DataFrame: Tidy DataFrame with station_name and date (month end) columns and [index]_[window]
+                      column for every index and window (only months of the station's period)
+    """
+    available_indices = get_drought_indices()
+    wrong_indices = [index for index in indices if index not in available_indices]
+    if wrong_indices:
+        raise ValueError(
+            f"Unknown drought index {', '.join(wrong_indices)}. You can choose among: {', '.join(available_indices)}"
+        )
+
+    station_names, months, matrix = cube.monthly_matrix()
+    if reference is None:
+        reference = (months.year.min(), months.year.max())
+    inputs = {index: "precipitation" for index in indices}
+    series = {"precipitation": matrix}
+    if balance is not None:
+        inputs.update(
+            {index: "balance" for index in indices if index in BALANCE_INDICES}
+        )
+        series["balance"] = (
+            balance.reindex(index=months, columns=station_names)
+            .to_numpy(dtype="float64")
+            .T
+        )
+
+    values = dict()
+    for window in windows:
+        shared = dict()
+        for name in set(inputs.values()):
+            sums = rolling_sums(series[name], window)
+            shared[name] = (sums, get_reference_sums(sums, months, reference))
+        for index in indices:
+            values[f"{index}_{window}"] = available_indices[index](
+                *shared[inputs[index]], months
+            )
+
+    return tidy_SPI(station_names, months, matrix, values, prefix="")
+
+
+def save_drought_indices(stations_indices: pd.DataFrame, voi: str) -> None:
+    """Function for saving drought indices of stations to results/[voi]_drought_indices.csv
+
+    Args:
+        stations_indices (pd.DataFrame): Drought indices from get_stations_indices
+        voi (str): Voivodeship name
+    """
+    save_df(
+        stations_indices.round({column: 2 for column in stations_indices.columns[2:]}),
+        f"{voi}_drought_indices.csv",
+        "results",
+        f"Drought indices of stations in the {voi} voivodeship saved in results/{voi}_drought_indices.csv",
+    )
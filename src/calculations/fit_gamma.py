@@ -0,0 +1,235 @@
+import numpy as np
+from scipy import special, stats
+from typing import Tuple
+
+
+def get_log_mean_statistic(x: np.ndarray) -> np.ndarray:
+    """Function calculating statistic A = ln(mean(x)) - mean(ln(x)) of every row of x, which is
+    the only statistic needed to fit gamma distribution (with location equal to 0)
+
+    Args:
+        x (np.ndarray): Positive values in rows (NaN values are skipped)
+
+    Returns:
+        np.ndarray: Statistic A of every row
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.log(np.nanmean(x, axis=-1)) - np.nanmean(np.log(x), axis=-1)
+
+
+def get_thom_shape(A: np.ndarray) -> np.ndarray:
+    """Function calculating Thom's approximation of gamma shape parameter
+
+    Args:
+        A (np.ndarray): Statistic A = ln(mean(x)) - mean(ln(x))
+
+    Returns:
+        np.ndarray: Approximated shape parameter
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (1 + np.sqrt(1 + 4 * A / 3)) / (4 * A)
+
+
+def get_greenwood_durand_shape(A: np.ndarray) -> np.ndarray:
+    """Function calculating Greenwood and Durand's rational approximation of gamma shape parameter
+
+    Args:
+        A (np.ndarray): Statistic A = ln(mean(x)) - mean(ln(x))
+
+    Returns:
+        np.ndarray: Approximated shape parameter
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        small = (0.5000876 + 0.1648852 * A - 0.0544274 * A**2) / A
+        large = (8.898919 + 9.059950 * A + 0.9775373 * A**2) / (
+            A * (17.79728 + 11.968477 * A + A**2)
+        )
+    return np.where(A <= 0.5772, small, large)
+
+
+def fit_gamma_thom(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Function fitting gamma distribution (with location equal to 0) to every row of x
+    with Thom's closed-form approximation of maximum likelihood estimator
+
+    Args:
+        x (np.ndarray): Positive values in rows (NaN values are skipped)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Shape and scale parameters of every row
+                                       (NaN if the row has less than 2 different values)
+    """
+    A = get_log_mean_statistic(x)
+    shape = get_thom_shape(np.where(A > 0, A, np.nan))
+    return shape, np.nanmean(x, axis=-1) / shape
+
+
+def fit_gamma_greenwood_durand(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Function fitting gamma distribution (with location equal to 0) to every row of x
+    with Greenwood and Durand's closed-form approximation of maximum likelihood estimator
+
+    Args:
+        x (np.ndarray): Positive values in rows (NaN values are skipped)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Shape and scale parameters of every row
+                                       (NaN if the row has less than 2 different values)
+    """
+    A = get_log_mean_statistic(x)
+    shape = get_greenwood_durand_shape(np.where(A > 0, A, np.nan))
+    return shape, np.nanmean(x, axis=-1) / shape
+
+
+def fit_gamma_scipy(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Function fitting gamma distribution (with location equal to 0) to every row of x
+    with scipy.stats.gamma.fit (row by row)
+
+    Args:
+        x (np.ndarray): Positive values in rows (NaN values are skipped)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Shape and scale parameters of every row
+                                       (NaN if the row has less than 2 different values)
+    """
+    rows = np.reshape(x, (-1, np.shape(x)[-1]))
+    shape = np.full(len(rows), np.nan)
+    scale = np.full(len(rows), np.nan)
+    for i, row in enumerate(rows):
+        row = row[~np.isnan(row)]
+        if len(np.unique(row)) > 1:
+            shape[i], _, scale[i] = stats.gamma.fit(row, floc=0)
+    return shape.reshape(np.shape(x)[:-1]), scale.reshape(np.shape(x)[:-1])
+
+
+def fit_gamma_mle(
+    x: np.ndarray, iterations: int = 20, tol: float = 1e-12
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Function fitting gamma distribution (with location equal to 0) to every row of x
+    by maximum likelihood. Equation ln(shape) - digamma(shape) = A is solved with Newton's method
+    started from Thom's approximation, so it gives the same parameters as scipy.stats.gamma.fit(x, floc=0).
+
+    Args:
+        x (np.ndarray): Positive values in rows (NaN values are skipped)
+        iterations (int, optional): Maximum number of Newton's iterations. Defaults to 20.
+        tol (float, optional): Relative tolerance of the shape parameter. Defaults to 1e-12.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Shape and scale parameters of every row
+                                       (NaN if the row has less than 2 different values)
+    """
+    A = get_log_mean_statistic(x)
+    A = np.where(A > 0, A, np.nan)
+    shape = get_thom_shape(A)
+
+    for _ in range(iterations):
+        step = (np.log(shape) - special.digamma(shape) - A) / (
+            1 / shape - special.polygamma(1, shape)
+        )
+        new_shape = np.where(shape - step > 0, shape - step, shape / 2)
+        converged = np.abs(new_shape - shape) <= tol * shape
+        shape = new_shape
+        if np.all(converged | np.isnan(shape)):
+            break
+
+    scale = np.nanmean(x, axis=-1) / shape
+    return shape, scale
+
+
+def get_gamma_fitters() -> dict:
+    """Function for getting methods of fitting gamma distribution selectable by name
+
+    Returns:
+        dict: Dictionary with name of the method as key and the fitting function as value
+    """
+    fitters = {
+        "scipy": fit_gamma_scipy,
+        "mle": fit_gamma_mle,
+        "thom": fit_gamma_thom,
+        "greenwood_durand": fit_gamma_greenwood_durand,
+    }
+    return fitters
+
+
+def fit_gamma_distribution(
+    sums: np.ndarray, fit: str = "mle", zeros: str = "clamp"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Function fitting distribution of precipitation sums to every row
+
+    Args:
+        sums (np.ndarray): Precipitation sums in rows (NaN values are skipped)
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+        zeros (str, optional): Handling of zero sums: "clamp" replaces them with 1e-15,
+                               "mixed" fits gamma only to positive sums and uses mixed distribution
+                               with probability of zero. Defaults to "clamp".
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Shape and scale parameters of gamma distribution
+            and probability of zero sum (0 if zeros are clamped) of every row
+    """
+    fitters = get_gamma_fitters()
+    if fit not in fitters:
+        raise ValueError(
+            f"Unknown fitting method {fit}. You can choose among: {', '.join(fitters)}"
+        )
+
+    if zeros == "clamp":
+        shape, scale = fitters[fit](np.where(sums <= 0, 1e-15, sums))
+        return shape, scale, np.zeros_like(shape)
+    if zeros == "mixed":
+        shape, scale = fitters[fit](np.where(sums > 0, sums, np.nan))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            zero_probability = np.sum(sums <= 0, axis=-1) / np.sum(
+                ~np.isnan(sums), axis=-1
+            )
+        return shape, scale, zero_probability
+    raise ValueError(f"Unknown handling of zeros {zeros}, choose clamp or mixed")
+
+
+def gamma_probability(
+    sums: np.ndarray,
+    shape: np.ndarray,
+    scale: np.ndarray,
+    zero_probability: np.ndarray,
+    zeros: str = "clamp",
+) -> np.ndarray:
+    """Function calculating cumulative probability of precipitation sums from fitted distribution.
+    Parameters are broadcast against sums, so every sum can have its own distribution.
+
+    Args:
+        sums (np.ndarray): Precipitation sums
+        shape (np.ndarray): Shape parameter of gamma distribution
+        scale (np.ndarray): Scale parameter of gamma distribution
+        zero_probability (np.ndarray): Probability of zero sum
+        zeros (str, optional): Handling of zero sums used in fitting ("clamp" or "mixed"). Defaults to "clamp".
+
+    Returns:
+        np.ndarray: Cumulative probability of every sum
+    """
+    x = np.where(sums <= 0, 1e-15, sums) if zeros == "clamp" else np.maximum(sums, 0)
+    return zero_probability + (1 - zero_probability) * special.gammainc(
+        shape, x / scale
+    )
+
+
+def get_gamma_probability(
+    sums: np.ndarray, fit: str = "mle", zeros: str = "clamp"
+) -> np.ndarray:
+    """Function fitting gamma distribution to every row of precipitation sums and returning
+    cumulative probability of every sum
+
+    Args:
+        sums (np.ndarray): Precipitation sums in rows (NaN values are skipped)
+        fit (str, optional): Name of the fitting method from get_gamma_fitters. Defaults to "mle".
+        zeros (str, optional): Handling of zero sums ("clamp" or "mixed"), see fit_gamma_distribution.
+                               Defaults to "clamp".
+
+    Returns:
+        np.ndarray: Cumulative probability of every sum (NaN for rows which can't be fitted)
+    """
+    shape, scale, zero_probability = fit_gamma_distribution(sums, fit, zeros)
+    return gamma_probability(
+        sums,
+        shape[..., None],
+        scale[..., None],
+        zero_probability[..., None],
+        zeros,
+    )
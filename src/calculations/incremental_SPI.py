@@ -0,0 +1,190 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Tuple
+from src.utils.utils import save_df
+from src.calculations.calculate_SPI import fit_SPI, calculate_SPI
+
+SPI_FILES = {1: "monthly", 3: "quarterly", 12: "yearly"}
+
+
+def get_monthly_fingerprint(monthly: pd.DataFrame) -> str:
+    """Function for calculating content fingerprint of monthly sums of precipitation
+
+    Args:
+        monthly (pd.DataFrame): DataFrame with 24h_precipitation_mm column and month ends as index
+
+    Returns:
+        str: SHA-256 hex digest of months and sums
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(monthly.index.to_numpy().astype("datetime64[M]").tobytes())
+    fingerprint.update(monthly["24h_precipitation_mm"].to_numpy("float64").tobytes())
+    return fingerprint.hexdigest()
+
+
+def load_SPI_state(voi: str) -> dict | None:
+    """Function for loading the state of SPI results of the voivodeship from 'data/[voi]_SPI_state.json'
+
+    Args:
+        voi (str): Voivodeship name
+
+    Returns:
+        dict | None: Fingerprint and monthly sums the results were calculated from, settings
+                     and fitted parameters (None if the state was not saved yet)
+    """
+    path = f"data/{voi}_SPI_state.json"
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_SPI_state(state: dict, voi: str) -> None:
+    """Function for saving the state of SPI results of the voivodeship to 'data/[voi]_SPI_state.json'
+
+    Args:
+        state (dict): Fingerprint and monthly sums the results were calculated from, settings
+                      and fitted parameters
+        voi (str): Voivodeship name
+    """
+    path = f"data/{voi}_SPI_state.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    print(f"State of SPI results saved in {path}")
+
+
+def get_first_changed_month(monthly: pd.DataFrame, state: dict) -> int | None:
+    """Function for finding the first month which has to be recalculated. Only the last saved month
+    (which could be incomplete) and new months can change, and only after the reference period
+    the distributions were fitted over. Otherwise all SPI has to be recalculated.
+
+    Args:
+        monthly (pd.DataFrame): Current monthly sums of precipitation
+        state (dict): Saved state of SPI results
+
+    Returns:
+        int | None: Position of the first changed month in monthly (None if earlier months or months
+                    of the reference period have changed, or there is no reference period)
+    """
+    if state.get("reference") is None:
+        # Distributions fitted over all months change with every new month
+        return None
+    months = monthly.index.strftime("%Y-%m").tolist()
+    totals = monthly["24h_precipitation_mm"].to_numpy("float64")
+    n_saved = len(state["months"]) - 1
+    if (
+        n_saved < 0
+        or months[:n_saved] != state["months"][:n_saved]
+        or not np.array_equal(totals[:n_saved], state["totals"][:n_saved])
+        or len(months) <= n_saved
+        or months[n_saved] != state["months"][n_saved]
+        # Sums of windows ending in changed months would be fitted again
+        or monthly.index[n_saved].year <= state["reference"][1]
+    ):
+        return None
+    return n_saved
+
+
+def update_SPI(
+    monthly: pd.DataFrame,
+    voi: str,
+    fit: str = "scipy",
+    zeros: str = "clamp",
+    full: bool = False,
+    reference: Tuple[int, int] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
+    """Function to calculate SPI-1, SPI-3 and SPI-12 of the voivodeship incrementally.
+    Results in results/[voi]_SPI_[monthly|quarterly|yearly].csv are identified by the fingerprint
+    of monthly sums they were calculated from (saved in 'data/[voi]_SPI_state.json'):
+        - if the sums have not changed, saved results are read,
+        - if distributions are fitted over the reference period and only the last saved month has changed
+          or new months were added after it, only rolling windows ending in these months are calculated
+          with saved distribution parameters (which don't depend on these months) and appended,
+        - otherwise (or with full flag) distributions are fitted and all SPI is calculated again,
+          so the results are always the same as of the full calculation.
+
+    Args:
+        monthly (pd.DataFrame): DataFrame with 24h_precipitation_mm column and month ends as index
+        voi (str): Voivodeship name
+        fit (str, optional): Method of fitting gamma distribution (see calculate_SPI). Defaults to "scipy".
+        zeros (str, optional): Handling of zero sums (see calculate_SPI). Defaults to "clamp".
+        full (bool, optional): Flag whether to calculate all SPI again. Defaults to False.
+        reference (Tuple[int, int], optional): First and last year of the reference period the distributions
+                                               are fitted over. Defaults to None (all months).
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None: SPI-1, SPI-3 and SPI-12 or None
+                                                                if there is not enough data
+    """
+    monthly = monthly[["24h_precipitation_mm"]].dropna()
+    fingerprint = get_monthly_fingerprint(monthly)
+    paths = [f"results/{voi}_SPI_{name}.csv" for name in SPI_FILES.values()]
+
+    state = load_SPI_state(voi)
+    if (
+        full
+        or state is None
+        or (state["fit"], state["zeros"], state.get("reference"))
+        != (fit, zeros, None if reference is None else list(reference))
+        or not all(os.path.exists(path) for path in paths)
+    ):
+        first_changed = None
+    elif state["fingerprint"] == fingerprint:
+        print("SPI is up to date, reading saved results...")
+        return tuple(
+            pd.read_csv(path, index_col="date", parse_dates=True) for path in paths
+        )
+    else:
+        first_changed = get_first_changed_month(monthly, state)
+
+    if first_changed is None:
+        print("Calculating SPI...")
+        parameters = {
+            window: fit_SPI(monthly, window, fit, zeros, reference)
+            for window in SPI_FILES
+        }
+        if any(params is None for params in parameters.values()):
+            return None
+        SPIs = tuple(
+            calculate_SPI(monthly, window, fit, zeros, parameters[window])
+            for window in SPI_FILES
+        )
+    else:
+        print(f"Updating SPI from {monthly.index[first_changed]:%Y-%m}...")
+        parameters = {
+            int(window): params for window, params in state["parameters"].items()
+        }
+        SPIs = []
+        for window, path in zip(SPI_FILES, paths):
+            # Only windows ending in changed months are calculated
+            tail = monthly.iloc[max(first_changed - window + 1, 0) :]
+            saved = pd.read_csv(path, index_col="date", parse_dates=True)
+            SPIs.append(
+                pd.concat(
+                    [
+                        saved[saved.index < monthly.index[first_changed]],
+                        calculate_SPI(tail, window, fit, zeros, parameters[window]),
+                    ]
+                )
+            )
+
+    for SPI, path in zip(SPIs, paths):
+        save_df(SPI, os.path.basename(path), "results")
+    save_SPI_state(
+        {
+            "fingerprint": fingerprint,
+            "months": monthly.index.strftime("%Y-%m").tolist(),
+            "totals": monthly["24h_precipitation_mm"].to_numpy("float64").tolist(),
+            "fit": fit,
+            "zeros": zeros,
+            "reference": None if reference is None else list(reference),
+            "parameters": parameters,
+        },
+        voi,
+    )
+    print("SPI calculated.")
+
+    return tuple(SPIs)
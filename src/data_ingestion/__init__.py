@@ -1,6 +1,8 @@
 __all__ = [
     "download_precipitations",
     "download_stations",
+    "download_borders",
     "download_changes",
     "download_data",
+    "fetching",
 ]
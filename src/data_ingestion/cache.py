@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import atexit
+import threading
+import requests
+from contextlib import contextmanager
+from .fetching import fetch_url
+from .manifest import get_content_hash, get_conditional_headers
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
+_lock = threading.Lock()
+# Access times of urls read in this process, saved to the index with the next write
+_accessed = dict()
+
+
+@contextmanager
+def cache_lock(cache_dir: str):
+    """Context manager locking the cache for the current thread and for other processes
+    (e.g. voivodeships analyzed in a process pool) with a lock file in the cache directory
+
+    Args:
+        cache_dir (str): Cache directory
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with _lock, open(os.path.join(cache_dir, ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_index_path(cache_dir: str) -> str:
+    """Function returning path to the cache index
+
+    Args:
+        cache_dir (str): Cache directory
+
+    Returns:
+        str: Path to the index file
+    """
+    return os.path.join(cache_dir, "index.json")
+
+
+def get_object_path(content_hash: str, cache_dir: str) -> str:
+    """Function returning path to the cached object with given content hash
+
+    Args:
+        content_hash (str): SHA-256 hex digest of the content
+        cache_dir (str): Cache directory
+
+    Returns:
+        str: Path to the object file
+    """
+    return os.path.join(cache_dir, "objects", content_hash[:2], content_hash)
+
+
+def load_cache_index(cache_dir: str) -> dict:
+    """Function for loading cache index
+
+    Args:
+        cache_dir (str): Cache directory
+
+    Returns:
+        dict: Dictionary with url as key and cached object metadata as value
+    """
+    path = get_index_path(cache_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache_index(index: dict, cache_dir: str) -> None:
+    """Function for saving cache index
+
+    Args:
+        index (dict): Dictionary with url as key and cached object metadata as value
+        cache_dir (str): Cache directory
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = get_index_path(cache_dir)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def update_cache_index(cache_dir: str) -> dict:
+    """Function for loading cache index with access times of urls read in this process applied
+    (must be called with the cache locked)
+
+    Args:
+        cache_dir (str): Cache directory
+
+    Returns:
+        dict: Cache index
+    """
+    index = load_cache_index(cache_dir)
+    for url, last_access in _accessed.pop(cache_dir, {}).items():
+        if url in index:
+            index[url]["last_access"] = max(index[url]["last_access"], last_access)
+    return index
+
+
+def flush_cache_access() -> None:
+    """Function for saving access times of urls read in this process to cache indexes
+    (called at exit of the process)
+    """
+    for cache_dir in list(_accessed):
+        with cache_lock(cache_dir):
+            save_cache_index(update_cache_index(cache_dir), cache_dir)
+
+
+atexit.register(flush_cache_access)
+
+
+def evict_cache(index: dict, max_size: int, cache_dir: str, keep: str = None) -> dict:
+    """Function for evicting least recently used objects until the cache fits in max_size bytes.
+    Objects are content-addressed, so an object file is removed only if no other url refers to it.
+
+    Args:
+        index (dict): Cache index
+        max_size (int): Maximum size of cached objects in bytes
+        cache_dir (str): Cache directory
+        keep (str, optional): Url which should not be evicted. Defaults to None.
+
+    Returns:
+        dict: Cache index after eviction
+    """
+    sizes = {meta["hash"]: meta["size"] for meta in index.values()}
+    total = sum(sizes.values())
+
+    for url, meta in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+        if total <= max_size:
+            break
+        if url == keep:
+            continue
+        del index[url]
+        if all(other["hash"] != meta["hash"] for other in index.values()):
+            os.remove(get_object_path(meta["hash"], cache_dir))
+            total -= sizes[meta["hash"]]
+
+    return index
+
+
+def get_cached(url: str, cache_dir: str = "data/cache") -> tuple[bytes, dict] | None:
+    """Function for reading the cached payload of the url. The access time is kept in memory
+    and saved to the index with the next write (or at exit of the process), so reads don't rewrite the index.
+
+    Args:
+        url (str): Address of the file
+        cache_dir (str, optional): Cache directory. Defaults to "data/cache".
+
+    Returns:
+        tuple[bytes, dict] | None: Cached content with its response headers or None if the url is not cached
+    """
+    with cache_lock(cache_dir):
+        meta = load_cache_index(cache_dir).get(url)
+        if meta is None or not os.path.exists(get_object_path(meta["hash"], cache_dir)):
+            return None
+        with open(get_object_path(meta["hash"], cache_dir), "rb") as f:
+            content = f.read()
+        _accessed.setdefault(cache_dir, {})[url] = time.time()
+
+    return content, meta["headers"]
+
+
+def put_cached(
+    url: str,
+    content: bytes,
+    headers: dict,
+    cache_dir: str = "data/cache",
+    max_size: int = 1024**3,
+) -> str:
+    """Function for storing payload of the url in the cache
+
+    Args:
+        url (str): Address of the file
+        content (bytes): Raw content of the file
+        headers (dict): Response headers
+        cache_dir (str, optional): Cache directory. Defaults to "data/cache".
+        max_size (int, optional): Maximum size of cached objects in bytes. Defaults to 1 GiB.
+
+    Returns:
+        str: Content hash of the stored object
+    """
+    content_hash = get_content_hash(content)
+    path = get_object_path(content_hash, cache_dir)
+
+    with cache_lock(cache_dir):
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+        index = update_cache_index(cache_dir)
+        index[url] = {
+            "hash": content_hash,
+            "size": len(content),
+            "last_access": time.time(),
+            "headers": {
+                key: headers[key] for key in ["ETag", "Last-Modified"] if key in headers
+            },
+        }
+        index = evict_cache(index, max_size, cache_dir, keep=url)
+        save_cache_index(index, cache_dir)
+
+    return content_hash
+
+
+def remove_cached(url: str, cache_dir: str = "data/cache") -> None:
+    """Function for removing the url from the cache (e.g. when its payload turned out to be corrupted).
+    The object file is removed only if no other url refers to it.
+
+    Args:
+        url (str): Address of the file
+        cache_dir (str, optional): Cache directory. Defaults to "data/cache".
+    """
+    with cache_lock(cache_dir):
+        index = update_cache_index(cache_dir)
+        meta = index.pop(url, None)
+        if meta is None:
+            return
+        path = get_object_path(meta["hash"], cache_dir)
+        if os.path.exists(path) and all(
+            other["hash"] != meta["hash"] for other in index.values()
+        ):
+            os.remove(path)
+        save_cache_index(index, cache_dir)
+
+
+def fetch_cached(
+    url: str,
+    retries: int = 3,
+    backoff: float = 1.0,
+    offline: bool = False,
+    cache_dir: str = "data/cache",
+    store: bool = True,
+) -> tuple[bytes, dict] | None:
+    """Function for getting payload of the url from the cache, downloading it on cache miss. A cache hit
+    is revalidated with a conditional request (ETag / Last-Modified of the cached payload), so a changed
+    file is downloaded again. The cached payload is served without revalidation in offline mode
+    or if the server can't be reached.
+
+    Args:
+        url (str): Address of the file
+        retries (int, optional): Number of retries of failed download. Defaults to 3.
+        backoff (float, optional): Base delay between retries in seconds. Defaults to 1.0.
+        offline (bool, optional): Flag whether to serve only from the cache (without downloading).
+                                  Defaults to False.
+        cache_dir (str, optional): Cache directory. Defaults to "data/cache".
+        store (bool, optional): Flag whether to store downloaded payload in the cache. If False, the caller
+                                stores it with put_cached after checking it (e.g. parsing the archive).
+                                Defaults to True.
+
+    Returns:
+        tuple[bytes, dict] | None: Content with its response headers or None if the url is not cached
+                                   in offline mode
+    """
+    cached = get_cached(url, cache_dir)
+    if offline:
+        return cached
+
+    try:
+        response = fetch_url(
+            url,
+            retries,
+            backoff,
+            headers=get_conditional_headers(
+                None
+                if cached is None
+                else {
+                    "etag": cached[1].get("ETag"),
+                    "last_modified": cached[1].get("Last-Modified"),
+                }
+            ),
+        )
+    except (requests.ConnectionError, requests.Timeout):
+        if cached is None:
+            raise
+        print(f"{url} can't be revalidated, serving it from the cache")
+        return cached
+
+    if cached is not None and response.status_code == 304:
+        return cached
+    if store:
+        put_cached(url, response.content, response.headers, cache_dir)
+    return response.content, response.headers
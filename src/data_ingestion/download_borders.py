@@ -0,0 +1,132 @@
+import io
+import os
+import shapely
+import pandas as pd
+import geopandas as gpd
+from functools import lru_cache
+from .cache import fetch_cached
+
+
+def get_borders_url() -> str:
+    """Function for getting address of the voivodeship borders file
+
+    Returns:
+        str: Address of 'pl.json' GeoJSON file
+    """
+    return "https://simplemaps.com/static/svg/country/pl/admin1/pl.json"
+
+
+def normalize_voivodeship_names(names: pd.Series) -> pd.Series:
+    """Function removing spaces and dashes from voivodeship names
+
+    Args:
+        names (pd.Series): Voivodeship names, e.g. 'Lesser Poland' or 'Kuyavian-Pomeranian'
+
+    Returns:
+        pd.Series: Normalized names, e.g. 'LesserPoland' or 'KuyavianPomeranian'
+    """
+    return names.str.replace(" ", "").str.replace("-", "")
+
+
+def preprocess_voivodeship_borders(geojson: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Function normalizing voivodeship names and adding bounding boxes of voivodeships
+
+    Args:
+        geojson (gpd.GeoDataFrame): Voivodeship borders read from GeoJSON file
+
+    Returns:
+        gpd.GeoDataFrame: Preprocessed voivodeship borders
+    """
+    geojson["name"] = normalize_voivodeship_names(geojson["name"])
+    return geojson.join(geojson.bounds)
+
+
+def download_voivodeship_borders(offline: bool = False) -> gpd.GeoDataFrame:
+    """Function for downloading voivodeship borders and saving them preprocessed (normalized names
+       and bounding boxes of voivodeships) to 'data/voivodeship_borders.parquet'
+
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame containing voivodeship borders
+    """
+    url = get_borders_url()
+    cached = fetch_cached(url, offline=offline)
+    if cached is None:
+        raise FileNotFoundError(
+            f"{url} is not cached, it can't be read in offline mode"
+        )
+    geojson = preprocess_voivodeship_borders(gpd.read_file(io.BytesIO(cached[0])))
+
+    os.makedirs("data", exist_ok=True)
+    geojson.to_parquet("data/voivodeship_borders.parquet")
+    print(
+        "Voivodeship borders saved in data/ directory under 'voivodeship_borders.parquet' name"
+    )
+
+    return geojson
+
+
+@lru_cache(maxsize=None)
+def _load_voivodeship_borders(offline: bool, path: str | None) -> gpd.GeoDataFrame:
+    """Cached implementation of load_voivodeship_borders (called with normalized arguments)"""
+    if path is not None:
+        geojson = preprocess_voivodeship_borders(gpd.read_file(path))
+    elif os.path.exists("data/voivodeship_borders.parquet"):
+        geojson = gpd.read_parquet("data/voivodeship_borders.parquet")
+    else:
+        geojson = download_voivodeship_borders(offline)
+
+    shapely.prepare(geojson.geometry.values)
+    return geojson
+
+
+def load_voivodeship_borders(
+    offline: bool = False, path: str = None
+) -> gpd.GeoDataFrame:
+    """Function for loading voivodeship borders once per process. Borders are read from the given GeoJSON file
+       or from 'data/voivodeship_borders.parquet' (downloaded if it doesn't exist) and their geometries
+       are prepared, so checking which points lie within them is fast.
+
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+        path (str, optional): Path to local GeoJSON file with borders (read instead of the stored borders,
+                              which are left unchanged). Defaults to None.
+
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame containing voivodeship borders (shared, must not be modified)
+    """
+    # Arguments are normalized, so the same borders are cached once however they are passed
+    return _load_voivodeship_borders(
+        bool(offline), None if path is None else os.path.abspath(path)
+    )
+
+
+def get_voivodeship_borders(
+    offline: bool = False, path: str = None
+) -> gpd.GeoDataFrame:
+    """Function to return voivodeship borders data as GeoDataFrame with spaces and dashes
+       removed from voivodeship names and bounding boxes (minx, miny, maxx, maxy columns)
+
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+        path (str, optional): Path to local GeoJSON file with borders. Defaults to None.
+
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame containing voivodeship borders
+    """
+    return load_voivodeship_borders(offline, path).copy()
+
+
+def get_voivodeship_names(offline: bool = False, path: str = None) -> list:
+    """Function to return a list of voivodeship names with spaces and dashes removed.
+
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+        path (str, optional): Path to local GeoJSON file with borders. Defaults to None.
+
+    Returns:
+        list: A list containing unique names of voivodeships.
+    """
+    return load_voivodeship_borders(offline, path)["name"].unique().tolist()
@@ -1,15 +1,47 @@
+import io
+import os
+import json
 import pandas as pd
 import numpy as np
+from .cache import fetch_cached
+from .manifest import get_content_hash
 
 
-def download_changes_file() -> pd.DataFrame:
+def get_changes_content(offline: bool = False) -> bytes:
+    """Function for getting raw content of file conatining possible stations' name and location changes
+    (the file is served from the raw archive cache and downloaded on cache miss)
+
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+
+    Returns:
+        bytes: Raw content of 'Opis.txt' file
+    """
+    url = "https://danepubliczne.imgw.pl/data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne/Opis.txt"
+    cached = fetch_cached(url, offline=offline)
+    if cached is None:
+        raise FileNotFoundError(
+            f"{url} is not cached, it can't be read in offline mode"
+        )
+
+    return cached[0]
+
+
+def download_changes_file(offline: bool = False, content: bytes = None) -> pd.DataFrame:
     """Function for downloading file conatining possible stations' name and location changes
 
+    Args:
+        offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+        content (bytes, optional): Already downloaded content of the file. Defaults to None.
+
     Returns:
         pd.DataFrame: Pandas DataFrame with rows containing description of changes
     """
+    if content is None:
+        content = get_changes_content(offline)
+
     changes = pd.read_table(
-        "https://danepubliczne.imgw.pl/data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne/Opis.txt",
+        io.BytesIO(content),
         skiprows=72,
         header=None,
         skipinitialspace=True,
@@ -39,36 +71,119 @@ def split_officials(changes: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
 
 
 def create_station_dict(station_names: np.ndarray) -> dict:
-    """Funtion creating dictionary with station names mappings
+    """Funtion creating dictionary with station names mappings. Every description is expected
+    to look like 'Stacja NEW_NAME, ... stacja OLD_NAME ...'.
 
     Args:
         station_names (np.ndarray): Name changes desctiption
 
+    Raises:
+        ValueError: If any description containing 'Stacja' doesn't match the expected format
+
     Returns:
         dict: Dictionary to use for mapping purposes
     """
-    station_dict = dict()
-    for station_name in station_names:
-        words = station_name.split()
-        # Searching for first occurance of "Stacja"
-        first_station_index = words.index("Stacja")
-        # Second occurance of "stacja"
-        second_station_index = words.index("stacja", first_station_index + 1)
-        # Filling dictionary
-        station_dict[words[second_station_index + 1].rstrip(",")] = words[
-            first_station_index + 1
-        ].rstrip(",")
-    return station_dict
-
-
-def download_changes_data() -> dict:
-    """Function to execute full changes pipeline
+    descriptions = pd.Series(station_names, dtype=object)
+    # First occurance of "Stacja" is followed by the new name, next occurance of "stacja" by the old one
+    names = descriptions.str.extract(
+        r"(?:^|\s)Stacja\s+(\S+)(?:\s.*?)?\sstacja\s+(\S+)"
+    )
+
+    unmatched = descriptions[
+        descriptions.str.contains("Stacja", na=False) & names.isna().any(axis=1)
+    ]
+    if len(unmatched) > 0:
+        raise ValueError(
+            f"{len(unmatched)} station changes descriptions don't match the expected format, "
+            f"e.g. '{unmatched.iloc[0]}'"
+        )
+
+    names = names.dropna().apply(lambda col: col.str.rstrip(","))
+    return dict(zip(names[1], names[0]))
+
+
+def resolve_station_chains(station_dict: dict) -> dict:
+    """Function resolving chains of station names changes (e.g. A -> B and B -> C),
+    so every old name is mapped directly to the latest one (A -> C and B -> C)
+
+    Args:
+        station_dict (dict): Dictionary with old names as keys and new names as values
 
     Returns:
-        dict: Dictionary to use for mapping purposes
+        dict: Dictionary with old names as keys and the latest names as values
     """
-    changes_df = download_changes_file()
+    resolved = dict()
+    for old_name in station_dict:
+        new_name = old_name
+        visited = {old_name}
+        # Stops at the latest name (or at the last name before a cycle)
+        while station_dict.get(new_name, new_name) not in visited:
+            new_name = station_dict[new_name]
+            visited.add(new_name)
+        if new_name != old_name:
+            resolved[old_name] = new_name
+    return resolved
+
+
+def load_station_renames(path: str = "data/station_renames.json") -> dict | None:
+    """Function for loading compiled station names mapping
+
+    Args:
+        path (str, optional): Path to the mapping file. Defaults to "data/station_renames.json".
+
+    Returns:
+        dict | None: Dictionary with hash of 'Opis.txt' file it was compiled from and the mapping
+                     (None if the mapping was not compiled yet)
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_station_renames(
+    renames: dict, content_hash: str, path: str = "data/station_renames.json"
+) -> None:
+    """Function for saving compiled station names mapping
+
+    Args:
+        renames (dict): Dictionary with old names as keys and the latest names as values
+        content_hash (str): Hash of 'Opis.txt' file the mapping was compiled from
+        path (str, optional): Path to the mapping file. Defaults to "data/station_renames.json".
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"content_hash": content_hash, "renames": renames},
+            f,
+            indent=2,
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+    print(f"Station names mapping saved in {path}")
+
+
+def download_changes_data(offline: bool = False) -> dict:
+    """Function to execute full changes pipeline. The mapping is compiled once per version
+    of 'Opis.txt' file and persisted in 'data/station_renames.json'.
+
+    Args:
+        offline (bool, optional): Flag whether to serve the changes file only from the cache. Defaults to False.
+
+    Returns:
+        dict: Dictionary to use for mapping purposes (old names mapped directly to the latest ones)
+    """
+    content = get_changes_content(offline)
+    content_hash = get_content_hash(content)
+
+    compiled = load_station_renames()
+    if compiled is not None and compiled["content_hash"] == content_hash:
+        return compiled["renames"]
+
+    changes_df = download_changes_file(offline, content)
     changes_not_ofc, changes_ofc = split_officials(changes_df)
-    changes_not_ofc_dict = create_station_dict(changes_not_ofc["Zmiany"].values)
+    changes_not_ofc_dict = resolve_station_chains(
+        create_station_dict(changes_not_ofc["Zmiany"].values)
+    )
+    save_station_renames(changes_not_ofc_dict, content_hash)
 
     return changes_not_ofc_dict
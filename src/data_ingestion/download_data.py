@@ -1,35 +1,118 @@
 import os
 from .download_stations import download_stations_data
-from .download_precipitations import download_precip_data
+from .download_precipitations import (
+    download_precip_data,
+    sync_precip_data,
+    read_precip_data,
+    compact_precip_data,
+    save_precip_data_by_archives,
+)
 import pandas as pd
 import geopandas as gpd
 from typing import Tuple
 
 
-def get_data() -> Tuple[pd.DataFrame, gpd.GeoDataFrame]:
-    """Pipeline for getting data
+def get_stations_data(offline: bool = False) -> gpd.GeoDataFrame:
+    """Pipeline for getting stations data
+
+    Args:
+        offline (bool, optional): Flag whether to read the stations codes file only from the raw archive cache.
+                                  Defaults to False.
 
     Returns:
-        Tuple[pd.DataFrame, gpd.GeoDataFrame]: All precipitation data & stations data
+        gpd.GeoDataFrame: Stations data
     """
-    print("Reading the data...")
-
     if not os.path.exists("data/stations.shp"):
-        download_stations_data()
+        download_stations_data(offline)
     else:
         print("stations.shp already exists in data/ directory.")
 
-    if not os.path.exists("data/precipitation_data.csv"):
-        download_precip_data()
+    return gpd.read_file("data/stations.shp", encoding="cp1250")
+
+
+def update_precip_data(sync: bool = False, offline: bool = False) -> None:
+    """Pipeline for making sure that precipitation data is stored in 'data/precipitation_data.parquet'
+       (converted from older .csv file, downloaded or synced)
+
+    Args:
+        sync (bool, optional): Flag whether to download new or changed archives into already
+                               existing precipitation data. Defaults to False.
+        offline (bool, optional): Flag whether to read downloaded files only from the raw archive cache.
+                                  Defaults to False.
+    """
+    if not os.path.exists("data/precipitation_data.parquet") and os.path.exists(
+        "data/precipitation_data.csv"
+    ):
+        print("Converting precipitation_data.csv to precipitation_data.parquet...")
+        save_precip_data_by_archives(
+            compact_precip_data(
+                pd.read_csv(
+                    "data/precipitation_data.csv",
+                    index_col=0,
+                    dtype={
+                        "snow_type_code": "object",
+                        "snow_cover_type_code": "object",
+                    },
+                ),
+                verbose=True,
+            )
+        )
+
+    if not os.path.exists("data/precipitation_data.parquet"):
+        download_precip_data(offline=offline)
+    elif sync:
+        sync_precip_data(offline=offline)
     else:
-        print("precipitation_data.csv already exists in data/ directory")
-
-    all_precip = pd.read_csv(
-        "data/precipitation_data.csv",
-        index_col=0,
-        dtype={"snow_cover_type_code": "object"},
-    )
-    stations_gdf = gpd.read_file("data/stations.shp", encoding="cp1250")
+        print("precipitation_data.parquet already exists in data/ directory")
+
+
+def get_precip_data(
+    sync: bool = False,
+    offline: bool = False,
+    columns: list[str] = None,
+    station_codes: list[int] = None,
+) -> pd.DataFrame:
+    """Pipeline for getting precipitation data
+
+    Args:
+        sync (bool, optional): Flag whether to download new or changed archives into already
+                               existing precipitation data. Defaults to False.
+        offline (bool, optional): Flag whether to read downloaded files only from the raw archive cache.
+                                  Defaults to False.
+        columns (list[str], optional): Precipitation columns to be read. Defaults to None (all columns).
+        station_codes (list[int], optional): Codes of stations to be read. Defaults to None (all stations).
+
+    Returns:
+        pd.DataFrame: Precipitation data
+    """
+    update_precip_data(sync, offline)
+
+    return read_precip_data(columns, station_codes)
+
+
+def get_data(
+    sync: bool = False,
+    offline: bool = False,
+    columns: list[str] = None,
+    station_codes: list[int] = None,
+) -> Tuple[pd.DataFrame, gpd.GeoDataFrame]:
+    """Pipeline for getting data
+
+    Args:
+        sync (bool, optional): Flag whether to download new or changed archives into already
+                               existing precipitation data. Defaults to False.
+        offline (bool, optional): Flag whether to read downloaded files only from the raw archive cache.
+                                  Defaults to False.
+        columns (list[str], optional): Precipitation columns to be read. Defaults to None (all columns).
+        station_codes (list[int], optional): Codes of stations to be read. Defaults to None (all stations).
+
+    Returns:
+        Tuple[pd.DataFrame, gpd.GeoDataFrame]: All precipitation data & stations data
+    """
+    print("Reading the data...")
+
+    stations_gdf = get_stations_data(offline)
+    all_precip = get_precip_data(sync, offline, columns, station_codes)
 
     print("Reading the data ended")
     return all_precip, stations_gdf
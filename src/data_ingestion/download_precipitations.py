@@ -1,7 +1,29 @@
+import io
+import os
+import time
+import zlib
+import shutil
+import datetime
+import requests
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from collections import deque
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from zipfile import BadZipFile
 from .download_changes import download_changes_data
-from src.utils.utils import save_df
+from .fetching import fetch_url
+from .cache import fetch_cached, put_cached, remove_cached
+from .manifest import (
+    load_manifest,
+    save_manifest,
+    get_content_hash,
+    get_conditional_headers,
+    create_manifest_entry,
+)
+from src.utils.utils import save_df, get_memory_usage
 
 
 def get_colnames() -> list[str]:
@@ -33,23 +55,116 @@ def get_colnames() -> list[str]:
     return columns
 
 
-def get_urls() -> list[str]:
+def get_dtypes() -> dict:
     """
-    Function for creating urls of files to be downloaded
+    Function for getting compact data types of precipitation data columns. Status columns
+    can contain only codes 8 (no measurement) and 9 (no phenomenon) or n/a (normal measurement).
+
+        Returns:
+            dtypes (dict): Dictionary with column name as key and its data type as value
+    """
+    status = pd.CategoricalDtype([8, 9])
+    dtypes = {
+        "station_code": "int32",
+        "station_name": "category",
+        "year": "uint16",
+        "month": "uint8",
+        "day": "uint8",
+        "24h_precipitation_mm": "float32",
+        "SMDB_status": status,
+        "precip_type": "category",
+        "snow_cover_cm": "float32",
+        "PKSN_status": status,
+        "fresh_snow_cover_cm": "float32",
+        "HSS_status": status,
+        "snow_type_code": "category",
+        "GATS_status": status,
+        "snow_cover_type_code": "category",
+        "RPSN_status": status,
+    }
+
+    return dtypes
+
+
+def get_parquet_schema() -> pa.Schema:
+    """
+    Function for getting schema of stored precipitation data. It is given explicitly, so every partition
+    has the same schema (even if e.g. all snow codes in a year are n/a). Status columns are stored
+    as integers and converted to categories after reading.
+
+        Returns:
+            schema (pa.Schema): Schema of 'data/precipitation_data.parquet' dataset
+    """
+    types = {
+        "int32": pa.int32(),
+        "uint16": pa.uint16(),
+        "uint8": pa.uint8(),
+        "float32": pa.float32(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+    }
+    schema = pa.schema(
+        [
+            (
+                col,
+                pa.uint8() if isinstance(dtype, pd.CategoricalDtype) else types[dtype],
+            )
+            for col, dtype in get_dtypes().items()
+        ]
+    )
+
+    return schema
+
+
+def get_analysis_colnames() -> list[str]:
+    """
+    Function for getting names of columns used in the analysis (snow and status columns
+    other than SMDB are not needed)
+
+        Returns:
+            columns (list[str]): List of column names
+    """
+    columns = [
+        "station_code",
+        "station_name",
+        "year",
+        "month",
+        "day",
+        "24h_precipitation_mm",
+        "SMDB_status",
+        "precip_type",
+        "snow_cover_cm",
+    ]
+
+    return columns
+
+
+def get_urls(
+    base_url: str = "https://danepubliczne.imgw.pl/data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne/dobowe/opad/",
+    last_year: int = None,
+) -> list[str]:
+    """
+    Function for creating urls of files to be downloaded. Monthly archives are listed up to
+    the end of the last year, including months which may not be published yet.
+
+        Args:
+            base_url (str): Address of the directory containing precipitation archives
+            last_year (int, optional): Last year of archives. Defaults to None (current year).
 
         Returns:
             urls (list[str]): List of all url addresses of files to be downloaded
     """
-    base_url = "https://danepubliczne.imgw.pl/data/dane_pomiarowo_obserwacyjne/dane_meteorologiczne/dobowe/opad/"
+    if last_year is None:
+        last_year = datetime.date.today().year
+
     parent_dirs = ["1991_1995/", "1996_2000/"] + [
-        str(i) + "/" for i in range(2001, 2023)
+        str(i) + "/" for i in range(2001, last_year + 1)
     ]
     child_dirs = [
         [str(i) for i in range(1991, 1996)],
         [str(i) for i in range(1996, 2001)],
     ] + [
         [str(i) + "_" + str(j).zfill(2) for j in range(1, 13)]
-        for i in range(2001, 2023)
+        for i in range(2001, last_year + 1)
     ]
     ending = "_o.zip"
 
@@ -68,7 +183,8 @@ def get_urls() -> list[str]:
 def implement_changes(
     precipitation: pd.DataFrame, changes: dict, col: str
 ) -> pd.DataFrame:
-    """Function for implementing changes from 'Opis.txt' file
+    """Function for implementing changes from 'Opis.txt' file. Changes are applied on categories
+    of the column, so only unique names are renamed and the codes of rows are relabelled.
 
     Args:
         precipitation (pd.DataFrame): data
@@ -76,54 +192,457 @@ def implement_changes(
         col (str): name of column to implement changes on
 
     Returns:
-        precipitation (pd.DataFrame): DataFrame with implemented changes
+        precipitation (pd.DataFrame): DataFrame with implemented changes (column is categorical)
     """
-    precipitation[col] = precipitation[col].map(changes).fillna(precipitation[col])
+    values = precipitation[col].astype("category")
+    renamed = values.cat.categories.map(lambda name: changes.get(name, name))
+    # Different old names can be renamed to the same name, so the categories are merged
+    inverse, categories = pd.factorize(renamed)
+    codes = values.cat.codes.to_numpy()
+    precipitation[col] = pd.Categorical.from_codes(
+        np.where(codes >= 0, inverse[codes], -1), categories=categories
+    )
 
     return precipitation
 
 
-def download_precip_data() -> pd.DataFrame:
-    """Function for downloading precipitation data
+def compact_precip_data(
+    precipitation: pd.DataFrame, verbose: bool = False
+) -> pd.DataFrame:
+    """Function for converting precipitation data to compact data types declared in get_dtypes
+
+    Args:
+        precipitation (pd.DataFrame): Precipitation data
+        verbose (bool, optional): Flag whether to print memory usage before and after compacting
+                                  (e.g. when converting older .csv data). Defaults to False.
 
     Returns:
-        precipitation_data_wc (pd.DataFrame): Downloaded precipitation data from 33 years
+        pd.DataFrame: Precipitation data with compact data types
     """
-    print("Beginning downloading precipitation data")
-    columns = get_colnames()
+    before = get_memory_usage(precipitation) if verbose else None
+    dtypes = get_dtypes()
+    for col in precipitation.columns:
+        if precipitation[col].dtype != dtypes[col]:
+            precipitation[col] = precipitation[col].astype(dtypes[col])
+        if isinstance(dtypes[col], str) and dtypes[col] == "category":
+            # Categories read as other types (e.g. numbers from older .csv data) are relabelled as strings
+            categories = precipitation[col].cat.categories
+            precipitation[col] = precipitation[col].cat.rename_categories(
+                categories.astype(str)
+            )
 
-    urls = get_urls()
+    if verbose:
+        print(
+            f"Memory usage of precipitation data: {before:.1f} MB before",
+            f"and {get_memory_usage(precipitation):.1f} MB after compacting data types",
+        )
 
-    dfs = []
+    return precipitation
 
-    for url in urls:
-        try:
-            precip = pd.read_csv(
-                url,
-                header=None,
-                names=columns,
-                encoding="cp1250",
-                compression={"method": "zip"},
-            )
-        except BadZipFile:
-            print(f"{url} is corrupted, going to the next file")
-            continue
 
-        dfs.append(precip)
+def save_precip_data(
+    precipitation: pd.DataFrame,
+    archive: str,
+    message: str = None,
+    name: str = "precipitation_data.parquet",
+) -> None:
+    """Function for saving precipitation data from one archive to 'data/precipitation_data.parquet'.
+    Every archive is stored in its own file in the year partition, so saving the archive again replaces
+    only its file. Data is sorted by station code, so row groups statistics allow reading only
+    the rows of chosen stations.
 
-    precipitation_data = pd.concat(dfs)
+    Args:
+        precipitation (pd.DataFrame): Precipitation data from the archive with compact data types
+        archive (str): Name of the archive, e.g. '1991' or '2001_01'
+        message (str, optional): Message to be printed. Defaults to None.
+        name (str, optional): Name of the dataset in 'data' directory. Defaults to "precipitation_data.parquet".
+    """
+    # Status categories are stored as their integer codes
+    statuses = {
+        col: "float32"
+        for col, dtype in get_dtypes().items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    }
+    save_df(
+        precipitation.astype(statuses).sort_values(
+            ["station_code", "year", "month", "day"], kind="stable"
+        ),
+        name,
+        "data",
+        message,
+        partition_cols=["year"],
+        schema=get_parquet_schema(),
+        basename_template=archive + "-{i}.parquet",
+    )
 
-    map_dict = download_changes_data()
 
-    precipitation_data_wc = implement_changes(
-        precipitation_data, map_dict, "station_name"
+def save_precip_data_by_archives(precipitation: pd.DataFrame) -> None:
+    """Function for saving precipitation data (e.g. converted from older 'precipitation_data.csv')
+    split into the archives it comes from (yearly up to 2000 and monthly since 2001)
+
+    Args:
+        precipitation (pd.DataFrame): Precipitation data with compact data types
+    """
+    monthly = precipitation["year"] > 2000
+    archives = (
+        precipitation["year"]
+        .astype(str)
+        .where(
+            ~monthly,
+            precipitation["year"].astype(str)
+            + "_"
+            + precipitation["month"].astype(str).str.zfill(2),
+        )
     )
+    for archive, archive_precip in precipitation.groupby(archives):
+        save_precip_data(archive_precip, archive, f"{archive} archive saved")
 
-    save_df(
-        precipitation_data_wc,
-        "precipitation_data.csv",
-        "data",
-        "Precipitation data downloaded & saved in data/ directory under 'precipitation_data.csv' name",
+
+def iter_precip_data(
+    columns: list[str] = None,
+    station_codes: list[int] = None,
+    batch_size: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """Generator reading precipitation data stored in 'data/precipitation_data.parquet' chunk by chunk,
+    so the data can be processed without holding all of it in memory
+
+    Args:
+        columns (list[str], optional): Columns to be read. Defaults to None (all columns).
+        station_codes (list[int], optional): Codes of stations to be read. Defaults to None (all stations).
+        batch_size (int, optional): Maximum number of rows in one chunk. Defaults to 1 000 000.
+
+    Yields:
+        pd.DataFrame: Chunk of precipitation data with compact data types
+    """
+    dataset = ds.dataset(
+        "data/precipitation_data.parquet",
+        schema=get_parquet_schema(),
+        partitioning="hive",
+    )
+    filter = None
+    if station_codes is not None:
+        filter = ds.field("station_code").isin([int(code) for code in station_codes])
+
+    for batch in dataset.to_batches(
+        columns=columns, filter=filter, batch_size=batch_size
+    ):
+        if batch.num_rows > 0:
+            yield compact_precip_data(batch.to_pandas())
+
+
+def read_precip_data(
+    columns: list[str] = None, station_codes: list[int] = None
+) -> pd.DataFrame:
+    """Function for reading precipitation data stored in 'data/precipitation_data.parquet'
+    (Parquet dataset partitioned by year)
+
+    Args:
+        columns (list[str], optional): Columns to be read. Defaults to None (all columns).
+        station_codes (list[int], optional): Codes of stations to be read. The filter is pushed down
+                                             to the Parquet reader, so row groups of other stations
+                                             are skipped. Defaults to None (all stations).
+
+    Returns:
+        pd.DataFrame: Precipitation data with columns ordered as in get_colnames
+    """
+    filters = None
+    if station_codes is not None:
+        filters = [("station_code", "in", [int(code) for code in station_codes])]
+
+    precipitation = pd.read_parquet(
+        "data/precipitation_data.parquet",
+        columns=columns,
+        filters=filters,
+        schema=get_parquet_schema(),
+    )
+    precipitation = compact_precip_data(precipitation)
+    if "station_name" in precipitation.columns:
+        precipitation["station_name"] = precipitation[
+            "station_name"
+        ].cat.remove_unused_categories()
+
+    return precipitation[
+        [col for col in get_colnames() if col in precipitation.columns]
+    ]
+
+
+def parse_archive(content: bytes, columns: list[str]) -> pd.DataFrame:
+    """Function for parsing downloaded zip archive with precipitation data
+
+    Args:
+        content (bytes): Raw content of the zip archive
+        columns (list[str]): List of column names
+
+    Returns:
+        pd.DataFrame: Precipitation data from the archive
+    """
+    return pd.read_csv(
+        io.BytesIO(content),
+        header=None,
+        names=columns,
+        encoding="cp1250",
+        compression={"method": "zip"},
+        dtype=get_dtypes(),
     )
 
-    return precipitation_data_wc
+
+def get_archive_name(url: str) -> str:
+    """Function for getting name of the archive from its url
+
+    Args:
+        url (str): Address of the archive, e.g. '.../1991_o.zip' or '.../2001_01_o.zip'
+
+    Returns:
+        str: Name of the archive, e.g. '1991' or '2001_01'
+    """
+    return url.rsplit("/", 1)[-1].removesuffix("_o.zip")
+
+
+def is_recent_archive(url: str) -> bool:
+    """Function checking whether the archive is from the current or the previous year,
+    so it may not be published yet
+
+    Args:
+        url (str): Address of the archive
+
+    Returns:
+        bool: True if the archive is from the current or the previous year
+    """
+    return int(get_archive_name(url)[:4]) >= datetime.date.today().year - 1
+
+
+def download_archive(
+    url: str,
+    columns: list[str],
+    retries: int = 3,
+    backoff: float = 1.0,
+    entry: dict = None,
+    offline: bool = False,
+) -> tuple[pd.DataFrame | None, dict | None]:
+    """Function for downloading and parsing one precipitation archive. Without the manifest entry
+       the archive is served from the raw archive cache (revalidated, and downloaded on cache miss
+       or when it has changed). The archive is stored in the cache only after it is parsed. If the manifest
+       entry of the archive is given, the archive is requested conditionally and not parsed when it
+       has not changed. Recent archives which are not published yet (404) are skipped.
+
+    Args:
+        url (str): Address of the archive
+        columns (list[str]): List of column names
+        retries (int, optional): Number of retries of failed download. Defaults to 3.
+        backoff (float, optional): Base delay between retries in seconds. Defaults to 1.0.
+        entry (dict, optional): Manifest entry from the previous download. Defaults to None.
+        offline (bool, optional): Flag whether to serve the archive only from the cache. Defaults to False.
+
+    Returns:
+        tuple[pd.DataFrame | None, dict | None]: Precipitation data from the archive (None if the archive
+                                                 is corrupted, unchanged, not published yet or not cached
+                                                 in offline mode) and its manifest entry (None if the archive
+                                                 is corrupted, not published yet or not cached)
+    """
+    try:
+        if entry is None or offline:
+            cached = fetch_cached(url, retries, backoff, offline, store=False)
+            if cached is None:
+                print(f"{url} is not cached, going to the next file")
+                return None, entry
+            content, headers = cached
+        else:
+            response = fetch_url(
+                url, retries, backoff, headers=get_conditional_headers(entry)
+            )
+            if response.status_code == 304:
+                return None, entry
+            content, headers = response.content, response.headers
+    except requests.HTTPError as error:
+        if error.response.status_code != 404 or not is_recent_archive(url):
+            raise
+        print(f"{url} is not available yet, going to the next file")
+        return None, entry
+
+    content_hash = get_content_hash(content)
+    if entry is not None and entry["content_hash"] == content_hash:
+        put_cached(url, content, headers)
+        return None, create_manifest_entry(
+            headers, content_hash, entry["rows"], entry["parse_time"]
+        )
+
+    start = time.perf_counter()
+    try:
+        precip = parse_archive(content, columns)
+    except (BadZipFile, EOFError, ValueError, zlib.error):
+        # Corrupted (e.g. truncated) payload is not kept in the cache
+        print(f"{url} is corrupted, going to the next file")
+        remove_cached(url)
+        return None, None
+
+    # Only archives which were parsed are stored in the cache
+    put_cached(url, content, headers)
+    return precip, create_manifest_entry(
+        headers, content_hash, len(precip), time.perf_counter() - start
+    )
+
+
+def iter_precip_archives(
+    urls: list[str],
+    max_workers: int = 8,
+    retries: int = 3,
+    backoff: float = 1.0,
+    manifest: dict = None,
+    offline: bool = False,
+) -> Iterator[tuple[str, pd.DataFrame | None, dict | None]]:
+    """Generator downloading and parsing archives concurrently by a pool of threads. At most max_workers
+    archives are downloaded or waiting to be consumed at the same time, so memory usage is bounded.
+    Station name changes from 'Opis.txt' are applied to every archive.
+
+    Args:
+        urls (list[str]): Urls of archives to be downloaded
+        max_workers (int, optional): Number of concurrently downloaded archives. Defaults to 8.
+        retries (int, optional): Number of retries of failed download. Defaults to 3.
+        backoff (float, optional): Base delay between retries in seconds. Defaults to 1.0.
+        manifest (dict, optional): Manifest of previously downloaded archives. Defaults to None.
+        offline (bool, optional): Flag whether to serve archives only from the cache. Defaults to False.
+
+    Yields:
+        tuple[str, pd.DataFrame | None, dict | None]: Url of the archive with the result of download_archive,
+                                                      in the order of urls
+    """
+    columns = get_colnames()
+    manifest = manifest or {}
+    map_dict = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        urls = iter(urls)
+        pending = deque()
+
+        def submit(url):
+            pending.append(
+                (
+                    url,
+                    executor.submit(
+                        download_archive,
+                        url,
+                        columns,
+                        retries,
+                        backoff,
+                        manifest.get(url),
+                        offline,
+                    ),
+                )
+            )
+
+        for url in urls:
+            submit(url)
+            if len(pending) == max_workers:
+                break
+
+        while pending:
+            url, future = pending.popleft()
+            precip, entry = future.result()
+            next_url = next(urls, None)
+            if next_url is not None:
+                submit(next_url)
+
+            if precip is not None:
+                if map_dict is None:
+                    map_dict = download_changes_data(offline)
+                precip = implement_changes(precip, map_dict, "station_name")
+            yield url, precip, entry
+
+
+def download_precip_data(
+    max_workers: int = 8,
+    urls: list[str] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    offline: bool = False,
+) -> None:
+    """Function for downloading precipitation data. Archives are downloaded and parsed concurrently
+       and saved one by one, so the whole data is never held in memory. The data is built in
+       'data/precipitation_data.building.parquet' and replaces 'data/precipitation_data.parquet' (with its manifest)
+       only when all archives are processed, so a failed download doesn't leave incomplete data behind.
+
+    Args:
+        max_workers (int, optional): Number of concurrently downloaded archives. Defaults to 8.
+        urls (list[str], optional): Urls of archives to be downloaded. Defaults to None (all urls from get_urls).
+        retries (int, optional): Number of retries of failed download. Defaults to 3.
+        backoff (float, optional): Base delay between retries in seconds. Defaults to 1.0.
+        offline (bool, optional): Flag whether to serve archives only from the cache. Defaults to False.
+    """
+    print("Beginning downloading precipitation data")
+
+    if urls is None:
+        urls = get_urls()
+
+    building = "data/precipitation_data.building.parquet"
+    # Leftover of a failed download
+    if os.path.exists(building):
+        shutil.rmtree(building)
+
+    manifest = {}
+    for url, precip, entry in iter_precip_archives(
+        urls, max_workers, retries, backoff, offline=offline
+    ):
+        if precip is not None:
+            save_precip_data(
+                precip,
+                get_archive_name(url),
+                f"{url} saved",
+                os.path.basename(building),
+            )
+            manifest[url] = entry
+
+    if os.path.exists(building):
+        if os.path.exists("data/precipitation_data.parquet"):
+            shutil.rmtree("data/precipitation_data.parquet")
+        os.replace(building, "data/precipitation_data.parquet")
+    print(
+        "Precipitation data downloaded & saved in data/ directory under 'precipitation_data.parquet' name"
+    )
+    save_manifest(manifest)
+
+
+def sync_precip_data(
+    max_workers: int = 8,
+    urls: list[str] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    offline: bool = False,
+) -> None:
+    """Function for incremental update of stored precipitation data. Only archives which are new or
+       have changed since the last download (according to the manifest) are parsed and their files
+       in 'data/precipitation_data.parquet' are replaced. The manifest entry of every archive is saved
+       as soon as its files are replaced.
+
+    Args:
+        max_workers (int, optional): Number of concurrently downloaded archives. Defaults to 8.
+        urls (list[str], optional): Urls of archives to be synced. Defaults to None (all urls from get_urls).
+        retries (int, optional): Number of retries of failed download. Defaults to 3.
+        backoff (float, optional): Base delay between retries in seconds. Defaults to 1.0.
+        offline (bool, optional): Flag whether to serve archives only from the cache. Defaults to False.
+    """
+    print("Syncing precipitation data...")
+
+    if urls is None:
+        urls = get_urls()
+
+    manifest = load_manifest()
+    changed = 0
+    for url, precip, entry in iter_precip_archives(
+        urls, max_workers, retries, backoff, manifest, offline
+    ):
+        if precip is not None:
+            save_precip_data(precip, get_archive_name(url), f"{url} synced")
+            changed += 1
+        if entry is not None and manifest.get(url) != entry:
+            # Entry is saved right after its archive, so a failed sync doesn't parse it again
+            manifest[url] = entry
+            save_manifest(manifest, verbose=False)
+
+    if changed:
+        print(
+            f"{changed} new or changed archives spliced into data/precipitation_data.parquet"
+        )
+    else:
+        print("Precipitation data is up to date")
+
+    save_manifest(manifest)
@@ -1,25 +1,38 @@
+import io
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
-from src.utils.utils import dms_to_dd, save_gdf
+from src.utils.utils import dms_to_dd_vectorized, save_gdf
+from .cache import fetch_cached
 
 
-def move_right(row: pd.Series) -> pd.Series:
+def get_stations_url() -> str:
     """
-    In some records columns with lat and lon are shifted, this function solves this problem
+    Function for getting address of the stations codes file
+
+        Returns:
+            url (str): Address of 'kody_stacji.csv'
+    """
+    return "https://danepubliczne.imgw.pl/pl/datastore/getfiledown/Arch/Telemetria/Meteo/kody_stacji.csv"
+
+
+def move_right(stations: pd.DataFrame) -> pd.DataFrame:
+    """
+    In some records (stations without river) columns with lat and lon are shifted, this function
+    solves this problem by shifting these records one column to the right at once
 
         Args:
-            row (pd.Series): Row to be fixed
+            stations (pd.DataFrame): Stations to be fixed
 
         Returns:
-            row (pd.Series): Fixed row
+            stations (pd.DataFrame): Fixed stations
     """
-    rzeka_index = 2
-    if str(row["river"])[0].isdigit():
-        for i in range(len(row) - 1, rzeka_index, -1):
-            row.iloc[i] = row.iloc[i - 1]
-        row.iloc[rzeka_index] = None
-    return row
+    rzeka_index = stations.columns.get_loc("river")
+    shifted = stations["river"].astype(str).str[0].str.isdigit()
+    stations = stations.astype(object)
+    columns = stations.columns[rzeka_index:]
+    stations.loc[shifted, columns[1:]] = stations.loc[shifted, columns[:-1]].to_numpy()
+    stations.loc[shifted, "river"] = None
+    return stations.infer_objects()
 
 
 def get_column_names() -> list[str]:
@@ -44,38 +57,61 @@ def create_stations_gdf(df: pd.DataFrame) -> gpd.GeoDataFrame:
         Returns:
             gdf (gpd.GeoDataFrame): GeoDataFrame with coordinates system EPSG:4326
     """
-    geometry = [Point(lon, lat) for lon, lat in zip(df["lon"], df["lat"])]
+    geometry = gpd.points_from_xy(df["lon"], df["lat"])
     gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
 
     return gdf
 
 
-def download_stations_data() -> gpd.GeoDataFrame:
+def parse_stations(content: bytes) -> pd.DataFrame:
     """
-    Function for downloading stations data
+    Function for parsing stations codes file
+
+        Args:
+            content (bytes): Raw content of 'kody_stacji.csv'
 
         Returns:
-            stations_gdf (gpd.GeoDataFrame): GeoDataFrame of stations
+            stations (pd.DataFrame): Stations with coordinates in dd format
     """
-
-    print("Beginning downloading stations data")
-    col_names = get_column_names()
-
     stations = pd.read_csv(
-        "https://danepubliczne.imgw.pl/pl/datastore/getfiledown/Arch/Telemetria/Meteo/kody_stacji.csv",
+        io.BytesIO(content),
         sep=";",
         encoding="cp1250",
         index_col=0,
         header=0,
-        names=col_names,
+        names=get_column_names(),
     )
 
-    stations = stations.apply(move_right, axis=1)
+    stations = move_right(stations)
+
+    stations["lon"] = dms_to_dd_vectorized(stations["lon"])
+    stations["lat"] = dms_to_dd_vectorized(stations["lat"])
+
+    return stations
+
+
+def download_stations_data(offline: bool = False) -> gpd.GeoDataFrame:
+    """
+    Function for downloading stations data (the file is served from the raw archive cache
+    and downloaded on cache miss)
+
+        Args:
+            offline (bool, optional): Flag whether to serve the file only from the cache. Defaults to False.
+
+        Returns:
+            stations_gdf (gpd.GeoDataFrame): GeoDataFrame of stations
+    """
+
+    print("Beginning downloading stations data")
 
-    stations["lon"] = stations["lon"].apply(dms_to_dd)
-    stations["lat"] = stations["lat"].apply(dms_to_dd)
+    url = get_stations_url()
+    cached = fetch_cached(url, offline=offline)
+    if cached is None:
+        raise FileNotFoundError(
+            f"{url} is not cached, it can't be read in offline mode"
+        )
 
-    stations_gdf = create_stations_gdf(stations)
+    stations_gdf = create_stations_gdf(parse_stations(cached[0]))
 
     save_gdf(
         stations_gdf,
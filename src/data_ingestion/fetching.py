@@ -0,0 +1,64 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+_thread_local = threading.local()
+
+
+def get_session(pool_size: int = 10) -> requests.Session:
+    """Function returning HTTP session bound to the current thread. The session is created once
+       per thread, so connections to the same host are kept alive and reused between requests.
+
+    Args:
+        pool_size (int, optional): Maximum number of kept alive connections per host. Defaults to 10.
+
+    Returns:
+        requests.Session: Session of the current thread
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _thread_local.session = session
+    return session
+
+
+def fetch_url(
+    url: str,
+    retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 60.0,
+    headers: dict = None,
+    session: requests.Session = None,
+) -> requests.Response:
+    """Function for fetching the url with retries. Connection errors, timeouts and 5xx responses
+       are retried with exponential backoff (backoff, 2 * backoff, 4 * backoff, ... seconds).
+
+    Args:
+        url (str): Address of the file to be fetched
+        retries (int, optional): Number of retries after the first attempt. Defaults to 3.
+        backoff (float, optional): Base delay between attempts in seconds. Defaults to 1.0.
+        timeout (float, optional): Timeout of a single request in seconds. Defaults to 60.0.
+        headers (dict, optional): Additional request headers. Defaults to None.
+        session (requests.Session, optional): Session used for requests. Defaults to None (session
+                                              of the current thread from get_session).
+
+    Returns:
+        requests.Response: Response with the downloaded content
+    """
+    session = session or get_session()
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, timeout=timeout, headers=headers)
+            if response.status_code < 500:
+                response.raise_for_status()
+                return response
+            if attempt == retries:
+                response.raise_for_status()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2**attempt)
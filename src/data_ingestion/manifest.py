@@ -0,0 +1,94 @@
+import os
+import json
+import hashlib
+
+
+def load_manifest(path: str = "data/precipitation_manifest.json") -> dict:
+    """Function for loading manifest of downloaded archives
+
+    Args:
+        path (str, optional): Path to the manifest file. Defaults to "data/precipitation_manifest.json".
+
+    Returns:
+        dict: Dictionary with url of the archive as key and its manifest entry as value
+              (empty if the manifest does not exist yet)
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(
+    manifest: dict,
+    path: str = "data/precipitation_manifest.json",
+    verbose: bool = True,
+) -> None:
+    """Function for saving manifest of downloaded archives. The file is replaced atomically,
+    so an interrupted save doesn't corrupt the manifest.
+
+    Args:
+        manifest (dict): Dictionary with url of the archive as key and its manifest entry as value
+        path (str, optional): Path to the manifest file. Defaults to "data/precipitation_manifest.json".
+        verbose (bool, optional): Flag whether to print the message. Defaults to True.
+    """
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+    if verbose:
+        print(f"Manifest of downloaded archives saved in {path}")
+
+
+def get_content_hash(content: bytes) -> str:
+    """Function for calculating hash of the downloaded content
+
+    Args:
+        content (bytes): Raw content of the file
+
+    Returns:
+        str: SHA-256 hex digest of the content
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_conditional_headers(entry: dict | None) -> dict:
+    """Function for creating conditional request headers from the manifest entry, so the server
+       can answer with 304 Not Modified when the archive has not changed
+
+    Args:
+        entry (dict | None): Manifest entry of the archive
+
+    Returns:
+        dict: Request headers (empty if there is no entry)
+    """
+    headers = {}
+    if entry is None:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def create_manifest_entry(
+    headers: dict, content_hash: str, rows: int, parse_time: float
+) -> dict:
+    """Function for creating manifest entry of the downloaded archive
+
+    Args:
+        headers (dict): Response headers of the downloaded archive
+        content_hash (str): Hash of the archive content
+        rows (int): Number of parsed rows
+        parse_time (float): Time of parsing the archive in seconds
+
+    Returns:
+        dict: Manifest entry
+    """
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "content_hash": content_hash,
+        "rows": rows,
+        "parse_time": round(parse_time, 4),
+    }
@@ -1 +1,7 @@
-__all__ = ["preprocessing_stations", "clipping", "preprocessing_precip"]
+__all__ = [
+    "preprocessing_stations",
+    "clipping",
+    "preprocessing_precip",
+    "precip_cube",
+    "station_partition",
+]
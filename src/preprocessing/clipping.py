@@ -1,6 +1,10 @@
+import os
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from typing import Tuple
+from src.data_ingestion.download_borders import get_voivodeship_borders
+from src.utils.utils import save_df
 
 
 def clip_precip_to_voi(precip: pd.DataFrame, voi_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
@@ -18,6 +22,7 @@ def clip_precip_to_voi(precip: pd.DataFrame, voi_gdf: gpd.GeoDataFrame) -> pd.Da
     merged_df = precip.merge(
         voi_gdf, how="inner", left_on="station_code", right_on="ID"
     )
+    merged_df["station_name"] = merged_df["station_name"].cat.remove_unused_categories()
     merged_df = merged_df[
         [
             "station_code",
@@ -39,6 +44,57 @@ def clip_precip_to_voi(precip: pd.DataFrame, voi_gdf: gpd.GeoDataFrame) -> pd.Da
     return merged_df
 
 
+def assign_to_regions(
+    gdf: gpd.GeoDataFrame, regions: gpd.GeoDataFrame, name_col: str = "name"
+) -> pd.Series:
+    """Function to assign every point of GeoDataFrame to the region (voivodeship, river basin, county, ...)
+       it lies within. All points are assigned in one pass using spatial index of regions.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame containing stations data
+        regions (gpd.GeoDataFrame): GeoDataFrame containing polygons of regions
+        name_col (str, optional): Column with names of regions. Defaults to "name".
+
+    Returns:
+        pd.Series: Name of the region of every point (None if the point is outside all regions,
+                   the first region if regions overlap)
+    """
+    points_idx, regions_idx = regions.sindex.query(gdf.geometry, predicate="within")
+    first = np.unique(points_idx, return_index=True)[1]
+
+    names = np.full(len(gdf), None, dtype=object)
+    names[points_idx[first]] = regions[name_col].to_numpy()[regions_idx[first]]
+    return pd.Series(names, index=gdf.index, name=name_col)
+
+
+def clip_to_region(
+    gdf: gpd.GeoDataFrame,
+    regions: gpd.GeoDataFrame,
+    region: str,
+    name_col: str = "name",
+    assignment: pd.Series = None,
+) -> Tuple[gpd.GeoSeries, gpd.GeoDataFrame]:
+    """Function to clip GeoDataFrame to borders of any region, e.g. river basin or county
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame containing stations data
+        regions (gpd.GeoDataFrame): GeoDataFrame containing polygons of regions
+        region (str): Name of the region to clip the data to
+        name_col (str, optional): Column with names of regions. Defaults to "name".
+        assignment (pd.Series, optional): Already computed result of assign_to_regions for gdf.
+                                          Defaults to None (computed here).
+
+    Returns:
+        Tuple[gpd.GeoSeries, gpd.GeoDataFrame]: Tuple containing region polygon
+                                                and clipped GeoDataFrame
+    """
+    region_polygon = regions[regions[name_col] == region]["geometry"]
+    if assignment is None:
+        assignment = assign_to_regions(gdf, regions, name_col)
+    region_gdf = gdf[(assignment == region).to_numpy()]
+    return region_polygon, region_gdf
+
+
 def clip_to_voivodeship(
     gdf: gpd.GeoDataFrame, geojson: gpd.GeoDataFrame, voi: str
 ) -> Tuple[gpd.GeoSeries, gpd.GeoDataFrame]:
@@ -53,27 +109,70 @@ def clip_to_voivodeship(
         Tuple[gpd.GeoSeries, gpd.GeoDataFrame]: Tuple containing voivodeship polygon
                                                 and clipped GeoDataFrame
     """
-    voi_polygon = geojson[geojson["name"] == voi]["geometry"]
-    voi_gdf = gdf[gdf.within(voi_polygon.geometry.iloc[0])]
-    return voi_polygon, voi_gdf
+    return clip_to_region(gdf, geojson, voi)
+
 
+def get_stations_voivodeships(
+    stations: gpd.GeoDataFrame, geojson: gpd.GeoDataFrame
+) -> pd.Series:
+    """Function to get voivodeship of every station. The assignment is computed once and saved
+       to 'data/stations_voivodeships.parquet', it's computed again only if the stations have changed.
 
-def get_voivodeship_borders() -> gpd.GeoDataFrame:
-    """Function to fetch and return voivodeship borders data as GeoDataFrame from
-       a specified URL with spaces and dashes removed from voivodeship names.
+    Args:
+        stations (gpd.GeoDataFrame): All stations data
+        geojson (gpd.GeoDataFrame): GeoDataFrame containing voivodeship borders
 
     Returns:
-        gpd.GeoDataFrame: GeoDataFrame containing voivodeship borders
+        pd.Series: Voivodeship name of every station (None for stations outside Poland)
     """
-    geojson = gpd.read_file(
-        "https://simplemaps.com/static/svg/country/pl/admin1/pl.json"
+    locations = pd.DataFrame(
+        {
+            "ID": stations["ID"].to_numpy(),
+            "lon": stations.geometry.x.to_numpy(),
+            "lat": stations.geometry.y.to_numpy(),
+        }
     )
-    geojson["name"] = (
-        geojson["name"]
-        .apply(lambda x: x.replace(" ", ""))
-        .apply(lambda x: x.replace("-", ""))
+
+    if os.path.exists("data/stations_voivodeships.parquet"):
+        saved = pd.read_parquet("data/stations_voivodeships.parquet")
+        if saved[["ID", "lon", "lat"]].equals(locations):
+            return pd.Series(
+                saved["voivodeship"].to_numpy(), index=stations.index, name="name"
+            )
+
+    assignment = assign_to_regions(stations, geojson)
+    locations["voivodeship"] = assignment.to_numpy()
+    save_df(
+        locations,
+        "stations_voivodeships.parquet",
+        "data",
+        "Voivodeships of stations saved in data/ directory under 'stations_voivodeships.parquet' name",
+    )
+    return assignment
+
+
+def clip_stations_to_voi(
+    stations: gpd.GeoDataFrame, voi: str, offline: bool = False
+) -> Tuple[gpd.GeoSeries, gpd.GeoDataFrame]:
+    """Function for clipping stations data to voivodeship (so precipitation data can be read
+       only for the stations from this voivodeship) using saved voivodeships of stations
+
+    Args:
+        stations (gpd.GeoDataFrame): All stations data
+        voi (str): Voivodeship name
+        offline (bool, optional): Flag whether to read voivodeship borders only from the cache.
+                                  Defaults to False.
+
+    Returns:
+        Tuple[gpd.GeoSeries, gpd.GeoDataFrame]: Polygon of voivodeship & stations clipped to voivodeship
+    """
+    geojson = get_voivodeship_borders(offline)
+    return clip_to_region(
+        stations,
+        geojson,
+        voi,
+        assignment=get_stations_voivodeships(stations, geojson),
     )
-    return geojson
 
 
 def clip_data_to_voi(
@@ -91,8 +190,7 @@ def clip_data_to_voi(
           to voivodeship & stations clipped to voivodeship
     """
     print(f"Clipping precipitation and stations data to {voi} voivodeship...")
-    geojson = get_voivodeship_borders()
-    voi_polygon, voi_stations_gdf = clip_to_voivodeship(stations, geojson, voi)
+    voi_polygon, voi_stations_gdf = clip_stations_to_voi(stations, voi)
     voi_precip_gdf = clip_precip_to_voi(precip, voi_stations_gdf)
 
     print("Clipping ended")
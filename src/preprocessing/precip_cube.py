@@ -0,0 +1,237 @@
+import os
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass
+class PrecipCube:
+    """Dense representation of preprocessed precipitation data of one voivodeship as stations x days arrays.
+    Days cover the whole period of the data day by day, days without the measurement are marked in valid mask.
+
+    Attributes:
+        precip (np.ndarray): Stations x days array of 24h precipitation in mm (NaN if missing)
+        valid (np.ndarray): Stations x days mask of days present in the preprocessed data
+        dates (np.ndarray): Days of the data (datetime64[D])
+        station_codes (np.ndarray): Codes of stations
+        station_names (np.ndarray): Names of stations
+        lat (np.ndarray): Latitudes of stations
+        lon (np.ndarray): Longitudes of stations
+        altitude (np.ndarray): Altitudes of stations
+    """
+
+    precip: np.ndarray
+    valid: np.ndarray
+    dates: np.ndarray
+    station_codes: np.ndarray
+    station_names: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    altitude: np.ndarray
+
+    @property
+    def n_stations(self) -> int:
+        return self.precip.shape[0]
+
+    @property
+    def n_days(self) -> int:
+        return self.precip.shape[1]
+
+    def station_rows(self, station_name: str) -> np.ndarray:
+        """Function returning rows of the cube which belong to the station
+
+        Args:
+            station_name (str): Name of the station
+
+        Returns:
+            np.ndarray: Indices of rows (more than one if stations with different codes have the same name)
+        """
+        rows = np.flatnonzero(self.station_names == station_name)
+        if len(rows) == 0:
+            raise KeyError(f"There is no {station_name} station in the data")
+        return rows
+
+    def station_series(self, station_name: str) -> pd.Series:
+        """Function returning daily precipitation of the station (only days present in the data)
+
+        Args:
+            station_name (str): Name of the station
+
+        Returns:
+            pd.Series: 24h precipitation with dates as index
+        """
+        rows = self.station_rows(station_name)
+        days = self.valid[rows].any(axis=0)
+        precip = np.where(self.valid[rows], self.precip[rows], np.nan)[:, days]
+        values = precip[0] if len(rows) == 1 else np.nansum(precip, axis=0)
+        return pd.Series(
+            values,
+            index=pd.DatetimeIndex(
+                self.dates[days].astype("datetime64[ns]"), name="date"
+            ),
+            name="24h_precipitation_mm",
+        )
+
+    def month_starts(self) -> np.ndarray:
+        """Function returning indices of the first day of every month in the cube
+
+        Returns:
+            np.ndarray: Indices of days
+        """
+        months = self.dates.astype("datetime64[M]")
+        return np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+
+    def monthly_totals(self, station_name: str = None) -> pd.DataFrame:
+        """Function returning monthly sums of precipitation (as resampling to month ends would do)
+        of the station or of all stations (for the whole voivodeship). Months between the first and the last
+        day present in the data which have no measurements have sum equal to 0.
+
+        Args:
+            station_name (str, optional): Name of the station. Defaults to None (all stations).
+
+        Returns:
+            pd.DataFrame: DataFrame with 24h_precipitation_mm column and month ends as index
+        """
+        rows = (
+            np.arange(self.n_stations)
+            if station_name is None
+            else self.station_rows(station_name)
+        )
+        valid = self.valid[rows]
+        precip = np.where(valid & ~np.isnan(self.precip[rows]), self.precip[rows], 0)
+
+        starts = self.month_starts()
+        totals = np.add.reduceat(precip.sum(axis=0, dtype="float64"), starts)
+        has_data = np.add.reduceat(valid.any(axis=0), starts) > 0
+
+        first, last = np.flatnonzero(has_data)[[0, -1]]
+        months = self.dates[starts[first : last + 1]].astype("datetime64[M]")
+        index = pd.DatetimeIndex(
+            ((months + 1).astype("datetime64[D]") - 1).astype("datetime64[ns]"),
+            name="date",
+        )
+        return pd.DataFrame(
+            {"24h_precipitation_mm": totals[first : last + 1].astype("float32")},
+            index=index,
+        )
+
+    def monthly_matrix(self) -> Tuple[np.ndarray, pd.DatetimeIndex, np.ndarray]:
+        """Function returning monthly sums of precipitation of all stations as stations x months matrix.
+        Rows of stations with the same name are summed up. Every row has the same values as monthly_totals
+        of the station and NaN outside the station's period.
+
+        Returns:
+            Tuple[np.ndarray, pd.DatetimeIndex, np.ndarray]: Names of stations, month ends and
+                                                             stations x months matrix
+        """
+        station_names, rows = np.unique(self.station_names, return_inverse=True)
+        order = pd.unique(rows)
+        station_names = station_names[order]
+        rows = np.argsort(order)[rows]
+
+        precip = np.where(self.valid & ~np.isnan(self.precip), self.precip, 0)
+        sums = np.zeros((len(station_names), self.n_days))
+        counts = np.zeros((len(station_names), self.n_days), dtype=int)
+        np.add.at(sums, rows, precip)
+        np.add.at(counts, rows, self.valid)
+
+        starts = self.month_starts()
+        totals = np.add.reduceat(sums, starts, axis=1).astype("float32")
+        has_data = np.add.reduceat(counts, starts, axis=1) > 0
+
+        months = np.arange(len(starts))
+        first = has_data.argmax(axis=1)
+        last = len(starts) - 1 - has_data[:, ::-1].argmax(axis=1)
+        outside = (months < first[:, None]) | (months > last[:, None])
+        matrix = np.where(outside, np.nan, totals.astype("float64"))
+
+        index = pd.DatetimeIndex(
+            (
+                (self.dates[starts].astype("datetime64[M]") + 1).astype("datetime64[D]")
+                - 1
+            ).astype("datetime64[ns]"),
+            name="date",
+        )
+        return station_names, index, matrix
+
+    def save(self, directory: str) -> None:
+        """Function for saving the cube as .npy files in the given directory, so it can be loaded
+        with memory mapping
+
+        Args:
+            directory (str): Directory of the cube, e.g. 'data/Lubusz_precip_cube'
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in vars(self).items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        print(f"Precipitation cube saved in {directory}/")
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = "r") -> "PrecipCube":
+        """Function for loading the cube saved with save method
+
+        Args:
+            directory (str): Directory of the cube, e.g. 'data/Lubusz_precip_cube'
+            mmap_mode (str, optional): Memory mapping mode of np.load, None loads arrays to memory.
+                                       Defaults to "r" (read-only, without copying the data).
+
+        Returns:
+            PrecipCube: Loaded cube
+        """
+        return cls(
+            **{
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode)
+                for name in cls.__dataclass_fields__
+            }
+        )
+
+
+def build_precip_cube(df: pd.DataFrame) -> PrecipCube:
+    """Function for building dense stations x days cube from preprocessed data
+
+    Args:
+        df (pd.DataFrame): Preprocessed data with dates as index
+
+    Returns:
+        PrecipCube: Cube of precipitation data
+    """
+    station_idx, station_codes = pd.factorize(df["station_code"])
+    days = df.index.to_numpy().astype("datetime64[D]")
+    dates = np.arange(days.min(), days.max() + 1)
+    day_idx = (days - dates[0]).astype(int)
+
+    precip = np.full((len(station_codes), len(dates)), np.nan, dtype="float32")
+    valid = np.zeros((len(station_codes), len(dates)), dtype=bool)
+    precip[station_idx, day_idx] = df["24h_precipitation_mm"].to_numpy()
+    valid[station_idx, day_idx] = True
+
+    stations = df.groupby(station_idx)[
+        ["station_name", "lat", "lon", "altitude"]
+    ].first()
+
+    return PrecipCube(
+        precip=precip,
+        valid=valid,
+        dates=dates,
+        station_codes=np.asarray(station_codes, dtype="int64"),
+        station_names=stations["station_name"].to_numpy(dtype=str),
+        lat=stations["lat"].to_numpy(dtype="float64"),
+        lon=stations["lon"].to_numpy(dtype="float64"),
+        altitude=stations["altitude"].to_numpy(dtype="float32"),
+    )
+
+
+def get_precip_cube(df: pd.DataFrame, voi: str) -> PrecipCube:
+    """Pipeline for building the cube of preprocessed data and saving it to 'data/[voi]_precip_cube'
+
+    Args:
+        df (pd.DataFrame): Preprocessed data with dates as index
+        voi (str): Voivodeship name
+
+    Returns:
+        PrecipCube: Cube of precipitation data
+    """
+    cube = build_precip_cube(df)
+    cube.save(f"data/{voi}_precip_cube")
+    return cube
@@ -1,9 +1,16 @@
+import time
+import tracemalloc
 import pandas as pd
 import numpy as np
+from scipy.spatial import cKDTree
+from typing import Tuple
+from src.utils.utils import get_memory_usage
 
 
 def cleaning_data(df: pd.DataFrame, voi: str) -> pd.DataFrame:
-    """Function for cleaning data (setting relevant n/a's and dropping duplicates)
+    """Function for cleaning data (setting relevant n/a's and dropping duplicates).
+    Selecting rows without duplicates is the only copy of the data made during preprocessing,
+    the input data is not modified.
 
     Args:
         df (pd.DataFrame): Precipitation data for given voivodeship
@@ -13,13 +20,12 @@ def cleaning_data(df: pd.DataFrame, voi: str) -> pd.DataFrame:
         pd.DataFrame: Cleaned data
     """
     print("Cleaning the data...")
-    df_smdb = df.copy()
-    ind = df_smdb[df_smdb.SMDB_status == 8].index
-    df_smdb.loc[ind, "24h_precipitation_mm"] = np.nan
+    duplicated = df.duplicated(subset=["station_code", "year", "month", "day"])
+    df_no_duplicates = df.take(np.flatnonzero(~duplicated.to_numpy()))
 
-    df_no_duplicates = df_smdb.drop_duplicates(
-        subset=["station_code", "year", "month", "day"]
-    )
+    df_no_duplicates["24h_precipitation_mm"] = df_no_duplicates[
+        "24h_precipitation_mm"
+    ].mask(df_no_duplicates["SMDB_status"] == 8)
 
     df_no_duplicates.isna().sum().to_csv(f"data/{voi}_missing_data.csv")
 
@@ -31,58 +37,245 @@ def cleaning_data(df: pd.DataFrame, voi: str) -> pd.DataFrame:
     return df_no_duplicates
 
 
-def filling_data(df: pd.DataFrame) -> pd.DataFrame:
+def fill_month_mean(df: pd.DataFrame) -> pd.Series:
+    """Imputer filling missing precipitation with year-monthly mean for the voivodeship
+
+    Args:
+        df (pd.DataFrame): Cleaned data
+
+    Returns:
+        pd.Series: Filled 24h_precipitation_mm column
+    """
+    precip = df["24h_precipitation_mm"]
+    means = precip.groupby([df["year"], df["month"]], observed=True).transform("mean")
+    return precip.fillna(means)
+
+
+def fill_station_climatology(df: pd.DataFrame) -> pd.Series:
+    """Imputer filling missing precipitation with the mean of the station in the same month
+    of the year over all years (station's climatology)
+
+    Args:
+        df (pd.DataFrame): Cleaned data
+
+    Returns:
+        pd.Series: Filled 24h_precipitation_mm column
+    """
+    precip = df["24h_precipitation_mm"]
+    means = precip.groupby([df["station_code"], df["month"]], observed=True).transform(
+        "mean"
+    )
+    return precip.fillna(means)
+
+
+def get_station_day_matrix(
+    df: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Function for arranging precipitation to station x day matrix
+
+    Args:
+        df (pd.DataFrame): Cleaned data (with lat and lon columns of stations)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Station x day matrix of precipitation
+            (NaN for missing measurements), station and day index of every row of df and coordinates
+            (lat, lon) of stations
+    """
+    station_idx, station_codes = pd.factorize(df["station_code"])
+    day_idx = df.groupby(["year", "month", "day"], observed=True).ngroup().to_numpy()
+
+    precip = np.full((len(station_codes), day_idx.max() + 1), np.nan)
+    precip[station_idx, day_idx] = df["24h_precipitation_mm"].to_numpy()
+
+    coords = df.groupby(station_idx)[["lat", "lon"]].first().to_numpy()
+
+    return precip, station_idx, day_idx, coords
+
+
+def get_station_neighbours(coords: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Function for finding k nearest stations of every station with k-d tree. Coordinates
+    are projected to kilometres (longitude scaled to the mean latitude of stations).
+
+    Args:
+        coords (np.ndarray): Coordinates (lat, lon) of stations
+        k (int): Number of neighbours (limited to number of other stations)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Distances (in km) and indices of neighbours of every station,
+                                       ordered from the nearest one
+    """
+    lat, lon = coords[:, 0], coords[:, 1]
+    xy = np.column_stack([lon * np.cos(np.radians(lat.mean())) * 111.32, lat * 110.57])
+    k = min(k, len(coords) - 1)
+    if k < 1:
+        return np.empty((len(coords), 0)), np.empty((len(coords), 0), dtype=int)
+
+    distances, neighbours = cKDTree(xy).query(xy, k=k + 1)
+
+    # Station itself is dropped from its neighbours (it's not always the first one
+    # if other station has the same coordinates)
+    others = neighbours != np.arange(len(coords))[:, None]
+    others[others.all(axis=1), -1] = False
+    distances = distances[others].reshape(len(coords), k)
+    neighbours = neighbours[others].reshape(len(coords), k)
+
+    return distances, neighbours
+
+
+def fill_nearest_station(df: pd.DataFrame) -> pd.Series:
+    """Imputer filling missing precipitation with the value measured on the same day
+    by the nearest station which has the measurement
+
+    Args:
+        df (pd.DataFrame): Cleaned data (with lat and lon columns of stations)
+
+    Returns:
+        pd.Series: Filled 24h_precipitation_mm column
+    """
+    precip, station_idx, day_idx, coords = get_station_day_matrix(df)
+    _, neighbours = get_station_neighbours(coords, len(coords) - 1)
+
+    filled = precip.copy()
+    for k in range(neighbours.shape[1]):
+        missing = np.isnan(filled)
+        if not missing.any():
+            break
+        filled[missing] = precip[neighbours[:, k]][missing]
+
+    return pd.Series(filled[station_idx, day_idx], index=df.index)
+
+
+def fill_idw(df: pd.DataFrame, k: int = 5, power: float = 2.0) -> pd.Series:
+    """Imputer filling missing precipitation with inverse distance weighted mean of values
+    measured on the same day by k nearest stations (stations without the measurement are skipped)
+
+    Args:
+        df (pd.DataFrame): Cleaned data (with lat and lon columns of stations)
+        k (int, optional): Number of neighbouring stations. Defaults to 5.
+        power (float, optional): Power of distance in weights. Defaults to 2.0.
+
+    Returns:
+        pd.Series: Filled 24h_precipitation_mm column
+    """
+    precip, station_idx, day_idx, coords = get_station_day_matrix(df)
+    distances, neighbours = get_station_neighbours(coords, k)
+
+    # Stations x neighbours x days
+    values = precip[neighbours]
+    available = ~np.isnan(values)
+    weights = 1 / np.maximum(distances, 1e-3) ** power
+    weights = np.where(available, weights[:, :, None], 0)
+
+    weights_sum = weights.sum(axis=1)
+    estimate = (weights * np.where(available, values, 0)).sum(axis=1)
+    estimate = np.divide(
+        estimate,
+        weights_sum,
+        out=np.full_like(estimate, np.nan),
+        where=weights_sum > 0,
+    )
+
+    filled = np.where(np.isnan(precip), estimate, precip)
+    return pd.Series(filled[station_idx, day_idx], index=df.index)
+
+
+def fill_linear(df: pd.DataFrame) -> pd.Series:
+    """Imputer filling missing precipitation by linear interpolation between the nearest
+    measurements of the station (gaps at the beginning and end of the series are not filled)
+
+    Args:
+        df (pd.DataFrame): Cleaned data
+
+    Returns:
+        pd.Series: Filled 24h_precipitation_mm column
+    """
+    ordered = df.sort_values(["station_code", "year", "month", "day"])
+    filled = (
+        ordered["24h_precipitation_mm"]
+        .groupby(ordered["station_code"], observed=True)
+        .transform(lambda precip: precip.interpolate(limit_area="inside"))
+    )
+    return filled.reindex(df.index)
+
+
+def get_imputers() -> dict:
+    """Function for getting imputers of missing precipitation selectable by name
+
+    Returns:
+        dict: Dictionary with name of the imputer as key and the imputer as value
+    """
+    imputers = {
+        "month_mean": fill_month_mean,
+        "station_climatology": fill_station_climatology,
+        "nearest_station": fill_nearest_station,
+        "idw": fill_idw,
+        "linear": fill_linear,
+    }
+    return imputers
+
+
+def filling_data(
+    df: pd.DataFrame, imputer: str = "month_mean", inplace: bool = False
+) -> pd.DataFrame:
     """Function for filling missing values from cleaned data.
     Filled columns are:
         precip_type (with value 'not/available')
-        24h_precipitation_mm (with year-monthly mean for the voivodeship)
+        24h_precipitation_mm (with chosen imputer, by default with year-monthly mean for the voivodeship;
+                              values which other imputers can't fill are filled with year-monthly mean)
         SMDB_status (with 'Normal')
 
     Args:
         df (pd.DataFrame): Cleaned data
+        imputer (str, optional): Name of the imputer from get_imputers. Defaults to "month_mean".
+        inplace (bool, optional): Flag whether to fill the given data instead of its copy. Defaults to False.
 
     Returns:
         pd.DataFrame: Filled data
     """
+    imputers = get_imputers()
+    if imputer not in imputers:
+        raise ValueError(
+            f"Unknown imputer {imputer}. You can choose among: {', '.join(imputers)}"
+        )
 
     print("Filling missing data...")
     # Precip type
-    df_filled = df.copy()
-    df_filled["precip_type"] = df_filled.precip_type.fillna("not/available")
-    df_filled["precip_type"] = df_filled.precip_type.str.replace("W", "Water").replace(
-        "S", "Snow"
+    df_filled = df if inplace else df.copy()
+    df_filled["precip_type"] = (
+        df_filled["precip_type"]
+        .cat.add_categories("not/available")
+        .fillna("not/available")
+        .cat.rename_categories({"W": "Water", "S": "Snow"})
     )
 
     # Precipitation
-    years = df_filled.year.unique()
-    months = df_filled.month.unique()
-
-    for year in years:
-        for month in months:
-            temp = df_filled[(df_filled.year == year) & (df_filled.month == month)]
-            if temp["24h_precipitation_mm"].isna().sum() > 0:
-                ind = temp[temp["24h_precipitation_mm"].isna()].index
-                df_filled.loc[ind, "24h_precipitation_mm"] = temp[
-                    "24h_precipitation_mm"
-                ].mean()
+    filled = imputers[imputer](df_filled)
+    if imputer != "month_mean":
+        filled = filled.fillna(fill_month_mean(df_filled))
+    df_filled["24h_precipitation_mm"] = filled.astype(
+        df_filled["24h_precipitation_mm"].dtype
+    )
 
     # SMDB
-    df_filled["SMDB_status"] = df_filled["SMDB_status"].fillna("Normal")
+    df_filled["SMDB_status"] = (
+        df_filled["SMDB_status"].cat.add_categories("Normal").fillna("Normal")
+    )
 
     print("Filling missing data ended")
 
     return df_filled
 
 
-def transforming_data(df: pd.DataFrame) -> pd.DataFrame:
+def transforming_data(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
     """
     Function performing data transformation to correct data types and prepare for analysis.
     Transformed columns are:
         year, month, date - merged to a date format column
-        snow_cover_cm, altitude - int corrected to float
+        snow_cover_cm, altitude - int corrected to float32
 
     Args:
         df (pd.DataFrame): Filled data.
+        inplace (bool, optional): Flag whether to transform the given data instead of its copy. Defaults to False.
 
     Returns:
         pd.DataFrame: Transformed data.
@@ -91,33 +284,77 @@ def transforming_data(df: pd.DataFrame) -> pd.DataFrame:
 
     print("Transforming data (correcting data types)...")
 
-    df_t = df.copy()
-    df_t["date"] = pd.to_datetime(df_t[["year", "month", "day"]])
+    df_t = df if inplace else df.copy()
+    df_t.index = pd.DatetimeIndex(
+        pd.to_datetime(
+            {"year": df_t["year"], "month": df_t["month"], "day": df_t["day"]}
+        ),
+        name="date",
+    )
     df_t.drop(["year", "month", "day"], axis=1, inplace=True)
-    df_t.set_index("date", inplace=True)
 
-    df_t["altitude"] = df_t["altitude"].str.replace(" ", "")
-    df_t["altitude"] = df_t["altitude"].astype(float)
-    df_t["snow_cover_cm"] = df_t["snow_cover_cm"].astype(float)
+    # Altitude strings are converted once per station, not per row
+    altitude_codes, altitudes = pd.factorize(df_t["altitude"])
+    altitudes = altitudes.str.replace(" ", "").astype("float32")
+    df_t["altitude"] = np.where(
+        altitude_codes >= 0, altitudes.to_numpy()[altitude_codes], np.nan
+    ).astype("float32")
+    df_t["snow_cover_cm"] = df_t["snow_cover_cm"].astype("float32")
 
-    print("Transforming data ended.")
+    print(
+        "Transforming data ended.",
+        f"Memory usage of preprocessed data: {get_memory_usage(df_t):.1f} MB",
+    )
 
     return df_t
 
 
-def preprocess_precipitation(df: pd.DataFrame, voi: str) -> pd.DataFrame:
+def preprocess_precipitation(
+    df: pd.DataFrame, voi: str, imputer: str = "month_mean", profile: bool = False
+) -> pd.DataFrame:
     """This is a pipeline function for invoking all preprocessing for the precipitation data
     (except of clipping the data to voivodeship - this is performed separately and earlier)
 
     Args:
         df (pd.DataFrame): Precipitation data for one voivodeship
         voi (str): Voivodeship name
+        imputer (str, optional): Name of the imputer of missing precipitation. Defaults to "month_mean".
+        profile (bool, optional): Flag whether to print times of stages and peak memory allocated during
+                                  preprocessing (traced with tracemalloc, which slows allocations down; the peak
+                                  is not measured if memory is already traced by the caller). Defaults to False.
 
     Returns:
         pd.DataFrame: Ready to analysis data
     """
-    cleaned_df = cleaning_data(df, voi)
-    filled_df = filling_data(cleaned_df)
-    transformed_df = transforming_data(filled_df)
-
-    return transformed_df
+    trace = profile and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    timings = dict()
+
+    # Cleaning makes the only copy of the data, next stages work on it in place
+    start = time.perf_counter()
+    preprocessed_df = cleaning_data(df, voi)
+    timings["cleaning"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preprocessed_df = filling_data(preprocessed_df, imputer, inplace=True)
+    timings["filling"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preprocessed_df = transforming_data(preprocessed_df, inplace=True)
+    timings["transforming"] = time.perf_counter() - start
+
+    if profile:
+        message = [
+            "Preprocessing times:",
+            ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in timings.items()),
+        ]
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1] / 1024**2
+            tracemalloc.stop()
+            message.append(
+                f"- peak memory allocated during preprocessing: {peak:.1f} MB"
+            )
+        print(*message)
+
+    return preprocessed_df
@@ -10,29 +10,14 @@ def get_and_save_missing_stations(
        the precipitation data and are not in the stations data. The list is saved to the appropriate file.
 
     Args:
-        precip (pd.DataFrame): Data containing precipitation over years
+        precip (pd.DataFrame): Data containing precipitation over years (only station_name
+                               and station_code columns are needed)
         stations_gdf (gpd.GeoDataFrame): GeoDataFrame containing details about stations
     """
-    merged_df_with_missing = precip.merge(
+    precip_stations = precip[["station_name", "station_code"]].drop_duplicates()
+    merged_df_with_missing = precip_stations.merge(
         stations_gdf, how="left", left_on="station_code", right_on="ID"
     )
-    merged_df_with_missing = merged_df_with_missing[
-        [
-            "station_code",
-            "station_name",
-            "year",
-            "month",
-            "day",
-            "24h_precipitation_mm",
-            "precip_type",
-            "snow_cover_cm",
-            "ID",
-            "river",
-            "lat",
-            "lon",
-            "altitude",
-        ]
-    ]
     missing_stations = merged_df_with_missing[merged_df_with_missing["ID"].isnull()]
     missing_stations_unique = (
         missing_stations[["station_name", "station_code"]]
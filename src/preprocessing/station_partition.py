@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+
+@dataclass
+class StationPartition:
+    """Index of rows of precipitation data partitioned by stations. It's built once with one pass over the data,
+    so rows of any station are selected without filtering the whole data.
+
+    Attributes:
+        station_idx (np.ndarray): Position of the station of every row in station_names
+        order (np.ndarray): Positions of rows sorted by stations (in the original order within a station)
+        offsets (np.ndarray): Start of rows of every station in order (and the end of the last station)
+        station_names (np.ndarray): Names of stations in order of appearance in the data
+    """
+
+    station_idx: np.ndarray
+    order: np.ndarray
+    offsets: np.ndarray
+    station_names: np.ndarray
+
+    @property
+    def n_stations(self) -> int:
+        return len(self.station_names)
+
+    def station_position(self, station_name: str) -> int:
+        """Function returning position of the station in station_names
+
+        Args:
+            station_name (str): Name of the station
+
+        Returns:
+            int: Position of the station
+        """
+        positions = np.flatnonzero(self.station_names == station_name)
+        if len(positions) == 0:
+            raise KeyError(f"There is no {station_name} station in the data")
+        return positions[0]
+
+    def rows(self, station_name: str) -> np.ndarray:
+        """Function returning positions of rows of the station
+
+        Args:
+            station_name (str): Name of the station
+
+        Returns:
+            np.ndarray: Positions of rows
+        """
+        i = self.station_position(station_name)
+        return self.order[self.offsets[i] : self.offsets[i + 1]]
+
+    def first_rows(self) -> np.ndarray:
+        """Function returning position of the first row of every station
+
+        Returns:
+            np.ndarray: Positions of rows
+        """
+        return self.order[self.offsets[:-1]]
+
+    def station_data(self, df: pd.DataFrame, station_name: str) -> pd.DataFrame:
+        """Function selecting rows of the station from the data the partition was built from
+
+        Args:
+            df (pd.DataFrame): Precipitation data
+            station_name (str): Name of the station
+
+        Returns:
+            pd.DataFrame: Data of the station
+        """
+        return df.iloc[self.rows(station_name)]
+
+    def station_values(self, df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        """Function selecting values of columns which are constant for a station (e.g. coordinates)
+
+        Args:
+            df (pd.DataFrame): Precipitation data
+            columns (list[str]): Names of columns
+
+        Returns:
+            pd.DataFrame: Values from the first row of every station with station names as index
+        """
+        values = df[columns].iloc[self.first_rows()]
+        values.index = pd.Index(self.station_names, name="station_name")
+        return values
+
+    def count_by(self, keys: np.ndarray, mask: np.ndarray = None) -> pd.DataFrame:
+        """Function counting rows of every station by other key (e.g. year)
+
+        Args:
+            keys (np.ndarray): Key of every row
+            mask (np.ndarray, optional): Mask of rows to count. Defaults to None (all rows).
+
+        Returns:
+            pd.DataFrame: Counts with keys as index and station names as columns
+                          (rows with missing key are not counted)
+        """
+        key_idx, key_values = pd.factorize(keys, sort=True)
+        # Missing keys are factorized to -1
+        counted = key_idx >= 0
+        if mask is not None:
+            counted &= np.asarray(mask, dtype=bool)
+
+        counts = np.zeros((len(key_values), self.n_stations), dtype=int)
+        np.add.at(counts, (key_idx[counted], self.station_idx[counted]), 1)
+        return pd.DataFrame(counts, index=key_values, columns=self.station_names)
+
+
+def get_station_partition(df: pd.DataFrame) -> StationPartition:
+    """Function for building the partition of precipitation data by stations
+
+    Args:
+        df (pd.DataFrame): Precipitation data with station_name column
+
+    Returns:
+        StationPartition: Partition of rows by stations
+    """
+    station_idx, station_names = pd.factorize(df["station_name"])
+    if (station_idx < 0).any():
+        raise ValueError(
+            f"Station name is missing in {(station_idx < 0).sum()} rows of precipitation data"
+        )
+    order = np.argsort(station_idx, kind="stable")
+    offsets = np.r_[
+        0, np.cumsum(np.bincount(station_idx, minlength=len(station_names)))
+    ]
+    return StationPartition(
+        station_idx=station_idx,
+        order=order,
+        offsets=offsets,
+        station_names=np.asarray(station_names, dtype=str),
+    )
@@ -1,3 +1,112 @@
+import numpy as np
+import pandas as pd
+
+
+def get_SPI_schemes() -> dict:
+    """Function for getting schemes of SPI classes selectable by name. Every scheme consists of
+    bin edges (ascending) and labels of classes from the driest one (one more than edges).
+
+    Returns:
+        dict: Dictionary with name of the scheme as key and tuple of edges and labels as value
+    """
+    schemes = {
+        # WMO (2012) Standardized Precipitation Index User Guide
+        "WMO": (
+            [-2.0, -1.5, -1.0, 1.0, 1.5, 2.0],
+            [
+                "Extreme drought",
+                "Severe drought",
+                "Moderate drought",
+                "Moderate conditions",
+                "Moderately wet",
+                "Very wet",
+                "Extremely wet",
+            ],
+        ),
+        # McKee et al. (1993), drought categories only
+        "McKee": (
+            [-2.0, -1.5, -1.0, 0.0],
+            [
+                "Extreme drought",
+                "Severe drought",
+                "Moderate drought",
+                "Mild drought",
+                "No drought",
+            ],
+        ),
+    }
+    return schemes
+
+
+def get_SPI_scheme(scheme: str | tuple = "WMO") -> tuple[np.ndarray, list[str]]:
+    """Function returning bin edges and labels of the scheme of SPI classes
+
+    Args:
+        scheme (str | tuple, optional): Name of the scheme from get_SPI_schemes or custom scheme
+                                        as tuple of ascending edges and labels. Defaults to "WMO".
+
+    Returns:
+        tuple[np.ndarray, list[str]]: Bin edges and labels of classes
+    """
+    if isinstance(scheme, str):
+        schemes = get_SPI_schemes()
+        if scheme not in schemes:
+            raise ValueError(
+                f"Unknown SPI scheme {scheme}. You can choose among: {', '.join(schemes)}"
+            )
+        scheme = schemes[scheme]
+
+    edges, labels = np.asarray(scheme[0], dtype=float), list(scheme[1])
+    if len(labels) != len(edges) + 1 or np.any(np.diff(edges) <= 0):
+        raise ValueError(
+            "SPI scheme needs ascending edges and one label more than edges"
+        )
+    return edges, labels
+
+
+def classify_SPI(
+    SPI: pd.Series | pd.DataFrame | np.ndarray, scheme: str | tuple = "WMO"
+) -> pd.Series | pd.DataFrame | pd.Categorical:
+    """Function assigning precipitation conditions to SPI values at once. Bins are contiguous and edges
+    belong to the class further from zero (e.g. -1.0 is Moderate drought and 1.0 is Moderately wet in WMO scheme).
+
+    Args:
+        SPI (pd.Series | pd.DataFrame | np.ndarray): SPI values (e.g. all windows of all stations as columns)
+        scheme (str | tuple, optional): Name of the scheme from get_SPI_schemes or custom scheme
+                                        as tuple of ascending edges and labels. Defaults to "WMO".
+
+    Returns:
+        pd.Series | pd.DataFrame | pd.Categorical: Ordered categorical classes (from the driest one)
+                                                   of the same shape as SPI (NaN for missing SPI)
+    """
+    edges, labels = get_SPI_scheme(scheme)
+    dtype = pd.CategoricalDtype(labels, ordered=True)
+
+    values = np.asarray(SPI, dtype=float)
+    codes = np.where(
+        values >= 0,
+        np.digitize(values, edges),
+        np.digitize(values, edges, right=True),
+    )
+    codes[np.isnan(values)] = -1
+
+    if isinstance(SPI, pd.DataFrame):
+        return pd.DataFrame(
+            {
+                column: pd.Categorical.from_codes(codes[:, i], dtype=dtype)
+                for i, column in enumerate(SPI.columns)
+            },
+            index=SPI.index,
+        )
+    if isinstance(SPI, pd.Series):
+        return pd.Series(
+            pd.Categorical.from_codes(codes, dtype=dtype),
+            index=SPI.index,
+            name=SPI.name,
+        )
+    return pd.Categorical.from_codes(codes.ravel(), dtype=dtype)
+
+
 def map_to_range(value: float) -> str:
     """Mapping float values to precipitation conditions range.
 
@@ -7,18 +116,5 @@ def map_to_range(value: float) -> str:
     Returns:
         str: Precipitation condition assigned based on range.
     """
-
-    SPI_ranges = {
-        "Extremely wet": (2.0, float("inf")),
-        "Very wet": (1.5, 1.99),
-        "Moderately wet": (1.0, 1.49),
-        "Moderate conditions": (-0.99, 0.99),
-        "Moderate drought": (-1.49, -1.0),
-        "Severe drought": (-1.99, -1.5),
-        "Extreme drought": (-float("inf"), -2.0),
-    }
-
-    for range_name, (lower_bound, upper_bound) in SPI_ranges.items():
-        if lower_bound <= value <= upper_bound:
-            return f"{range_name}"
-    return "Wrong range"
+    condition = classify_SPI(np.array([value]))[0]
+    return "Wrong range" if pd.isna(condition) else condition
@@ -2,26 +2,72 @@ import pandas as pd
 import geopandas as gpd
 
 
-def save_df(df: pd.DataFrame, name: str, directory: str, message=None) -> None:
+def save_df(
+    df: pd.DataFrame,
+    name: str,
+    directory: str,
+    message=None,
+    partition_cols=None,
+    schema=None,
+    basename_template=None,
+) -> None:
     """
-    Function for saving DataFrame to .csv file in the given directory with given name
+    Function for saving DataFrame to .csv file (or .parquet file if the name ends with '.parquet')
+    in the given directory with given name
 
         Args:
             df (pd.DataFrame): DataFrame to be saved
             name (str): Name of file
             directory (str): Name of the directory where the file is being saved
             message (str): Message to be printed
+            partition_cols (list[str]): Columns to partition .parquet dataset by. Partitions present in df
+                                        replace the existing ones, the index is not saved and files are
+                                        written in row groups of 50 000 rows. Defaults to None.
+            schema (pa.Schema): Schema of .parquet file. Defaults to None (inferred from df).
+            basename_template (str): Template of partitioned .parquet file names, e.g. '1991-{i}.parquet'.
+                                     If given, only files with the same names are replaced instead
+                                     of whole partitions. Defaults to None.
 
         Returns:
             None
     """
-    df.to_csv(directory + "/" + name, encoding="utf-8")
+    if not name.endswith(".parquet"):
+        df.to_csv(directory + "/" + name, encoding="utf-8")
+    elif partition_cols is None:
+        df.to_parquet(directory + "/" + name, schema=schema)
+    else:
+        df.to_parquet(
+            directory + "/" + name,
+            schema=schema,
+            index=False,
+            partition_cols=partition_cols,
+            basename_template=basename_template,
+            existing_data_behavior=(
+                "delete_matching"
+                if basename_template is None
+                else "overwrite_or_ignore"
+            ),
+            row_group_size=50_000,
+        )
     if message is None:
         print(f"{name} saved in {directory}/")
     else:
         print(message)
 
 
+def get_memory_usage(df: pd.DataFrame) -> float:
+    """
+    Function for calculating memory usage of DataFrame (including contents of object columns)
+
+        Args:
+            df (pd.DataFrame): DataFrame
+
+        Returns:
+            float: Memory usage in megabytes
+    """
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
 def dms_to_dd(coord: str) -> float:
     """
     Function to convert dms to dd
@@ -37,6 +83,21 @@ def dms_to_dd(coord: str) -> float:
     return dd
 
 
+def dms_to_dd_vectorized(coords: pd.Series) -> pd.Series:
+    """
+    Function to convert whole column of dms coordinates to dd (gives the same values as dms_to_dd)
+
+        Args:
+            coords (pd.Series): Coordinates in dms (degrees minutes seconds) format
+
+        Returns:
+            dd (pd.Series): Coordinates in dd format
+    """
+    parts = coords.str.split(expand=True).astype(float)
+    dd = parts[0] + parts[1] / 60 + parts[2] / (60 * 60)
+    return dd
+
+
 def save_gdf(
     gdf: gpd.GeoDataFrame, name: str, iname: str, directory: str, message=None
 ) -> None:
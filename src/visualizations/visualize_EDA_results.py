@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from src.utils.utils import map_column_names
+from src.preprocessing.station_partition import StationPartition
 
 
 def visualize_pairplot(df: pd.DataFrame, voi: str) -> None:
@@ -97,7 +98,7 @@ def visualize_correlations(df: pd.DataFrame, voi: str) -> None:
     Returns:
         None
     """
-    numeric_columns = df.select_dtypes(include=["float64", "int64"])
+    numeric_columns = df.select_dtypes(include="number")
     numeric_columns = numeric_columns[
         numeric_columns.columns.difference(["station_code"])
     ]
@@ -161,7 +162,9 @@ def visualize_monthly_data(df: pd.DataFrame, voi: str) -> None:
     )
 
 
-def visualize_with_hue(df: pd.DataFrame, voi: str, hue_column: str) -> None:
+def visualize_with_hue(
+    df: pd.DataFrame, voi: str, hue_column: str, partition: StationPartition = None
+) -> None:
     """
     Function to generate boxplot and time series plots with the specified hue column
     as a grouping variable. It saves the generated plots to files named
@@ -172,17 +175,23 @@ def visualize_with_hue(df: pd.DataFrame, voi: str, hue_column: str) -> None:
         df (pd.DataFrame): Input DataFrame.
         voi (str): Name of the voivodeship.
         hue_column (str): Name of the column to use as hue.
+        partition (StationPartition, optional): Partition of df by stations, used for station_name hue
+                                                instead of searching the data for stations. Defaults to None.
 
     Returns:
         None
     """
     col = ["24h_precipitation_mm"]
-    x_ticks = [x for x in df[hue_column].unique()]
+    if hue_column == "station_name" and partition is not None:
+        x_ticks = partition.station_names.tolist()
+    else:
+        # Seaborn skips missing values (e.g. stations without a river), so they are not ticks
+        x_ticks = [x for x in df[hue_column].dropna().unique()]
 
     df = df[~df.index.duplicated(keep="first")]
 
     fig, ax = plt.subplots(1, 1, figsize=(12, 10))
-    sns.boxplot(data=df, y=col[0], x=hue_column, ax=ax)
+    sns.boxplot(data=df, y=col[0], x=hue_column, order=x_ticks, ax=ax)
 
     if hue_column == "precip_type":
         h_col = "Precipitation type"
@@ -221,7 +230,9 @@ def visualize_with_hue(df: pd.DataFrame, voi: str, hue_column: str) -> None:
         )
 
 
-def visualize_EDA(df: pd.DataFrame, voi: str) -> None:
+def visualize_EDA(
+    df: pd.DataFrame, voi: str, partition: StationPartition = None
+) -> None:
     """
     Function to generate a set of EDA plots including pairplot, distributions, boxplots,
     correlations, monthly aggregated time series, and time series with hue. It saves the generated
@@ -230,6 +241,7 @@ def visualize_EDA(df: pd.DataFrame, voi: str) -> None:
     Args:
         df (pd.DataFrame): Input DataFrame.
         voi (str): Name of the voivodeship.
+        partition (StationPartition, optional): Partition of df by stations. Defaults to None.
 
     Returns:
         None
@@ -239,6 +251,6 @@ def visualize_EDA(df: pd.DataFrame, voi: str) -> None:
     visualize_boxplots(df, voi)
     visualize_correlations(df, voi)
     visualize_monthly_data(df, voi)
-    visualize_with_hue(df, voi, "station_name")
+    visualize_with_hue(df, voi, "station_name", partition)
     visualize_with_hue(df, voi, "river")
     visualize_with_hue(df, voi, "precip_type")
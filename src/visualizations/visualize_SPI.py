@@ -3,7 +3,7 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from shapely.geometry import Point
-from src.utils.SPI_utils import map_to_range
+from src.utils.SPI_utils import classify_SPI
 
 
 def visualize_SPI(
@@ -24,9 +24,9 @@ def visualize_SPI(
         station_name (str): Name of the measuring station. Defaults to None.
     """
 
-    SPI_1["State"] = SPI_1["SPI"].map(map_to_range)
-    SPI_3["State"] = SPI_3["SPI"].map(map_to_range)
-    SPI_12["State"] = SPI_12["SPI"].map(map_to_range)
+    SPI_1["State"] = classify_SPI(SPI_1["SPI"])
+    SPI_3["State"] = classify_SPI(SPI_3["SPI"])
+    SPI_12["State"] = classify_SPI(SPI_12["SPI"])
     SPI_dict = {"SPI_1": SPI_1, "SPI_3": SPI_3, "SPI_12": SPI_12}
 
     color_palette = {
@@ -216,9 +216,9 @@ def voi_SPI_map(
         crs="EPSG:4326",
     )
 
-    gdf["SPI_1_State"] = gdf["SPI_1"].map(map_to_range)
-    gdf["SPI_3_State"] = gdf["SPI_3"].map(map_to_range)
-    gdf["SPI_12_State"] = gdf["SPI_12"].map(map_to_range)
+    states = classify_SPI(gdf[["SPI_1", "SPI_3", "SPI_12"]])
+    for column in states.columns:
+        gdf[f"{column}_State"] = states[column]
 
     fig, ax = plt.subplots(1, 3, figsize=(30, 10))
 
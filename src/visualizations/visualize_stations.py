@@ -2,25 +2,6 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 
 
-def get_voivodeship_names() -> list:
-    """Function to fetch and return a list of voivodeship names with spaces and
-       dashes removed.
-
-    Returns:
-        list: A list containing unique names of voivodeships.
-    """
-    geojson = gpd.read_file(
-        "https://simplemaps.com/static/svg/country/pl/admin1/pl.json"
-    )
-    geojson["name"] = (
-        geojson["name"]
-        .apply(lambda x: x.replace(" ", ""))
-        .apply(lambda x: x.replace("-", ""))
-    )
-    voivodeships = geojson["name"].unique().tolist()
-    return voivodeships
-
-
 def visualize_stations(
     voi_polygon: gpd.GeoSeries, voi_gdf: gpd.GeoDataFrame, voi: str
 ) -> None:
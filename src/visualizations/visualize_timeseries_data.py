@@ -1,40 +1,65 @@
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from src.preprocessing.station_partition import (
+    StationPartition,
+    get_station_partition,
+)
 
 
-def prepare_visualization_dataset(merged_df: pd.DataFrame) -> pd.DataFrame:
+def prepare_visualization_dataset(
+    merged_df: pd.DataFrame, partition: StationPartition = None
+) -> pd.DataFrame:
     """Function counting number of available months per station per each year
 
     Args:
         merged_df (pd.DataFrame): DataFrame containing precipitation data merged
                                   with stations' details from one voivodeship
+        partition (StationPartition, optional): Partition of merged_df by stations.
+                                                Defaults to None (built from merged_df).
 
     Returns:
         pd.DataFrame: Pandas DataFrame with columns containing: years, station
                       name and number of available months (0-12)
     """
-    pivot_table = merged_df.pivot_table(
-        index="year", columns="station_name", aggfunc="count"
-    )["24h_precipitation_mm"].fillna(0)
+    if partition is None:
+        partition = get_station_partition(merged_df)
 
-    pivot_table_normalized = pivot_table.map(
-        lambda x: int(min(x / 12, 12))
-    ).reset_index()
+    counts = partition.count_by(
+        merged_df["year"].to_numpy(),
+        merged_df["24h_precipitation_mm"].notna().to_numpy(),
+    )
+
+    # Stations are ordered as in the pivot table (by categories or names)
+    station_name = merged_df["station_name"]
+    if isinstance(station_name.dtype, pd.CategoricalDtype):
+        order = np.argsort(
+            station_name.cat.categories.get_indexer(counts.columns), kind="stable"
+        )
+    else:
+        order = np.argsort(counts.columns.to_numpy(), kind="stable")
+    counts = counts.iloc[:, order].rename_axis(index="year", columns="station_name")
+
+    counts_normalized = (counts // 12).clip(upper=12).reset_index()
 
-    return pivot_table_normalized.melt(id_vars=["year"], value_name="no_months")
+    return counts_normalized.melt(id_vars=["year"], value_name="no_months")
 
 
-def visualize_available_voi_data(voi_precip: gpd.GeoDataFrame, voi: str) -> None:
+def visualize_available_voi_data(
+    voi_precip: gpd.GeoDataFrame, voi: str, partition: StationPartition = None
+) -> None:
     """Visualization of data availability over time for the chosen voivodeship
 
     Args:
         voi_precip (gpd.GeoDataFrame): Precip data clipped to the voivodeship
         voi (str): Voivodeship name
+        partition (StationPartition, optional): Partition of voi_precip by stations.
+                                                Defaults to None (built from voi_precip).
     """
 
-    data_to_visualize = prepare_visualization_dataset(voi_precip)
+    data_to_visualize = prepare_visualization_dataset(voi_precip, partition)
     sns.set_style("darkgrid")
 
     fig, ax = plt.subplots(1, 1, figsize=(15, 8))
@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import time
+import zipfile
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LocalServer:
+    """Local HTTP stand-in of the IMGW website. Files are served from the files dictionary,
+    failures are injected with the failures dictionary (number of 503 responses before the file
+    is served) and requests are counted per path.
+
+    Attributes:
+        url (str): Base url of the server
+        files (dict): Dictionary with path as key and tuple of content and headers as value
+        failures (dict): Dictionary with path as key and number of 503 responses as value
+        requests (dict): Dictionary with path as key and number of requests as value
+        delay (float): Delay of every response in seconds
+        in_flight (int): Number of requests being served
+        max_in_flight (int): Maximum number of requests served at the same time
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.files = dict()
+        self.failures = dict()
+        self.requests = dict()
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(server: LocalServer) -> type:
+    """Function creating request handler serving files of the local server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with server.lock:
+                server.requests[self.path] = server.requests.get(self.path, 0) + 1
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            try:
+                time.sleep(server.delay)
+                self.respond()
+            finally:
+                with server.lock:
+                    server.in_flight -= 1
+
+        def respond(self):
+            if server.failures.get(self.path, 0) > 0:
+                server.failures[self.path] -= 1
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path not in server.files:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            content, headers = server.files[self.path]
+            etag = headers.get("ETag")
+            if etag is not None and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def local_server():
+    """Fixture running LocalServer on a free port of localhost"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), None)
+    server = LocalServer(f"http://127.0.0.1:{httpd.server_address[1]}")
+    httpd.RequestHandlerClass = make_handler(server)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_archive(year: int, station_code: int = 249000000) -> bytes:
+    """Function creating zip archive with one day of precipitation in the format of IMGW archives"""
+    row = f'{station_code},"ST0",{year},1,1,1.5,,"W",0,,,8,,8,,8\n'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f"o_d_{year}.csv", row.encode("cp1250"))
+    return buffer.getvalue()
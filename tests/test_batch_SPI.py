@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.calculations.calculate_SPI import get_SPI
+from src.calculations.batch_SPI import (
+    rolling_sums,
+    get_stations_SPI,
+    split_stations_SPI,
+)
+from src.preprocessing.precip_cube import build_precip_cube
+
+pytestmark = pytest.mark.filterwarnings("ignore:Mean of empty slice")
+
+
+@pytest.fixture
+def preprocessed():
+    """Fixture with daily precipitation of stations with different periods: A (1991-2000, with a dry month),
+    B (from the middle of April 1993 to the middle of August 1999) and C (7 months of 1998)
+    """
+    rng = np.random.default_rng(0)
+    periods = {
+        "A": ("1991-01-01", "2000-12-31"),
+        "B": ("1993-04-15", "1999-08-10"),
+        "C": ("1998-03-01", "1998-09-30"),
+    }
+    stations = []
+    for code, (name, (start, end)) in enumerate(periods.items()):
+        dates = pd.date_range(start, end, freq="D", name="date")
+        precip = np.where(rng.random(len(dates)) < 0.5, 0, rng.gamma(0.8, 5))
+        stations.append(
+            pd.DataFrame(
+                {
+                    "station_code": 249000000 + code,
+                    "station_name": name,
+                    "24h_precipitation_mm": precip.round(1).astype("float32"),
+                    "lat": 52.0,
+                    "lon": 15.0,
+                    "altitude": 100.0,
+                },
+                index=dates,
+            )
+        )
+    df = pd.concat(stations)
+    df.loc[(df.index.year == 1995) & (df.index.month == 7), "24h_precipitation_mm"] = 0
+    return df
+
+
+def test_rolling_sums():
+    matrix = np.array([[1.0, 2.0, 3.0, 4.0], [np.nan, 1.0, np.nan, 2.0]])
+
+    np.testing.assert_array_equal(
+        rolling_sums(matrix, 2),
+        [[np.nan, 3.0, 5.0, 7.0], [np.nan, np.nan, np.nan, np.nan]],
+    )
+    # Window longer than the record
+    assert np.isnan(rolling_sums(matrix, 5)).all()
+
+
+def test_batch_SPI_matches_SPI_of_every_station(preprocessed):
+    SPIs = split_stations_SPI(get_stations_SPI(build_precip_cube(preprocessed)))
+
+    # C has less than 12 months, so its SPI-12 can't be calculated
+    assert list(SPIs) == ["A", "B"]
+    for station_name, station_SPIs in SPIs.items():
+        station = preprocessed[preprocessed["station_name"] == station_name]
+        expected = get_SPI(station[["24h_precipitation_mm"]], "Test", save=False)
+        for SPI, expected_SPI in zip(station_SPIs, expected):
+            pd.testing.assert_frame_equal(
+                SPI, expected_SPI, check_index_type=False, check_freq=False, atol=1e-5
+            )
+    assert (
+        get_SPI(
+            preprocessed.loc[
+                preprocessed["station_name"] == "C", ["24h_precipitation_mm"]
+            ],
+            "Test",
+            save=False,
+        )
+        is None
+    )
+
+
+def test_stations_SPI_covers_station_periods(preprocessed):
+    stations_SPI = get_stations_SPI(build_precip_cube(preprocessed), windows=[3])
+
+    periods = stations_SPI.groupby("station_name")["date"].agg(["min", "max"])
+    assert periods.loc["B"].tolist() == [
+        pd.Timestamp("1993-04-30"),
+        pd.Timestamp("1999-08-31"),
+    ]
+    # SPI-3 of the first 2 months of every station is not available
+    first_SPI = stations_SPI.dropna().groupby("station_name")["date"].min()
+    assert first_SPI["B"] == pd.Timestamp("1993-06-30")
+    assert (
+        stations_SPI.loc[stations_SPI["station_name"] == "C", "SPI_3"].notna().sum()
+        == 5
+    )
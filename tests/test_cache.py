@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from conftest import make_archive
+from src.data_ingestion.cache import (
+    fetch_cached,
+    get_cached,
+    put_cached,
+    load_cache_index,
+    get_index_path,
+)
+from src.data_ingestion.download_precipitations import (
+    download_archive,
+    get_colnames,
+)
+
+
+def test_fetch_cached_revalidates_hit(local_server, tmp_path):
+    cache_dir = str(tmp_path)
+    url = local_server.url + "/Opis.txt"
+    local_server.files["/Opis.txt"] = (b"v1", {"ETag": '"v1"'})
+
+    assert fetch_cached(url, backoff=0, cache_dir=cache_dir)[0] == b"v1"
+    # Unchanged file is answered with 304 and served from the cache
+    assert fetch_cached(url, backoff=0, cache_dir=cache_dir)[0] == b"v1"
+    assert local_server.requests["/Opis.txt"] == 2
+
+    local_server.files["/Opis.txt"] = (b"v2", {"ETag": '"v2"'})
+    assert fetch_cached(url, backoff=0, cache_dir=cache_dir)[0] == b"v2"
+    assert get_cached(url, cache_dir)[0] == b"v2"
+
+
+def test_fetch_cached_offline_serves_without_request(local_server, tmp_path):
+    cache_dir = str(tmp_path)
+    url = local_server.url + "/Opis.txt"
+    put_cached(url, b"v1", {}, cache_dir)
+
+    assert fetch_cached(url, offline=True, cache_dir=cache_dir)[0] == b"v1"
+    assert "/Opis.txt" not in local_server.requests
+
+
+def test_get_cached_does_not_rewrite_index(tmp_path):
+    cache_dir = str(tmp_path)
+    put_cached("http://example.com/a", b"a", {}, cache_dir)
+    mtime = os.stat(get_index_path(cache_dir)).st_mtime_ns
+
+    assert get_cached("http://example.com/a", cache_dir)[0] == b"a"
+    assert os.stat(get_index_path(cache_dir)).st_mtime_ns == mtime
+
+
+def test_corrupted_archive_is_not_cached(local_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = local_server.url + "/1991_o.zip"
+    archive = make_archive(1991)
+    local_server.files["/1991_o.zip"] = (archive[: len(archive) // 2], {})
+
+    assert download_archive(url, get_colnames(), backoff=0) == (None, None)
+    assert get_cached(url) is None
+
+    local_server.files["/1991_o.zip"] = (archive, {})
+    precip, entry = download_archive(url, get_colnames(), backoff=0)
+    assert len(precip) == entry["rows"] == 1
+    assert get_cached(url)[0] == archive
+
+
+def put_urls(cache_dir: str, worker: int) -> None:
+    for i in range(10):
+        put_cached(
+            f"http://example.com/{worker}/{i}", f"{worker}-{i}".encode(), {}, cache_dir
+        )
+
+
+def test_put_cached_from_many_processes(tmp_path):
+    cache_dir = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(put_urls, [cache_dir] * 4, range(4)))
+
+    assert len(load_cache_index(cache_dir)) == 40
@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.calculations import calendar_SPI
+from src.calculations.calendar_SPI import get_stations_calendar_SPI
+from src.preprocessing.precip_cube import build_precip_cube
+
+REFERENCE = (1991, 2000)
+
+
+@pytest.fixture
+def preprocessed(tmp_path, monkeypatch):
+    """Fixture with daily precipitation of two stations from 1991-2003 in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("1991-01-01", "2003-12-31", freq="D", name="date")
+    return pd.concat(
+        pd.DataFrame(
+            {
+                "station_code": 249000000 + code,
+                "station_name": name,
+                "24h_precipitation_mm": np.where(
+                    rng.random(len(dates)) < 0.5, 0, rng.gamma(0.8, 5, len(dates))
+                )
+                .round(1)
+                .astype("float32"),
+                "lat": 52.0,
+                "lon": 15.0,
+                "altitude": 100.0,
+            },
+            index=dates,
+        )
+        for code, name in enumerate(["A", "B"])
+    )
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Fixture counting calls of fit_calendar_parameters"""
+    calls = []
+    fit = calendar_SPI.fit_calendar_parameters
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return fit(*args, **kwargs)
+
+    monkeypatch.setattr(calendar_SPI, "fit_calendar_parameters", counted)
+    return calls
+
+
+def get_SPI(df: pd.DataFrame, refit: bool = False) -> pd.DataFrame:
+    return get_stations_calendar_SPI(
+        build_precip_cube(df), "Test", reference=REFERENCE, refit=refit
+    )
+
+
+def test_saved_parameters_are_reused(preprocessed, fits):
+    expected = get_SPI(preprocessed)
+    assert len(fits) == 3
+    modified = os.path.getmtime("data/Test_SPI_parameters.parquet")
+
+    SPI = get_SPI(preprocessed)
+
+    assert len(fits) == 3
+    assert os.path.getmtime("data/Test_SPI_parameters.parquet") == modified
+    pd.testing.assert_frame_equal(SPI, expected)
+
+
+def test_changed_reference_month_is_fitted_again(preprocessed, fits):
+    get_SPI(preprocessed)
+    changed = preprocessed.copy()
+    changed.loc[
+        (changed.index == "1995-07-10") & (changed["station_name"] == "B"),
+        "24h_precipitation_mm",
+    ] += 20
+
+    SPI = get_SPI(changed)
+
+    assert len(fits) == 6
+    pd.testing.assert_frame_equal(SPI, get_SPI(changed, refit=True))
+
+
+def test_months_appended_after_reference_are_not_fitted(preprocessed, fits):
+    get_SPI(preprocessed[preprocessed.index.year <= 2001])
+
+    SPI = get_SPI(preprocessed)
+
+    assert len(fits) == 3
+    pd.testing.assert_frame_equal(SPI, get_SPI(preprocessed, refit=True))
+    assert SPI["date"].max() == pd.Timestamp("2003-12-31")
+    assert SPI.loc[SPI["date"].dt.year == 2003, "SPI_12"].notna().all()
@@ -0,0 +1,35 @@
+import geopandas as gpd
+from shapely.geometry import Polygon
+from src.data_ingestion.download_borders import (
+    load_voivodeship_borders,
+    get_voivodeship_names,
+)
+
+
+def save_borders(path, names):
+    gpd.GeoDataFrame(
+        {"name": names},
+        geometry=[
+            Polygon([(i, 0), (i + 1, 0), (i + 1, 1), (i, 1)]) for i in range(len(names))
+        ],
+        crs="EPSG:4326",
+    ).to_file(path, driver="GeoJSON")
+
+
+def test_borders_are_cached_once_for_equal_arguments(tmp_path):
+    path = tmp_path / "pl.json"
+    save_borders(path, ["Lesser Poland"])
+
+    borders = load_voivodeship_borders(False, str(path))
+    assert load_voivodeship_borders(offline=False, path=str(path)) is borders
+    assert borders["name"].tolist() == ["LesserPoland"]
+
+
+def test_given_path_is_read(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_borders(tmp_path / "a.json", ["Lubusz"])
+    save_borders(tmp_path / "b.json", ["Kuyavian-Pomeranian", "Masovian"])
+
+    assert get_voivodeship_names(path="a.json") == ["Lubusz"]
+    assert get_voivodeship_names(path="b.json") == ["KuyavianPomeranian", "Masovian"]
+    assert not (tmp_path / "data" / "voivodeship_borders.parquet").exists()
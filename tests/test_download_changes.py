@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from src.data_ingestion.download_changes import create_station_dict
+
+
+def test_create_station_dict():
+    descriptions = np.array(
+        [
+            "Stacja BIAŁOWIEŻA, do 2005 roku stacja BIAŁOWIEŻA-PARK, kod 252230120",
+            "Stacja ŁEBA stacja ŁEBA-LATARNIA",
+            "",
+            None,
+        ],
+        dtype=object,
+    )
+
+    assert create_station_dict(descriptions) == {
+        "BIAŁOWIEŻA-PARK": "BIAŁOWIEŻA",
+        "ŁEBA-LATARNIA": "ŁEBA",
+    }
+
+
+def test_unmatched_description_is_rejected():
+    descriptions = np.array(
+        [
+            "Stacja ŁEBA stacja ŁEBA-LATARNIA",
+            "Stacja BIAŁOWIEŻA zmieniła nazwę z BIAŁOWIEŻA-PARK",
+        ],
+        dtype=object,
+    )
+
+    with pytest.raises(ValueError, match="1 station changes descriptions"):
+        create_station_dict(descriptions)
@@ -0,0 +1,108 @@
+import os
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+from conftest import make_archive
+from src.data_ingestion import download_precipitations
+from src.data_ingestion.manifest import load_manifest, get_content_hash
+from src.data_ingestion.download_precipitations import (
+    download_precip_data,
+    sync_precip_data,
+    read_precip_data,
+    get_urls,
+    compact_precip_data,
+)
+
+
+@pytest.fixture
+def archives(local_server, tmp_path, monkeypatch):
+    """Fixture serving archives of 1991-1993 from the local server in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    monkeypatch.setattr(
+        download_precipitations, "download_changes_data", lambda offline: {}
+    )
+    for year in range(1991, 1994):
+        local_server.files[f"/{year}_o.zip"] = (make_archive(year), {})
+    return [f"{local_server.url}/{year}_o.zip" for year in range(1991, 1994)]
+
+
+def test_download_precip_data(archives):
+    download_precip_data(max_workers=2, urls=archives, backoff=0)
+
+    assert sorted(read_precip_data()["year"]) == [1991, 1992, 1993]
+    assert sorted(load_manifest()) == archives
+    assert not os.path.exists("data/precipitation_data.building.parquet")
+
+
+def test_failed_download_keeps_previous_data(archives, local_server):
+    download_precip_data(max_workers=2, urls=archives[:1], backoff=0)
+    del local_server.files["/1993_o.zip"]
+
+    with pytest.raises(requests.HTTPError):
+        download_precip_data(max_workers=2, urls=archives, backoff=0)
+
+    assert sorted(read_precip_data()["year"]) == [1991]
+    assert sorted(load_manifest()) == archives[:1]
+
+
+def test_failed_first_download_leaves_no_data(archives, local_server):
+    del local_server.files["/1993_o.zip"]
+
+    with pytest.raises(requests.HTTPError):
+        download_precip_data(max_workers=2, urls=archives, backoff=0)
+
+    assert not os.path.exists("data/precipitation_data.parquet")
+    assert load_manifest() == {}
+
+
+def test_failed_sync_keeps_entries_of_synced_archives(archives, local_server):
+    download_precip_data(max_workers=2, urls=archives[:2], backoff=0)
+    local_server.files["/1991_o.zip"] = (make_archive(1991, 249000001), {})
+
+    with pytest.raises(requests.HTTPError):
+        del local_server.files["/1993_o.zip"]
+        sync_precip_data(max_workers=1, urls=archives, backoff=0)
+
+    manifest = load_manifest()
+    assert manifest[archives[0]]["content_hash"] == get_content_hash(
+        local_server.files["/1991_o.zip"][0]
+    )
+    assert sorted(read_precip_data()["station_code"]) == [249000000, 249000001]
+
+
+def test_get_urls_reach_current_year():
+    year = datetime.date.today().year
+    urls = get_urls("https://example.com/")
+
+    assert urls[0] == "https://example.com/1991_1995/1991_o.zip"
+    assert urls[-1] == f"https://example.com/{year}/{year}_12_o.zip"
+
+
+def test_sync_picks_up_new_archives(archives, local_server, monkeypatch):
+    download_precip_data(max_workers=2, urls=archives[:2], backoff=0)
+    # Month of the current year which is not published yet
+    year = datetime.date.today().year
+    unpublished = f"{local_server.url}/{year}_12_o.zip"
+    monkeypatch.setattr(
+        download_precipitations, "get_urls", lambda: archives + [unpublished]
+    )
+
+    sync_precip_data(max_workers=2, backoff=0)
+
+    assert sorted(read_precip_data()["year"]) == [1991, 1992, 1993]
+    assert sorted(load_manifest()) == archives
+    assert local_server.requests[f"/{year}_12_o.zip"] == 1
+
+
+def test_compact_precip_data_relabels_numeric_categories():
+    precipitation = pd.DataFrame(
+        {"station_name": ["A", "B", "A"], "snow_type_code": [1.0, np.nan, 3.0]}
+    )
+
+    compacted = compact_precip_data(precipitation)
+
+    assert compacted["snow_type_code"].tolist() == ["1.0", np.nan, "3.0"]
+    assert compacted["station_name"].tolist() == ["A", "B", "A"]
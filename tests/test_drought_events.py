@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.calculations.drought_events import find_runs, get_drought_events
+
+
+@pytest.fixture
+def stations_SPI():
+    """Fixture with SPI-1 of two stations: A has runs at the start and at the end of the series,
+    a single month run, a month exactly at the threshold and a missing month; B has a run at the start,
+    right after the last month of A"""
+    months = pd.date_range("2000-01-31", periods=8, freq="ME")
+    stations_SPI = pd.DataFrame(
+        {
+            "station_name": ["A"] * 8 + ["B"] * 3,
+            "date": np.r_[months, months[:3]],
+            "SPI_1": [-1.0, -1.5, 0.2, -0.99, -1.1, np.nan, -2.0, -1.2]
+            + [-1.3, 0.0, 0.5],
+        }
+    )
+    # Rows don't have to be sorted by stations and dates
+    return stations_SPI.iloc[::-1].reset_index(drop=True)
+
+
+def test_find_runs():
+    mask = np.array([True, True, False, True, False, False, True])
+    starts, lengths = find_runs(mask, np.zeros(len(mask)))
+
+    assert starts.tolist() == [0, 3, 6]
+    assert lengths.tolist() == [2, 1, 1]
+
+
+def test_runs_dont_cross_groups():
+    starts, lengths = find_runs(np.ones(4, dtype=bool), np.array([0, 0, 1, 1]))
+
+    assert starts.tolist() == [0, 2]
+    assert lengths.tolist() == [2, 2]
+
+
+def test_get_drought_events(stations_SPI):
+    events = get_drought_events(stations_SPI, windows=[1])
+    events = events.sort_values(["station_name", "onset"], ignore_index=True)
+
+    expected = pd.DataFrame(
+        {
+            "station_name": ["A", "A", "A", "B"],
+            "window": 1,
+            "onset": pd.to_datetime(
+                ["2000-01-31", "2000-05-31", "2000-07-31", "2000-01-31"]
+            ),
+            "end": pd.to_datetime(
+                ["2000-02-29", "2000-05-31", "2000-08-31", "2000-01-31"]
+            ),
+            "duration": [2, 1, 2, 1],
+            "severity": [2.5, 1.1, 3.2, 1.3],
+            "peak_intensity": [1.5, 1.1, 2.0, 1.3],
+        }
+    )
+    pd.testing.assert_frame_equal(events, expected, check_dtype=False)
+
+
+def test_min_duration_and_threshold(stations_SPI):
+    events = get_drought_events(
+        stations_SPI, windows=[1], threshold=-1.5, min_duration=2
+    )
+
+    assert events.empty
+    assert events.columns.tolist() == [
+        "station_name",
+        "window",
+        "onset",
+        "end",
+        "duration",
+        "severity",
+        "peak_intensity",
+    ]
+
+    events = get_drought_events(stations_SPI, windows=[1], min_duration=2)
+    assert (
+        events["onset"].tolist()
+        == pd.to_datetime(["2000-01-31", "2000-07-31"]).tolist()
+    )
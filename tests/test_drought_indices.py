@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+from itertools import combinations
+from scipy import special
+from src.calculations.drought_indices import (
+    calculate_PNI,
+    calculate_deciles,
+    calculate_SPEI,
+    get_stations_indices,
+)
+from src.preprocessing.precip_cube import build_precip_cube
+
+
+def test_PNI():
+    months = pd.to_datetime(["2000-01-31", "2001-01-31", "2002-01-31", "2002-02-28"])
+    reference_sums = np.full((1, 12, 2), np.nan)
+    reference_sums[0, 0] = [10.0, 30.0]
+    reference_sums[0, 1] = [0.0, 0.0]
+    sums = np.array([[10.0, 30.0, 40.0, 5.0]])
+
+    # February has mean sum equal to 0
+    np.testing.assert_allclose(
+        calculate_PNI(sums, reference_sums, months), [[50.0, 150.0, 200.0, np.nan]]
+    )
+
+
+def test_deciles():
+    months = pd.to_datetime(["2000-01-31"] * 4 + ["2000-02-29"])
+    reference_sums = np.full((1, 12, 11), np.nan)
+    # Deciles of January are 2, 3, ..., 10
+    reference_sums[0, 0] = np.arange(1.0, 12.0)
+    reference_sums[0, 1, 0] = 5.0
+    sums = np.array([[1.0, 2.0, 2.5, 11.0, 5.0]])
+
+    # February has only one reference sum
+    np.testing.assert_array_equal(
+        calculate_deciles(sums, reference_sums, months), [[1, 1, 2, 10, np.nan]]
+    )
+
+
+def get_loglogistic_SPEI(reference: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Function calculating SPEI of x from L-moments of reference sums computed from their definition
+    (means over pairs and triples of sorted sums) and log-logistic distribution of Hosking (1990)
+    """
+    l1 = reference.mean()
+    l2 = np.mean([b - a for a, b in combinations(np.sort(reference), 2)]) / 2
+    l3 = np.mean([c - 2 * b + a for a, b, c in combinations(np.sort(reference), 3)]) / 3
+    k = -l3 / l2
+    alpha = l2 * np.sin(k * np.pi) / (k * np.pi)
+    xi = l1 - alpha * (1 / k - np.pi / np.sin(k * np.pi))
+    y = -np.log(1 - k * (x - xi) / alpha) / k
+    return np.clip(special.ndtri(1 / (1 + np.exp(-y))), -3.09, 3.09)
+
+
+def test_SPEI_is_clipped():
+    months = pd.to_datetime(["2000-01-31", "2000-01-31", "2000-01-31"])
+    reference_sums = np.full((1, 12, 10), np.nan)
+    reference_sums[0, 0] = [-30.0, -12.0, -5.0, -1.0, 0.0, 2.0, 4.0, 9.0, 20.0, 45.0]
+    sums = np.array([[-1e6, 1e6, 0.0]])
+
+    SPEI = calculate_SPEI(sums, reference_sums, months)
+
+    assert SPEI[0, :2].tolist() == [-3.09, 3.09]
+    assert -3.09 < SPEI[0, 2] < 3.09
+
+
+@pytest.fixture
+def preprocessed():
+    """Fixture with daily precipitation of two stations from 1991-2000"""
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("1991-01-01", "2000-12-31", freq="D", name="date")
+    return pd.concat(
+        pd.DataFrame(
+            {
+                "station_code": 249000000 + code,
+                "station_name": name,
+                "24h_precipitation_mm": rng.gamma(0.8, 5, len(dates))
+                .round(1)
+                .astype("float32"),
+                "lat": 52.0,
+                "lon": 15.0,
+                "altitude": 100.0,
+            },
+            index=dates,
+        )
+        for code, name in enumerate(["A", "B"])
+    )
+
+
+def test_SPEI_of_negative_balance(preprocessed):
+    cube = build_precip_cube(preprocessed)
+    months = pd.date_range("1991-01-31", "2000-12-31", freq="ME")
+    rng = np.random.default_rng(1)
+    balance = pd.DataFrame(
+        {"A": rng.normal(-10, 30, len(months)), "B": rng.normal(5, 20, len(months))},
+        index=months,
+    )
+
+    indices = get_stations_indices(cube, ["SPEI", "PNI"], windows=[1], balance=balance)
+
+    assert (balance < 0).to_numpy().mean() > 0.3
+    for station_name in ["A", "B"]:
+        station = indices[indices["station_name"] == station_name].set_index("date")
+        x = balance[station_name]
+        expected = np.concatenate(
+            [
+                get_loglogistic_SPEI(
+                    x[x.index.month == month].to_numpy(),
+                    x[x.index.month == month].to_numpy(),
+                )
+                for month in range(1, 13)
+            ]
+        )
+        order = np.argsort(x.index.month, kind="stable")
+        np.testing.assert_allclose(
+            station["SPEI_1"].to_numpy()[order], expected, rtol=1e-9
+        )
+
+        # PNI is calculated from precipitation, not from the balance
+        precip = cube.monthly_totals(station_name)["24h_precipitation_mm"]
+        normal = precip.groupby(precip.index.month).transform("mean")
+        np.testing.assert_allclose(
+            station["PNI_1"].to_numpy(), 100 * precip / normal, rtol=1e-6
+        )
@@ -0,0 +1,63 @@
+import pytest
+import requests
+from conftest import make_archive
+from src.data_ingestion import download_precipitations
+from src.data_ingestion.fetching import fetch_url
+from src.data_ingestion.download_precipitations import iter_precip_archives
+
+
+def test_fetch_url_retries_5xx(local_server):
+    local_server.files["/file.txt"] = (b"content", {})
+    local_server.failures["/file.txt"] = 2
+
+    response = fetch_url(local_server.url + "/file.txt", retries=3, backoff=0)
+
+    assert response.content == b"content"
+    assert local_server.requests["/file.txt"] == 3
+
+
+def test_fetch_url_raises_after_last_retry(local_server):
+    local_server.files["/file.txt"] = (b"content", {})
+    local_server.failures["/file.txt"] = 5
+
+    with pytest.raises(requests.HTTPError):
+        fetch_url(local_server.url + "/file.txt", retries=2, backoff=0)
+    assert local_server.requests["/file.txt"] == 3
+
+
+def test_fetch_url_propagates_4xx_without_retries(local_server):
+    with pytest.raises(requests.HTTPError) as error:
+        fetch_url(local_server.url + "/missing.txt", retries=3, backoff=0)
+
+    assert error.value.response.status_code == 404
+    assert local_server.requests["/missing.txt"] == 1
+
+
+def test_fetch_url_uses_given_session(local_server):
+    local_server.files["/file.txt"] = (b"content", {})
+    session = requests.Session()
+    session.headers["X-Test"] = "1"
+
+    response = fetch_url(local_server.url + "/file.txt", session=session)
+
+    assert response.request.headers["X-Test"] == "1"
+
+
+def test_iter_precip_archives_bounds_in_flight_downloads(
+    local_server, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        download_precipitations, "download_changes_data", lambda offline: {}
+    )
+    years = range(1991, 1999)
+    for year in years:
+        local_server.files[f"/{year}_o.zip"] = (make_archive(year), {})
+    local_server.delay = 0.1
+    urls = [f"{local_server.url}/{year}_o.zip" for year in years]
+
+    results = list(iter_precip_archives(urls, max_workers=3, backoff=0))
+
+    assert [url for url, _, _ in results] == urls
+    assert [precip["year"].iloc[0] for _, precip, _ in results] == list(years)
+    assert 1 < local_server.max_in_flight <= 3
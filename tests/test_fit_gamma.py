@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from scipy import stats
+from src.calculations.fit_gamma import fit_gamma_distribution, get_gamma_probability
+
+pytestmark = pytest.mark.filterwarnings("ignore:Mean of empty slice")
+
+
+@pytest.fixture
+def sums():
+    """Fixture with rows of sums: ordinary, with some zeros, mostly zero, all zero and with missing values"""
+    rng = np.random.default_rng(1)
+    sums = rng.gamma(rng.uniform(0.8, 4, (6, 1)), 30, (6, 60)).round(1)
+    sums[1, rng.random(60) < 0.2] = 0
+    sums[2] = 0
+    sums[2, [3, 17, 40]] = [2.5, 7.0, 1.2]
+    sums[3] = 0
+    sums[4, :5] = np.nan
+    return sums
+
+
+def fit_scipy_rows(sums: np.ndarray, zeros: str) -> tuple[np.ndarray, np.ndarray]:
+    """Function fitting every row with scipy.stats.gamma.fit as the reference"""
+    shape = np.full(len(sums), np.nan)
+    scale = np.full(len(sums), np.nan)
+    for i, row in enumerate(sums):
+        row = row[~np.isnan(row)]
+        x = np.where(row <= 0, 1e-15, row) if zeros == "clamp" else row[row > 0]
+        if len(np.unique(x)) > 1:
+            shape[i], _, scale[i] = stats.gamma.fit(x, floc=0)
+    return shape, scale
+
+
+@pytest.mark.parametrize("zeros", ["clamp", "mixed"])
+def test_mle_matches_scipy(sums, zeros):
+    shape, scale, _ = fit_gamma_distribution(sums, "mle", zeros)
+    expected_shape, expected_scale = fit_scipy_rows(sums, zeros)
+
+    np.testing.assert_allclose(shape, expected_shape, rtol=1e-9)
+    np.testing.assert_allclose(scale, expected_scale, rtol=1e-9)
+
+
+@pytest.mark.parametrize("fit, rtol", [("thom", 0.02), ("greenwood_durand", 1e-3)])
+def test_approximations_are_close_to_scipy(sums, fit, rtol):
+    shape, scale, _ = fit_gamma_distribution(sums, fit, "mixed")
+    expected_shape, expected_scale = fit_scipy_rows(sums, "mixed")
+
+    np.testing.assert_allclose(shape, expected_shape, rtol=rtol)
+    np.testing.assert_allclose(scale, expected_scale, rtol=rtol)
+
+
+def test_mixed_probability_matches_scipy(sums):
+    probability = get_gamma_probability(sums, "mle", "mixed")
+    shape, scale = fit_scipy_rows(sums, "mixed")
+    zero_probability = np.nanmean(np.where(np.isnan(sums), np.nan, sums <= 0), axis=1)
+    expected = zero_probability[:, None] + (
+        1 - zero_probability[:, None]
+    ) * stats.gamma.cdf(np.maximum(sums, 0), shape[:, None], scale=scale[:, None])
+
+    np.testing.assert_allclose(probability, expected, rtol=1e-9, atol=1e-12)
+    # Zero sums have probability of zero, e.g. 0.95 in the mostly zero row
+    assert probability[2, 0] == pytest.approx(57 / 60)
+
+
+@pytest.mark.parametrize("fit", ["scipy", "mle", "thom", "greenwood_durand"])
+@pytest.mark.parametrize("zeros", ["clamp", "mixed"])
+def test_all_zero_row_is_not_fitted(sums, fit, zeros):
+    shape, scale, zero_probability = fit_gamma_distribution(sums, fit, zeros)
+
+    assert np.isnan(shape[3]) and np.isnan(scale[3])
+    assert zero_probability[3] == (1 if zeros == "mixed" else 0)
+    assert np.isnan(get_gamma_probability(sums, fit, zeros)[3]).all()
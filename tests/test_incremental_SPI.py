@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.calculations.calculate_SPI import get_SPI
+from src.calculations.incremental_SPI import update_SPI
+
+
+@pytest.fixture
+def monthly(tmp_path, monkeypatch):
+    """Fixture with 12 years of synthetic monthly sums in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    os.makedirs("results")
+    rng = np.random.default_rng(0)
+    months = pd.date_range("1991-01-31", "2002-12-31", freq="ME", name="date")
+    return pd.DataFrame(
+        {"24h_precipitation_mm": rng.gamma(2.0, 25.0, len(months)).round(1)},
+        index=months,
+    )
+
+
+def assert_SPIs_equal(SPIs, expected):
+    for SPI, expected_SPI in zip(SPIs, expected):
+        pd.testing.assert_frame_equal(SPI, expected_SPI, check_freq=False, atol=1e-12)
+
+
+def test_appended_months_are_fitted_again_without_reference(monthly, capsys):
+    update_SPI(monthly.iloc[:-12], "Test")
+    SPIs = update_SPI(monthly, "Test")
+
+    assert "Updating SPI" not in capsys.readouterr().out
+    assert_SPIs_equal(SPIs, get_SPI(monthly, "Test", save=False, monthly=True))
+
+
+def test_months_appended_after_reference_are_updated(monthly, capsys):
+    reference = (1991, 2000)
+    update_SPI(monthly.iloc[:-12], "Test", reference=reference)
+    changed = monthly.copy()
+    # The last saved month was incomplete
+    changed.iloc[-13, 0] += 10.0
+    SPIs = update_SPI(changed, "Test", reference=reference)
+
+    assert "Updating SPI from 2001-12" in capsys.readouterr().out
+    expected = update_SPI(changed, "Test", full=True, reference=reference)
+    assert_SPIs_equal(SPIs, expected)
+
+
+def test_changed_reference_months_are_fitted_again(monthly, capsys):
+    reference = (1991, 2000)
+    update_SPI(monthly.iloc[:-36], "Test", reference=reference)
+    SPIs = update_SPI(monthly, "Test", reference=reference)
+
+    assert "Updating SPI" not in capsys.readouterr().out
+    expected = update_SPI(monthly, "Test", full=True, reference=reference)
+    assert_SPIs_equal(SPIs, expected)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.preprocessing.station_partition import get_station_partition
+
+
+def test_count_by_skips_missing_keys():
+    df = pd.DataFrame(
+        {"station_name": ["A", "B", "A", "B"], "year": [1991, 1991, np.nan, 1992]}
+    )
+    counts = get_station_partition(df).count_by(df["year"].to_numpy())
+
+    assert counts.to_dict() == {
+        "A": {1991.0: 1, 1992.0: 0},
+        "B": {1991.0: 1, 1992.0: 1},
+    }
+
+
+def test_count_by_with_mask():
+    df = pd.DataFrame({"station_name": ["A", "A", "B"], "year": [1991, 1991, 1991]})
+    counts = get_station_partition(df).count_by(
+        df["year"].to_numpy(), np.array([True, False, True])
+    )
+
+    assert counts.loc[1991].tolist() == [1, 1]
+
+
+def test_missing_station_name_is_rejected():
+    df = pd.DataFrame({"station_name": ["A", None, "B"]})
+
+    with pytest.raises(ValueError, match="Station name is missing in 1 rows"):
+        get_station_partition(df)
@@ -0,0 +1,24 @@
+import os
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+from src.visualizations.visualize_EDA_results import visualize_with_hue
+
+
+def test_visualize_with_hue_skips_stations_without_river(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("results")
+    df = pd.DataFrame(
+        {
+            "24h_precipitation_mm": np.arange(6.0),
+            "river": ["Odra", None, "Odra", None, "Warta", "Warta"],
+            "date": pd.date_range("2000-01-01", periods=6),
+        }
+    )
+
+    visualize_with_hue(df, "Lubusz", "river")
+
+    assert os.path.exists("results/Lubusz_precip_boxplot_river_data.png")